@@ -0,0 +1,66 @@
+"""
+分析模块
+提供基于 NumPy 的向量化技术指标计算（按已收盘K线缓存）、K线重采样、预测回测、合约网格回测、全市场筛选，以及可落盘恢复的流式增量指标
+"""
+from .indicators import (
+    sma,
+    ema,
+    rsi,
+    bollinger,
+    macd,
+    atr,
+    realized_volatility,
+    compute_indicators,
+    compute_batch,
+    last_values,
+)
+from .resample import bucket_start, resample, resample_many
+from .backtest import BacktestReport, run_backtest, run_backtest_sync, format_report
+from .grid_sim import GridParams, GridResult, simulate, simulate_many, sweep, param_grid, run_grid_sweep
+from .memo import IndicatorCache, IndicatorResult, cached_indicators, get_indicators, get_indicators_sync, indicator_cache
+from .screener import Condition, ScanResult, parse_conditions, scan, scan_text, format_scan, universe
+from .streaming import IndicatorSet, StreamingIndicators, streaming_indicators, read_indicators
+
+__all__ = [
+    "sma",
+    "ema",
+    "rsi",
+    "bollinger",
+    "macd",
+    "atr",
+    "realized_volatility",
+    "compute_indicators",
+    "compute_batch",
+    "last_values",
+    "bucket_start",
+    "resample",
+    "resample_many",
+    "BacktestReport",
+    "run_backtest",
+    "run_backtest_sync",
+    "format_report",
+    "GridParams",
+    "GridResult",
+    "simulate",
+    "simulate_many",
+    "sweep",
+    "param_grid",
+    "run_grid_sweep",
+    "IndicatorCache",
+    "IndicatorResult",
+    "cached_indicators",
+    "get_indicators",
+    "get_indicators_sync",
+    "indicator_cache",
+    "Condition",
+    "ScanResult",
+    "parse_conditions",
+    "scan",
+    "scan_text",
+    "format_scan",
+    "universe",
+    "IndicatorSet",
+    "StreamingIndicators",
+    "streaming_indicators",
+    "read_indicators",
+]
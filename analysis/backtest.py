@@ -0,0 +1,361 @@
+"""
+预测回测模块
+将每日分析保存的预测记录与之后实际走出的K线对齐，向量化计算：
+- 方向命中率（偏多 / 偏空 / 震荡）
+- 按置信度分组的校准情况（命中率 vs 置信度对应的概率）与 Brier 分数
+- 目标价格区间的命中率
+
+记录可以按交易对、模型或提示词版本分组，便于比较不同版本的预测质量
+
+用法:
+    python -m analysis.backtest --horizon 24 --group-by model
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from okx_api.candle_store import candle_store
+from okx_api.client import async_okx_client
+from okx_api.history import BAR_MS
+
+# 每日分析的历史记录文件
+HISTORY_FILE = Path(__file__).parent.parent / "webhook" / "trading_analysis" / "analysis_history.json"
+
+# 用于对齐的K线周期
+SCORE_BAR = "1H"
+
+# 方向编码
+DIRECTIONS = {"偏多": 1, "偏空": -1, "震荡": 0}
+
+# 置信度编码及其对应的预期命中概率
+CONFIDENCE_LEVELS = ("高", "中", "低")
+CONFIDENCE_PROB = np.array([0.8, 0.6, 0.4])
+
+# 价格区间中的数字，如 "$60,000 ~ $62,500" 或 "60000-62500"
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+@dataclass(slots=True)
+class PredictionArrays:
+    """预测记录的列式表示"""
+    ts: np.ndarray          # 预测时间（毫秒）
+    symbols: np.ndarray     # 交易对（object）
+    groups: np.ndarray      # 分组标签（object）
+    direction: np.ndarray   # 1 偏多 / -1 偏空 / 0 震荡，无法识别为 -2
+    confidence: np.ndarray  # 0 高 / 1 中 / 2 低，无法识别为 -1
+    price: np.ndarray       # 预测时价格
+    low: np.ndarray         # 目标区间下沿（NaN 表示无法解析）
+    high: np.ndarray        # 目标区间上沿
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+
+@dataclass(slots=True)
+class GroupScore:
+    """单个分组的评分"""
+    group: str
+    total: int = 0
+    scored: int = 0
+    hit_rate: Optional[float] = None
+    brier: Optional[float] = None
+    # 置信度 -> (样本数, 命中率, 预期命中概率)
+    calibration: dict[str, tuple[int, Optional[float], float]] = field(default_factory=dict)
+    range_scored: int = 0
+    range_capture: Optional[float] = None
+    avg_directional_return: Optional[float] = None
+
+
+@dataclass(slots=True)
+class BacktestReport:
+    """回测结果"""
+    horizon_hours: float
+    band: float
+    group_by: str
+    groups: list[GroupScore]
+    pending: int
+    elapsed: float
+
+
+def load_records(path: Path = HISTORY_FILE) -> list[dict[str, Any]]:
+    """读取历史预测记录"""
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_range(text: Any) -> tuple[float, float]:
+    """
+    解析目标价格区间
+
+    Returns:
+        (low, high)，无法解析时为 (NaN, NaN)
+    """
+    numbers = [float(n) for n in NUMBER_PATTERN.findall(str(text or "").replace(",", ""))]
+    if len(numbers) < 2:
+        return np.nan, np.nan
+    return min(numbers[:2]), max(numbers[:2])
+
+
+def to_arrays(records: list[dict[str, Any]], group_by: str = "symbol") -> PredictionArrays:
+    """
+    将预测记录转换为列式数组
+
+    Args:
+        records: HistoryManager 保存的记录
+        group_by: 分组字段，如 symbol / model / prompt_version；缺失时记为 unknown
+    """
+    n = len(records)
+    ts = np.empty(n, dtype=np.int64)
+    price = np.empty(n, dtype=np.float64)
+    bounds = np.empty((n, 2), dtype=np.float64)
+    for i, record in enumerate(records):
+        try:
+            ts[i] = int(datetime.strptime(record.get("date", ""), "%Y-%m-%d %H:%M:%S").timestamp() * 1000)
+        except ValueError:
+            ts[i] = 0
+        price[i] = float(record.get("current_price") or np.nan)
+        bounds[i] = parse_range(record.get("target_price_range"))
+
+    return PredictionArrays(
+        ts=ts,
+        symbols=np.array([r.get("symbol", "") for r in records], dtype=object),
+        groups=np.array([str(r.get(group_by) or "unknown") for r in records], dtype=object),
+        direction=np.array([DIRECTIONS.get(str(r.get("prediction") or ""), -2) for r in records], dtype=np.int8),
+        confidence=np.array(
+            [CONFIDENCE_LEVELS.index(r["confidence"]) if r.get("confidence") in CONFIDENCE_LEVELS else -1 for r in records],
+            dtype=np.int8,
+        ),
+        price=price,
+        low=bounds[:, 0],
+        high=bounds[:, 1],
+    )
+
+
+def realized_prices(
+    target_ts: np.ndarray,
+    candle_ts: np.ndarray,
+    candle_close: np.ndarray,
+    bar: str = SCORE_BAR,
+    now_ms: Optional[int] = None,
+) -> np.ndarray:
+    """
+    取每个目标时间点的实际价格：收盘时间不晚于目标时间的最后一根K线的收盘价
+
+    Args:
+        now_ms: 当前时间（毫秒），默认当前时间；只有已收盘的K线覆盖到的目标时间才算到期
+
+    Returns:
+        与 target_ts 等长的价格数组，K线尚未覆盖目标时间或目标时间落在未收盘的K线内时为 NaN
+    """
+    result = np.full(len(target_ts), np.nan)
+    if len(candle_ts) == 0:
+        return result
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    close_ts = candle_ts + BAR_MS[bar]
+    # 最后一根K线可能尚未收盘：落在它之内的目标时间还没有确定的价格，不算到期
+    closed = int(np.searchsorted(close_ts, now_ms, side="right"))
+    if closed == 0:
+        return result
+    index = np.searchsorted(close_ts, target_ts, side="right") - 1
+    valid = (index >= 0) & (target_ts <= close_ts[closed - 1])
+    result[valid] = candle_close[index[valid]]
+    return result
+
+
+def score(preds: PredictionArrays, realized: np.ndarray, band: float = 0.01) -> list[GroupScore]:
+    """
+    计算各分组的评分
+
+    Args:
+        preds: 预测记录
+        realized: 每条记录在预测周期结束时的实际价格（NaN 表示尚未到期）
+        band: 震荡判定阈值，|涨跌幅| <= band 视为震荡
+
+    Returns:
+        分组评分列表（按分组名排序）
+    """
+    labels, group_index = np.unique(preds.groups.astype(str), return_inverse=True)
+    n_groups = len(labels)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = realized / preds.price - 1
+    scored = ~np.isnan(change) & (preds.direction != -2)
+
+    outcome = np.where(change > band, 1, np.where(change < -band, -1, 0))
+    hit = scored & (outcome == preds.direction)
+
+    def per_group(mask: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        values = mask.astype(np.float64) if weights is None else np.where(mask, weights, 0.0)
+        return np.bincount(group_index, weights=values, minlength=n_groups)
+
+    total = np.bincount(group_index, minlength=n_groups)
+    scored_n = per_group(scored)
+    hits = per_group(hit)
+
+    # 方向收益：偏多取涨跌幅，偏空取相反数，震荡不计
+    directional = scored & (preds.direction != 0)
+    directional_return = per_group(directional, preds.direction * change)
+    directional_n = per_group(directional)
+
+    # 校准：置信度对应的预期概率与实际命中
+    has_conf = scored & (preds.confidence >= 0)
+    expected = np.where(preds.confidence >= 0, CONFIDENCE_PROB[preds.confidence], np.nan)
+    brier_sum = per_group(has_conf, (expected - hit) ** 2)
+    brier_n = per_group(has_conf)
+    conf_key = group_index * len(CONFIDENCE_LEVELS) + np.maximum(preds.confidence, 0)
+    conf_n = np.bincount(conf_key[has_conf], minlength=n_groups * len(CONFIDENCE_LEVELS))
+    conf_hits = np.bincount(conf_key[has_conf & hit], minlength=n_groups * len(CONFIDENCE_LEVELS))
+
+    # 区间命中：到期价格落在目标区间内
+    has_range = scored & ~np.isnan(preds.low)
+    captured = has_range & (realized >= preds.low) & (realized <= preds.high)
+    range_n = per_group(has_range)
+    range_hits = per_group(captured)
+
+    def ratio(num: float, den: float) -> Optional[float]:
+        return float(num / den) if den else None
+
+    results = []
+    for g, label in enumerate(labels):
+        calibration = {}
+        for c, level in enumerate(CONFIDENCE_LEVELS):
+            k = g * len(CONFIDENCE_LEVELS) + c
+            calibration[level] = (int(conf_n[k]), ratio(conf_hits[k], conf_n[k]), float(CONFIDENCE_PROB[c]))
+        results.append(GroupScore(
+            group=str(label),
+            total=int(total[g]),
+            scored=int(scored_n[g]),
+            hit_rate=ratio(hits[g], scored_n[g]),
+            brier=ratio(brier_sum[g], brier_n[g]),
+            calibration=calibration,
+            range_scored=int(range_n[g]),
+            range_capture=ratio(range_hits[g], range_n[g]),
+            avg_directional_return=ratio(directional_return[g], directional_n[g]),
+        ))
+    return results
+
+
+async def run_backtest(
+    path: Path = HISTORY_FILE,
+    horizon_hours: float = 24,
+    band: float = 0.01,
+    group_by: str = "symbol",
+    symbol: Optional[str] = None,
+) -> BacktestReport:
+    """
+    回测历史预测
+
+    Args:
+        path: 历史记录文件
+        horizon_hours: 预测周期（小时），以预测时间之后该时长的价格作为结果
+        band: 震荡判定阈值
+        group_by: 分组字段（symbol / model / prompt_version）
+        symbol: 只回测指定交易对
+
+    Returns:
+        回测结果
+    """
+    started = time.perf_counter()
+    records = load_records(path)
+    if symbol:
+        records = [r for r in records if r.get("symbol") == symbol]
+    preds = to_arrays(records, group_by)
+
+    horizon_ms = int(horizon_hours * 3_600_000)
+    target_ts = preds.ts + horizon_ms
+    realized = np.full(len(preds), np.nan)
+
+    # 每个交易对只取一次覆盖全部记录的K线
+    now_ms = int(time.time() * 1000)
+    bar_ms = BAR_MS[SCORE_BAR]
+    symbols = [s for s in np.unique(preds.symbols.astype(str)) if s]
+
+    async def fetch(inst_id: str):
+        mask = (preds.symbols == inst_id) & (preds.ts > 0)
+        if not mask.any():
+            return inst_id, mask, None
+        limit = int((now_ms - preds.ts[mask].min()) // bar_ms) + 2
+        return inst_id, mask, await candle_store.get(inst_id, SCORE_BAR, limit)
+
+    for inst_id, mask, candles in await asyncio.gather(*(fetch(s) for s in symbols)):
+        if candles is None:
+            continue
+        candle_ts, ohlcv = candles
+        realized[mask] = realized_prices(target_ts[mask], candle_ts, ohlcv[:, 3], now_ms=now_ms)
+
+    groups = score(preds, realized, band)
+    pending = int(np.isnan(realized).sum())
+    return BacktestReport(horizon_hours, band, group_by, groups, pending, time.perf_counter() - started)
+
+
+def run_backtest_sync(**kwargs) -> BacktestReport:
+    """
+    回测历史预测 (同步封装)
+    """
+    return async_okx_client.run_sync(run_backtest(**kwargs))
+
+
+def _pct(value: Optional[float]) -> str:
+    return "N/A" if value is None else f"{value * 100:.1f}%"
+
+
+def format_report(report: BacktestReport) -> str:
+    """
+    格式化回测结果
+
+    Returns:
+        回测报告文本
+    """
+    if not report.groups:
+        return "暂无可回测的预测记录"
+
+    lines = [
+        f"预测回测（周期 {report.horizon_hours:g}h，震荡阈值 ±{report.band * 100:g}%，按 {report.group_by} 分组）:"
+    ]
+    for g in report.groups:
+        lines.append(
+            f"- {g.group}: 已评分 {g.scored}/{g.total}，方向命中率 {_pct(g.hit_rate)}，"
+            f"区间命中率 {_pct(g.range_capture)} ({g.range_scored})，"
+            f"方向收益 {_pct(g.avg_directional_return)}，"
+            f"Brier {'N/A' if g.brier is None else f'{g.brier:.3f}'}"
+        )
+        calibration = [
+            f"{level}: {_pct(rate)}/{expected * 100:.0f}% ({n})"
+            for level, (n, rate, expected) in g.calibration.items()
+            if n
+        ]
+        if calibration:
+            lines.append(f"  置信度校准（实际/预期）: {', '.join(calibration)}")
+
+    lines.append(f"\n未到期记录: {report.pending}，耗时 {report.elapsed:.2f}s")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="每日预测回测")
+    parser.add_argument("--history", type=Path, default=HISTORY_FILE, help="历史记录文件")
+    parser.add_argument("--horizon", type=float, default=24, help="预测周期（小时）")
+    parser.add_argument("--band", type=float, default=0.01, help="震荡判定阈值（小数）")
+    parser.add_argument("--group-by", default="symbol", help="分组字段: symbol / model / prompt_version")
+    parser.add_argument("--symbol", default=None, help="只回测指定交易对")
+    args = parser.parse_args()
+
+    report = run_backtest_sync(
+        path=args.history, horizon_hours=args.horizon, band=args.band, group_by=args.group_by, symbol=args.symbol
+    )
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""
+合约网格回测模块
+用历史K线回放等差合约网格（minPx / maxPx / gridNum / lever / direction），计算成交次数、
+网格利润、浮动盈亏与爆仓事件，用于在开网格之前评估参数
+
+成交模型：
+- 每根K线按 开 -> 低 -> 高 -> 收（阳线）或 开 -> 高 -> 低 -> 收（阴线）拆成单调的价格段
+- 网格状态是"最近成交的档位" r：价格下穿 r-1 档买入并下移，上穿 r+1 档卖出并上移，
+  区间外不再成交
+- 每一段对 r 的作用都是一个截断函数 clip(r, lo, hi)，截断函数的复合仍是截断函数，
+  因此整条路径用前缀倍增一次性向量化求出，不需要逐K线循环
+- 多组参数按块组成 (参数组数, 价格段数) 的矩阵同时计算，参数扫描再按块分发到多个进程
+
+用法:
+    python -m analysis.grid_sim --inst BTC-USDT-SWAP --days 30 --min 90000 --max 110000 \
+        --grids 10:150:10 --lever 1,3,5,10
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+from okx_api.candle_store import candle_store
+from okx_api.client import async_okx_client
+from okx_api.history import BAR_MS
+from okx_api.models import GridStrategy
+
+# 网格方向：持仓 = 单格数量 × (锚点 - r)
+DIRECTIONS = ("neutral", "long", "short")
+
+# 默认手续费率（网格挂单按 maker 计）与维持保证金率
+DEFAULT_FEE = 0.0002
+DEFAULT_MMR = 0.005
+
+# 单个计算块的元素上限（参数组数 × 价格段数），控制内存占用
+CHUNK_ELEMENTS = 2_000_000
+
+# 价格恰好落在档位上时的浮点容差（以格距为单位）
+LEVEL_EPS = 1e-9
+
+
+@dataclass(slots=True)
+class GridParams:
+    """等差合约网格参数"""
+    min_px: float
+    max_px: float
+    grid_num: int
+    lever: float
+    direction: str = "neutral"
+    investment: float = 1000.0
+
+    @classmethod
+    def from_strategy(cls, strategy: GridStrategy, investment: float = 1000.0) -> "GridParams":
+        """由运行中的网格策略生成参数"""
+        return cls(
+            min_px=strategy.min_px,
+            max_px=strategy.max_px,
+            grid_num=strategy.grid_num,
+            lever=strategy.lever,
+            direction=strategy.direction or "neutral",
+            investment=investment,
+        )
+
+
+@dataclass(slots=True)
+class GridResult:
+    """单组参数的回测结果"""
+    params: GridParams
+    fills: int
+    grid_profit: float
+    fees: float
+    float_pnl: float
+    total_pnl: float
+    pnl_ratio: float
+    max_drawdown: float
+    final_position: float
+    liquidated: bool
+    liq_ts: Optional[int] = None
+    liq_px: Optional[float] = None
+
+
+def price_path(ts: np.ndarray, ohlcv: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    将K线展开为单调价格段的端点序列
+
+    Returns:
+        (ts, price)，每根K线 4 个点：开、第一个极值、第二个极值、收
+    """
+    o, h, l, c = ohlcv[:, 0], ohlcv[:, 1], ohlcv[:, 2], ohlcv[:, 3]
+    bullish = c >= o
+    points = np.column_stack((o, np.where(bullish, l, h), np.where(bullish, h, l), c))
+    return np.repeat(np.asarray(ts, dtype=np.int64), 4), points.ravel()
+
+
+def _compose_scan(lo: np.ndarray, hi: np.ndarray) -> None:
+    """
+    截断函数的前缀复合（原地，沿最后一个轴）
+    复合后第 t 列表示依次经过第 0..t 段后的整体作用：r_t = clip(r_0, lo_t, hi_t)
+    """
+    length = lo.shape[-1]
+    shift = 1
+    while shift < length:
+        # 先经过前面的 f，再经过当前的 g：clip(clip(r, f_lo, f_hi), g_lo, g_hi)
+        g_lo, g_hi = lo[:, shift:], hi[:, shift:]
+        new_lo = np.clip(lo[:, :-shift], g_lo, g_hi)
+        new_hi = np.clip(hi[:, :-shift], g_lo, g_hi)
+        lo[:, shift:] = new_lo
+        hi[:, shift:] = new_hi
+        shift *= 2
+
+
+def _level_index(price: np.ndarray, min_px: np.ndarray, step: np.ndarray) -> np.ndarray:
+    """价格相对最低档的格数（浮点），贴近整数时取整以避免漏掉恰好触及档位的成交"""
+    x = (price - min_px) / step
+    nearest = np.round(x)
+    return np.where(np.abs(x - nearest) < LEVEL_EPS, nearest, x)
+
+
+def simulate_arrays(
+    ts: np.ndarray,
+    price: np.ndarray,
+    min_px: np.ndarray,
+    max_px: np.ndarray,
+    grid_num: np.ndarray,
+    lever: np.ndarray,
+    direction: np.ndarray,
+    investment: np.ndarray,
+    fee: float = DEFAULT_FEE,
+    mmr: float = DEFAULT_MMR,
+) -> dict[str, np.ndarray]:
+    """
+    向量化回放一组网格参数
+
+    Args:
+        ts, price: price_path 生成的价格段端点
+        min_px, max_px, grid_num, lever, investment: 形如 (参数组数,) 的参数数组
+        direction: 方向编码，0 中性 / 1 做多 / 2 做空（DIRECTIONS 的下标）
+        fee: 手续费率
+        mmr: 维持保证金率
+
+    Returns:
+        指标名 -> (参数组数,) 的结果数组
+    """
+    col = lambda a: np.asarray(a, dtype=np.float64).reshape(-1, 1)
+    min_px, max_px, investment, lever = col(min_px), col(max_px), col(investment), col(lever)
+    n = np.asarray(grid_num, dtype=np.int64).reshape(-1, 1)
+    direction = np.asarray(direction, dtype=np.int64).reshape(-1, 1)
+    step = (max_px - min_px) / n
+    # 单格数量：满仓名义价值约为 投入 × 杠杆
+    qty = investment * lever / (n * (min_px + max_px) / 2)
+
+    p = price[np.newaxis, :]
+    x = _level_index(p, min_px, step)
+    prev = np.concatenate((price[:1], price[:-1]))[np.newaxis, :]
+    down = p < prev
+    up = p > prev
+
+    # 下跌段：r = min(r, 触及的最低档)；上涨段：r = max(r, 触及的最高档)；平盘段不变
+    lo = np.where(up, np.clip(np.floor(x), 0, n), 0).astype(np.int64)
+    hi = np.where(down, np.clip(np.ceil(x), 0, n), n).astype(np.int64)
+    _compose_scan(lo, hi)
+
+    # 初始档位取离开盘价最近的一档；做多 / 做空网格开盘即按锚点建好底仓
+    r0 = np.clip(np.round(_level_index(price[0], min_px, step)), 0, n).astype(np.int64)
+    anchor = np.select([direction == 1, direction == 2], [n, 0], r0)
+    r = np.clip(r0, lo, hi)
+
+    # 每段成交：r 从 a 移到 b，买入档位 [b, a-1] 或卖出档位 [a+1, b]，等差档位求和有闭式
+    r_prev = np.concatenate((r0, r[:, :-1]), axis=1)
+    d = r - r_prev
+    cash = qty * (d * min_px + step * d * (r_prev + r + np.sign(d)) / 2)
+
+    initial_pos = qty * (anchor - r0)
+    initial_cash = -initial_pos * price[0]
+    position = qty * (anchor - r)
+    cum_cash = initial_cash + np.cumsum(cash, axis=1)
+    cum_fees = fee * (np.abs(initial_cash) + np.cumsum(np.abs(cash), axis=1))
+    equity = investment + cum_cash + position * p - cum_fees
+
+    # 爆仓：权益不高于维持保证金（段端点就是段内最不利的价格）
+    liq = equity <= mmr * np.abs(position) * p
+    liquidated = liq.any(axis=1)
+    end = np.where(liquidated, liq.argmax(axis=1), price.size - 1)
+    rows = np.arange(len(end))
+
+    equity = np.where(np.arange(price.size) > end[:, np.newaxis], 0.0, equity)
+    equity[liquidated, end[liquidated]] = 0.0
+    peak = np.maximum.accumulate(np.maximum(equity, investment), axis=1)
+    max_drawdown = (1 - equity / peak).max(axis=1)
+
+    fills = np.cumsum(np.abs(d), axis=1)[rows, end]
+    net = np.abs(r[rows, end] - r0[:, 0])
+    grid_profit = qty[:, 0] * step[:, 0] * (fills - net) / 2
+    fees = cum_fees[rows, end]
+    total_pnl = np.where(liquidated, -investment[:, 0], equity[rows, end] - investment[:, 0])
+
+    return {
+        "fills": fills,
+        "grid_profit": grid_profit,
+        "fees": fees,
+        "float_pnl": np.where(liquidated, 0.0, total_pnl + fees - grid_profit),
+        "total_pnl": total_pnl,
+        "pnl_ratio": total_pnl / investment[:, 0],
+        "max_drawdown": max_drawdown,
+        "final_position": np.where(liquidated, 0.0, position[rows, end]),
+        "liquidated": liquidated,
+        "liq_ts": ts[end],
+        "liq_px": price[end],
+    }
+
+
+def _to_columns(params: list[GridParams]) -> dict[str, np.ndarray]:
+    return {
+        "min_px": np.array([p.min_px for p in params], dtype=np.float64),
+        "max_px": np.array([p.max_px for p in params], dtype=np.float64),
+        "grid_num": np.array([p.grid_num for p in params], dtype=np.int64),
+        "lever": np.array([p.lever for p in params], dtype=np.float64),
+        "direction": np.array([DIRECTIONS.index(p.direction) for p in params], dtype=np.int64),
+        "investment": np.array([p.investment for p in params], dtype=np.float64),
+    }
+
+
+def _to_results(params: list[GridParams], out: dict[str, np.ndarray]) -> list[GridResult]:
+    results = []
+    for i, p in enumerate(params):
+        liquidated = bool(out["liquidated"][i])
+        results.append(GridResult(
+            params=p,
+            fills=int(out["fills"][i]),
+            grid_profit=float(out["grid_profit"][i]),
+            fees=float(out["fees"][i]),
+            float_pnl=float(out["float_pnl"][i]),
+            total_pnl=float(out["total_pnl"][i]),
+            pnl_ratio=float(out["pnl_ratio"][i]),
+            max_drawdown=float(out["max_drawdown"][i]),
+            final_position=float(out["final_position"][i]),
+            liquidated=liquidated,
+            liq_ts=int(out["liq_ts"][i]) if liquidated else None,
+            liq_px=float(out["liq_px"][i]) if liquidated else None,
+        ))
+    return results
+
+
+def _validate(params: list[GridParams]) -> None:
+    for p in params:
+        if p.direction not in DIRECTIONS:
+            raise ValueError(f"未知的网格方向: {p.direction}")
+        if not (0 < p.min_px < p.max_px) or p.grid_num < 1 or p.lever <= 0 or p.investment <= 0:
+            raise ValueError(f"无效的网格参数: {p}")
+
+
+def simulate_many(
+    ts: np.ndarray,
+    ohlcv: np.ndarray,
+    params: list[GridParams],
+    fee: float = DEFAULT_FEE,
+    mmr: float = DEFAULT_MMR,
+) -> list[GridResult]:
+    """
+    在当前进程内回放多组网格参数（按块向量化）
+
+    Args:
+        ts: K线时间戳（升序）
+        ohlcv: K线 (N, 5)
+        params: 网格参数列表
+
+    Returns:
+        与 params 顺序一致的回测结果
+    """
+    _validate(params)
+    if not params or len(ts) == 0:
+        return []
+
+    path_ts, price = price_path(ts, ohlcv)
+    chunk = max(1, CHUNK_ELEMENTS // price.size)
+    results = []
+    for start in range(0, len(params), chunk):
+        part = params[start:start + chunk]
+        out = simulate_arrays(path_ts, price, **_to_columns(part), fee=fee, mmr=mmr)
+        results.extend(_to_results(part, out))
+    return results
+
+
+def simulate(
+    ts: np.ndarray,
+    ohlcv: np.ndarray,
+    params: GridParams,
+    fee: float = DEFAULT_FEE,
+    mmr: float = DEFAULT_MMR,
+) -> Optional[GridResult]:
+    """
+    回放单组网格参数
+
+    Returns:
+        回测结果，没有K线时返回 None
+    """
+    results = simulate_many(ts, ohlcv, [params], fee, mmr)
+    return results[0] if results else None
+
+
+# 子进程内共享的K线，由进程池 initializer 设置一次，避免每个任务重复传输
+_worker_candles: Optional[tuple[np.ndarray, np.ndarray, float, float]] = None
+
+
+def _init_worker(ts: np.ndarray, ohlcv: np.ndarray, fee: float, mmr: float) -> None:
+    global _worker_candles
+    _worker_candles = (ts, ohlcv, fee, mmr)
+
+
+def _simulate_chunk(params: list[GridParams]) -> list[GridResult]:
+    if _worker_candles is None:
+        raise RuntimeError("进程池未初始化K线数据")
+    ts, ohlcv, fee, mmr = _worker_candles
+    return simulate_many(ts, ohlcv, params, fee, mmr)
+
+
+def param_grid(
+    min_px: Iterable[float],
+    max_px: Iterable[float],
+    grid_num: Iterable[int],
+    lever: Iterable[float],
+    direction: Iterable[str] = ("neutral",),
+    investment: float = 1000.0,
+) -> list[GridParams]:
+    """
+    生成参数组合（笛卡尔积），跳过 min_px >= max_px 的组合
+    """
+    return [
+        GridParams(lo, hi, int(n), lev, d, investment)
+        for lo, hi, n, lev, d in itertools.product(min_px, max_px, grid_num, lever, direction)
+        if lo < hi
+    ]
+
+
+def sweep(
+    ts: np.ndarray,
+    ohlcv: np.ndarray,
+    params: list[GridParams],
+    fee: float = DEFAULT_FEE,
+    mmr: float = DEFAULT_MMR,
+    workers: Optional[int] = None,
+) -> list[GridResult]:
+    """
+    多进程参数扫描
+    参数按块分发到进程池，每个进程内仍按块向量化；组合较少时直接在当前进程计算
+
+    Args:
+        workers: 进程数，默认为 CPU 核数
+
+    Returns:
+        与 params 顺序一致的回测结果
+    """
+    _validate(params)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(params) < 2 * workers:
+        return simulate_many(ts, ohlcv, params, fee, mmr)
+
+    size = -(-len(params) // (workers * 4))
+    chunks = [params[i:i + size] for i in range(0, len(params), size)]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(ts, ohlcv, fee, mmr)) as pool:
+        return [result for part in pool.map(_simulate_chunk, chunks) for result in part]
+
+
+def rank(results: list[GridResult], top: int = 10) -> list[GridResult]:
+    """按收益率排序，爆仓的组合排在最后"""
+    return sorted(results, key=lambda r: (r.liquidated, -r.pnl_ratio))[:top]
+
+
+async def load_candles(inst_id: str, bar: str = "1H", days: float = 30) -> tuple[np.ndarray, np.ndarray]:
+    """
+    读取回测所需的历史K线（本地存储 + 增量拉取）
+
+    Returns:
+        (ts, ohlcv)，按时间升序
+    """
+    limit = max(1, int(days * 86_400_000 // BAR_MS[bar]))
+    return await candle_store.get(inst_id, bar, limit)
+
+
+async def run_grid_sweep(
+    inst_id: str,
+    params: list[GridParams],
+    bar: str = "1H",
+    days: float = 30,
+    fee: float = DEFAULT_FEE,
+    mmr: float = DEFAULT_MMR,
+    workers: Optional[int] = None,
+) -> list[GridResult]:
+    """
+    拉取K线并扫描网格参数，计算在线程中进行，不阻塞事件循环
+
+    Returns:
+        与 params 顺序一致的回测结果
+    """
+    ts, ohlcv = await load_candles(inst_id, bar, days)
+    return await asyncio.to_thread(sweep, ts, ohlcv, params, fee, mmr, workers)
+
+
+def format_result(result: GridResult) -> str:
+    """
+    格式化单组回测结果
+    """
+    p = result.params
+    line = (
+        f"{p.direction} {p.min_px:g}~{p.max_px:g} {p.grid_num}格 {p.lever:g}x: "
+        f"收益 {result.total_pnl:+.2f} ({result.pnl_ratio * 100:+.2f}%)，"
+        f"网格利润 {result.grid_profit:.2f}，浮动盈亏 {result.float_pnl:+.2f}，"
+        f"手续费 {result.fees:.2f}，成交 {result.fills} 次，最大回撤 {result.max_drawdown * 100:.1f}%"
+    )
+    if result.liq_ts is not None:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(result.liq_ts / 1000))
+        line += f"，[爆仓] {when} @ {result.liq_px:g}"
+    return line
+
+
+def format_sweep(results: list[GridResult], top: int = 10) -> str:
+    """
+    格式化参数扫描结果（收益率前 top 名及爆仓统计）
+    """
+    if not results:
+        return "暂无回测结果（没有K线数据或参数为空）"
+
+    liquidated = sum(r.liquidated for r in results)
+    lines = [f"网格参数扫描: {len(results)} 组，爆仓 {liquidated} 组，收益率前 {min(top, len(results))}:"]
+    lines.extend(f"{i}. {format_result(r)}" for i, r in enumerate(rank(results, top), 1))
+    return "\n".join(lines)
+
+
+def _parse_values(text: str, cast=float) -> list:
+    """解析 "1,2,5" 或 "10:100:10"（含终点）形式的参数列表"""
+    if ":" in text:
+        start, stop, step = (float(v) for v in text.split(":"))
+        return [cast(v) for v in np.arange(start, stop + step / 2, step)]
+    return [cast(v) for v in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合约网格回测与参数扫描")
+    parser.add_argument("--inst", required=True, help="产品ID，如 BTC-USDT-SWAP")
+    parser.add_argument("--bar", default="1H", help="K线周期")
+    parser.add_argument("--days", type=float, default=30, help="回测天数")
+    parser.add_argument("--min", required=True, help="区间下沿，支持 a,b,c 或 start:stop:step")
+    parser.add_argument("--max", required=True, help="区间上沿")
+    parser.add_argument("--grids", default="20", help="网格数量")
+    parser.add_argument("--lever", default="1", help="杠杆倍数")
+    parser.add_argument("--direction", default="neutral", help="方向: neutral / long / short，可逗号分隔")
+    parser.add_argument("--investment", type=float, default=1000.0, help="投入保证金（USDT）")
+    parser.add_argument("--fee", type=float, default=DEFAULT_FEE, help="手续费率")
+    parser.add_argument("--mmr", type=float, default=DEFAULT_MMR, help="维持保证金率")
+    parser.add_argument("--workers", type=int, default=None, help="进程数")
+    parser.add_argument("--top", type=int, default=10, help="展示前 N 名")
+    args = parser.parse_args()
+
+    params = param_grid(
+        _parse_values(args.min),
+        _parse_values(args.max),
+        _parse_values(args.grids, int),
+        _parse_values(args.lever),
+        args.direction.split(","),
+        args.investment,
+    )
+    started = time.perf_counter()
+    results = async_okx_client.run_sync(
+        run_grid_sweep(args.inst, params, args.bar, args.days, args.fee, args.mmr, args.workers)
+    )
+    print(format_sweep(results, args.top))
+    print(f"\n耗时 {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+向量化技术指标模块
+基于 NumPy 计算完整的指标序列（MA、EMA、RSI、布林带、MACD、ATR、已实现波动率）
+
+所有函数沿最后一个轴计算，输入可以是一维序列，也可以是 (品种数, K线数) 的二维矩阵，
+一次调用即可覆盖多个品种 × 多个周期；数据不足的位置为 NaN
+"""
+from typing import Hashable, Mapping, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from okx_api.history import BAR_MS
+from okx_api.models import CandleBatch
+
+# 一年的毫秒数（加密货币 7x24 交易）
+YEAR_MS = 365 * 86_400_000
+
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _rolling(x: np.ndarray, period: int, reducer) -> np.ndarray:
+    """
+    滑动窗口聚合，结果与输入等长，前 period-1 个位置为 NaN
+    """
+    out = np.full(x.shape, np.nan)
+    if period <= 0 or x.shape[-1] < period:
+        return out
+    windows = sliding_window_view(x, period, axis=-1)
+    out[..., period - 1 :] = reducer(windows, axis=-1)
+    return out
+
+
+def _smooth(x: np.ndarray, alpha: float, period: int) -> np.ndarray:
+    """
+    递推平滑：以首个完整窗口的均值为种子，此后 s = s + alpha * (x - s)
+    EMA 使用 alpha = 2 / (period + 1)，Wilder 平滑使用 alpha = 1 / period
+    左侧的 NaN（不同长度序列补齐）会被跳过，种子从各自的第一个完整窗口开始
+    """
+    seeds = _rolling(x, period, np.mean)
+    out = np.full(x.shape, np.nan)
+    prev = np.full(x.shape[:-1], np.nan)
+    for t in range(x.shape[-1]):
+        seed = seeds[..., t]
+        prev = np.where(np.isnan(prev), seed, prev + alpha * (x[..., t] - prev))
+        out[..., t] = prev
+    return out
+
+
+def sma(close, period: int) -> np.ndarray:
+    """简单移动平均"""
+    return _rolling(_as_float(close), period, np.mean)
+
+
+def ema(close, period: int) -> np.ndarray:
+    """指数移动平均（以前 period 个值的均值为初始值）"""
+    return _smooth(_as_float(close), 2 / (period + 1), period)
+
+
+def rsi(close, period: int = 14, wilder: bool = True) -> np.ndarray:
+    """
+    相对强弱指标
+
+    Args:
+        close: 收盘价
+        period: 周期
+        wilder: True 使用 Wilder 平滑；False 使用最近 period 个涨跌幅的简单平均
+            （与 TechnicalAnalyzer.calculate_rsi 的历史口径一致）
+
+    Returns:
+        RSI 序列，平均跌幅为 0 时为 100
+    """
+    close = _as_float(close)
+    delta = np.diff(close, axis=-1)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    # 补齐 NaN 的位置不能算作 0 涨跌
+    gain[np.isnan(delta)] = np.nan
+    loss[np.isnan(delta)] = np.nan
+
+    if wilder:
+        avg_gain = _smooth(gain, 1 / period, period)
+        avg_loss = _smooth(loss, 1 / period, period)
+    else:
+        avg_gain = _rolling(gain, period, np.mean)
+        avg_loss = _rolling(loss, period, np.mean)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    values = np.where(avg_loss == 0, 100.0, values)
+
+    out = np.full(close.shape, np.nan)
+    out[..., 1:] = values
+    return out
+
+
+def bollinger(close, period: int = 20, num_std: float = 2.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    布林带（总体标准差）
+
+    Returns:
+        (upper, middle, lower)
+    """
+    close = _as_float(close)
+    middle = _rolling(close, period, np.mean)
+    std = _rolling(close, period, np.std)
+    return middle + num_std * std, middle, middle - num_std * std
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD
+
+    Returns:
+        (macd, signal, histogram)
+    """
+    close = _as_float(close)
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = _smooth(line, 2 / (signal + 1), signal)
+    return line, signal_line, line - signal_line
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """平均真实波幅（Wilder 平滑）"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[..., 1:] = close[..., :-1]
+    # fmax 忽略 NaN：第一根K线没有前收盘价，真实波幅取 high - low
+    true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    return _smooth(true_range, 1 / period, period)
+
+
+def realized_volatility(close, period: int = 30, periods_per_year: Optional[float] = None) -> np.ndarray:
+    """
+    已实现波动率：对数收益率的滚动样本标准差
+
+    Args:
+        close: 收盘价
+        period: 窗口（收益率个数）
+        periods_per_year: 年化系数（每年K线数），为空时不年化
+
+    Returns:
+        波动率序列（小数，0.5 表示 50%）
+    """
+    close = _as_float(close)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(close), axis=-1)
+    vol = _rolling(returns, period, lambda w, axis: np.std(w, axis=axis, ddof=1))
+    if periods_per_year is not None:
+        vol = vol * np.sqrt(periods_per_year)
+
+    out = np.full(close.shape, np.nan)
+    out[..., 1:] = vol
+    return out
+
+
+def periods_per_year(bar: str) -> Optional[float]:
+    """周期对应的每年K线数，未知周期返回 None"""
+    bar_ms = BAR_MS.get(bar)
+    return YEAR_MS / bar_ms if bar_ms else None
+
+
+def compute_indicators(
+    ohlcv: np.ndarray,
+    ma_periods: tuple[int, ...] = (5, 10, 20),
+    ema_periods: tuple[int, ...] = (12, 26),
+    rsi_period: int = 14,
+    wilder_rsi: bool = True,
+    bb_period: int = 20,
+    atr_period: int = 14,
+    vol_period: int = 30,
+    annualization=None,
+) -> dict[str, np.ndarray]:
+    """
+    计算一组指标的完整序列
+
+    Args:
+        ohlcv: (..., N, 5) 数组，列顺序 open/high/low/close/volume
+        annualization: 已实现波动率的年化系数，可以是标量或形如 (品种数, 1) 的数组
+
+    Returns:
+        指标名 -> 与收盘价同形状的序列，如 ma5 / ema12 / rsi / bb_upper / macd / atr / volatility
+    """
+    high, low, close = ohlcv[..., 1], ohlcv[..., 2], ohlcv[..., 3]
+
+    result = {"close": close}
+    for period in ma_periods:
+        result[f"ma{period}"] = sma(close, period)
+    for period in ema_periods:
+        result[f"ema{period}"] = ema(close, period)
+    result["rsi"] = rsi(close, rsi_period, wilder=wilder_rsi)
+    result["bb_upper"], result["bb_middle"], result["bb_lower"] = bollinger(close, bb_period)
+    result["macd"], result["macd_signal"], result["macd_hist"] = macd(close)
+    result["atr"] = atr(high, low, close, atr_period)
+    result["volatility"] = realized_volatility(close, vol_period, annualization)
+    return result
+
+
+def stack_batches(batches: list[CandleBatch]) -> np.ndarray:
+    """
+    将多个K线批次右对齐拼成 (品种数, 最大长度, 5) 的矩阵，较短的序列左侧补 NaN
+    """
+    length = max((len(batch) for batch in batches), default=0)
+    matrix = np.full((len(batches), length, 5), np.nan)
+    for i, batch in enumerate(batches):
+        if len(batch):
+            matrix[i, length - len(batch) :] = batch.ohlcv
+    return matrix
+
+
+def compute_batch(batches: Mapping[Hashable, CandleBatch], **params) -> dict[Hashable, dict[str, np.ndarray]]:
+    """
+    批量计算多个品种 × 周期的指标（一次向量化调用）
+
+    Args:
+        batches: 任意键（如 (inst_id, bar)）-> K线批次
+        **params: 透传给 compute_indicators 的参数
+
+    Returns:
+        键 -> 指标序列字典，序列长度与各自的K线批次一致
+    """
+    keys = list(batches)
+    if not keys:
+        return {}
+
+    items = [batches[key] for key in keys]
+    matrix = stack_batches(items)
+    if "annualization" not in params:
+        factors = [periods_per_year(batch.bar) or np.nan for batch in items]
+        params["annualization"] = np.array(factors).reshape(-1, 1)
+
+    series = compute_indicators(matrix, **params)
+    length = matrix.shape[1]
+    return {
+        key: {name: values[i, length - len(batch) :] for name, values in series.items()}
+        for i, (key, batch) in enumerate(zip(keys, items))
+    }
+
+
+def last_values(series: dict[str, np.ndarray]) -> dict[str, Optional[float]]:
+    """取各指标序列的最新值，NaN 转为 None"""
+    result = {}
+    for name, values in series.items():
+        value = float(values[-1]) if len(values) else float("nan")
+        result[name] = None if np.isnan(value) else value
+    return result
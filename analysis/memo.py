@@ -0,0 +1,246 @@
+"""
+指标结果缓存模块
+按 (产品ID, 周期, 最后一根已收盘K线时间戳, 参数) 缓存指标序列：
+同一根K线收盘之前的重复请求直接返回缓存，既不重新计算也不拉取K线
+
+缓存按最近使用顺序淘汰 (LRU)，所有条目占用的内存不超过上限
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+
+from config import INDICATOR_CACHE_MAX_MB
+from okx_api.candle_store import candle_store
+from okx_api.client import async_okx_client
+from okx_api.history import BAR_MS
+from .indicators import compute_indicators, last_values, periods_per_year
+
+# 默认参与计算的已收盘K线数量
+INDICATOR_BARS = 300
+
+
+@dataclass(slots=True)
+class IndicatorResult:
+    """一组已收盘K线上的指标序列"""
+    inst_id: str
+    bar: str
+    closed_ts: Optional[int]
+    series: dict[str, np.ndarray]
+
+    @property
+    def last(self) -> dict[str, Optional[float]]:
+        """各指标的最新值"""
+        return last_values(self.series)
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, IndicatorResult):
+        return _nbytes(value.series)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    return 0
+
+
+class IndicatorCache:
+    """
+    按内存上限淘汰的 LRU 缓存（线程安全）
+    """
+
+    def __init__(self, max_bytes: int = int(INDICATOR_CACHE_MAX_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple[int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(inst_id: str, bar: str, closed_ts: Optional[int], params: dict[str, Any]) -> tuple:
+        """缓存 key：参数按名称排序，保证不同传参顺序命中同一条目"""
+        return inst_id, bar, closed_ts, tuple(sorted(params.items()))
+
+    def get(self, key: Hashable, count_miss: bool = True) -> tuple[bool, Any]:
+        """
+        读取缓存并标记为最近使用
+
+        Args:
+            key: 缓存 key
+            count_miss: 未命中时是否计入 misses；调用方随后还会经 get_or_compute 再查一次时传 False，
+                避免同一次请求重复计数
+
+        Returns:
+            (是否命中, 缓存值)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if count_miss:
+                    self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        """写入缓存，超出内存上限时淘汰最久未使用的条目；单个条目超过上限时不缓存"""
+        nbytes = _nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[0]
+            self._entries[key] = (nbytes, value)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """读取缓存，未命中时计算并写入"""
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict[str, Any]:
+        """命中与内存统计"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _freeze(series: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """缓存中的数组设为只读，避免调用方修改共享结果"""
+    for values in series.values():
+        values.setflags(write=False)
+    return series
+
+
+def cached_indicators(
+    inst_id: str,
+    bar: str,
+    ts: np.ndarray,
+    ohlcv: np.ndarray,
+    closed_ts: Optional[int] = None,
+    limit: int = INDICATOR_BARS,
+    **params,
+) -> IndicatorResult:
+    """
+    计算（或读取缓存）最近 limit 根已收盘K线上的指标序列
+
+    Args:
+        inst_id: 产品ID
+        bar: K线周期
+        ts, ohlcv: 升序K线，可以包含未收盘的最新K线（计算时会被排除）
+        closed_ts: 最后一根已收盘K线的时间戳，为空时视为全部已收盘
+        limit: 参与计算的已收盘K线数量
+        **params: 透传给 compute_indicators 的参数（需可哈希）
+
+    Returns:
+        指标结果，序列只读
+    """
+    if closed_ts is None:
+        closed_ts = int(ts[-1]) if len(ts) else None
+    params.setdefault("annualization", periods_per_year(bar))
+    key = indicator_cache.make_key(inst_id, bar, closed_ts, {"limit": limit, **params})
+
+    def compute() -> IndicatorResult:
+        end = int(np.searchsorted(ts, closed_ts, side="right")) if closed_ts is not None else 0
+        window = np.asarray(ohlcv[max(0, end - limit):end], dtype=np.float64)
+        return IndicatorResult(inst_id, bar, closed_ts, _freeze(compute_indicators(window, **params)))
+
+    return indicator_cache.get_or_compute(key, compute)
+
+
+async def get_indicators(inst_id: str, bar: str = "1H", limit: int = INDICATOR_BARS, **params) -> IndicatorResult:
+    """
+    获取最近 limit 根已收盘K线上的指标
+
+    本地K线存储仍是最新（下一根K线尚未收盘）且缓存命中时直接返回，不产生任何网络请求或计算；
+    否则增量拉取K线后按新的收盘时间戳计算
+
+    Args:
+        inst_id: 产品ID，如 BTC-USDT-SWAP
+        bar: K线周期
+        limit: 参与计算的已收盘K线数量
+        **params: 透传给 compute_indicators 的参数
+
+    Returns:
+        指标结果
+    """
+    params.setdefault("annualization", periods_per_year(bar))
+    closed_ts = candle_store.last_confirmed_ts(inst_id, bar)
+    bar_ms = BAR_MS.get(bar)  # 月线等不定长周期没有固定毫秒数，不走快速路径
+    if closed_ts is not None and bar_ms is not None and closed_ts + 2 * bar_ms > time.time() * 1000:
+        key = indicator_cache.make_key(inst_id, bar, closed_ts, {"limit": limit, **params})
+        # 未命中时由下面的 cached_indicators 计数
+        hit, result = indicator_cache.get(key, count_miss=False)
+        if hit:
+            return result
+
+    ts, ohlcv = await candle_store.get(inst_id, bar, limit + 1)
+    closed_ts = candle_store.last_confirmed_ts(inst_id, bar)
+    return cached_indicators(inst_id, bar, ts, ohlcv, closed_ts, limit, **params)
+
+
+def get_indicators_sync(inst_id: str, bar: str = "1H", limit: int = INDICATOR_BARS, **params) -> IndicatorResult:
+    """
+    获取指标 (同步封装)
+    """
+    return async_okx_client.run_sync(get_indicators(inst_id, bar, limit, **params))
+
+
+def format_indicators(result: IndicatorResult) -> str:
+    """
+    格式化最新指标值
+
+    Returns:
+        指标文本
+    """
+    last = result.last
+    if result.closed_ts is None or last.get("close") is None:
+        return f"无法获取 {result.inst_id} 的K线数据"
+
+    def fmt(name: str, digits: int = 4) -> str:
+        value = last.get(name)
+        return "N/A" if value is None else f"{value:.{digits}f}"
+
+    closed_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(result.closed_ts / 1000))
+    volatility = last.get("volatility")
+    return "\n".join([
+        f"{result.inst_id} 技术指标（{result.bar}，最新已收盘K线 {closed_at}）:",
+        f"收盘价: {fmt('close')}",
+        f"MA5/MA10/MA20: {fmt('ma5')} / {fmt('ma10')} / {fmt('ma20')}",
+        f"EMA12/EMA26: {fmt('ema12')} / {fmt('ema26')}",
+        f"RSI(14): {fmt('rsi', 2)}",
+        f"布林带: 上轨 {fmt('bb_upper')} / 中轨 {fmt('bb_middle')} / 下轨 {fmt('bb_lower')}",
+        f"MACD: {fmt('macd')} / 信号线 {fmt('macd_signal')} / 柱 {fmt('macd_hist')}",
+        f"ATR(14): {fmt('atr')}",
+        f"年化波动率: {'N/A' if volatility is None else f'{volatility * 100:.1f}%'}",
+    ])
+
+
+indicator_cache = IndicatorCache()
@@ -0,0 +1,103 @@
+"""
+K线重采样模块
+从一组基础周期K线（1m / 1H 等）向量化聚合出更大周期（4H / 1D / 1W），
+分组边界与 OKX 一致：按 UTC+8（香港时间）对齐，周线从周一 00:00 开始
+"""
+from typing import Optional
+
+import numpy as np
+
+from okx_api.history import BAR_MS
+
+# OKX 非 utc 后缀周期按 UTC+8 对齐
+UTC8_OFFSET_MS = 8 * 3_600_000
+
+# 1970-01-01 是周四，周一对齐需要额外偏移 4 天
+WEEK_ORIGIN_MS = 4 * 86_400_000
+
+
+def bucket_start(ts: np.ndarray, bar: str) -> np.ndarray:
+    """
+    计算每个时间戳所属目标周期K线的开盘时间
+
+    Args:
+        ts: 毫秒时间戳
+        bar: 目标周期，如 4H / 1D / 1W
+
+    Returns:
+        与 ts 等长的开盘时间数组
+    """
+    bar_ms = BAR_MS[bar]
+    local = np.asarray(ts, dtype=np.int64) + UTC8_OFFSET_MS
+    if bar == "1W":
+        return (local - WEEK_ORIGIN_MS) // bar_ms * bar_ms + WEEK_ORIGIN_MS - UTC8_OFFSET_MS
+    return local // bar_ms * bar_ms - UTC8_OFFSET_MS
+
+
+def resample(
+    ts: np.ndarray,
+    ohlcv: np.ndarray,
+    base_bar: str,
+    bar: str,
+    last_confirmed_ts: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    将基础周期K线聚合为目标周期
+
+    Args:
+        ts: 基础K线时间戳（升序）
+        ohlcv: 基础K线 (N, 5)，列顺序 open/high/low/close/volume
+        base_bar: 基础周期，如 1m / 1H
+        bar: 目标周期，如 4H / 1D / 1W
+        last_confirmed_ts: 最后一根已收盘基础K线的时间戳，用于判断聚合后的K线是否已收盘；
+            为空时视为全部基础K线已收盘
+
+    Returns:
+        (ts, ohlcv, confirmed)，按时间升序；开头因窗口截断而不完整的一组会被丢弃，
+        最后一组可能是未收盘的K线
+    """
+    if len(ts) == 0:
+        return np.empty(0, dtype=np.int64), np.empty((0, 5), dtype=np.float64), np.empty(0, dtype=bool)
+
+    starts = bucket_start(ts, bar)
+    first = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+    last = np.concatenate((first[1:] - 1, [len(ts) - 1]))
+
+    out_ts = starts[first]
+    out = np.empty((len(first), 5), dtype=np.float64)
+    out[:, 0] = ohlcv[first, 0]
+    out[:, 1] = np.maximum.reduceat(ohlcv[:, 1], first)
+    out[:, 2] = np.minimum.reduceat(ohlcv[:, 2], first)
+    out[:, 3] = ohlcv[last, 3]
+    out[:, 4] = np.add.reduceat(ohlcv[:, 4], first)
+
+    # 目标K线已收盘：其结束时间不晚于最后一根已收盘基础K线的结束时间
+    covered_until = (int(ts[-1]) if last_confirmed_ts is None else last_confirmed_ts) + BAR_MS[base_bar]
+    confirmed = out_ts + BAR_MS[bar] <= covered_until
+
+    if ts[0] > out_ts[0]:
+        out_ts, out, confirmed = out_ts[1:], out[1:], confirmed[1:]
+    return out_ts, out, confirmed
+
+
+def resample_many(
+    ts: np.ndarray,
+    ohlcv: np.ndarray,
+    base_bar: str,
+    bars: tuple[str, ...],
+    last_confirmed_ts: Optional[int] = None,
+) -> dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    从同一组基础K线生成多个周期，基础周期本身原样返回
+
+    Returns:
+        周期 -> (ts, ohlcv, confirmed)
+    """
+    result = {}
+    for bar in bars:
+        if bar == base_bar:
+            confirmed = np.ones(len(ts), dtype=bool) if last_confirmed_ts is None else ts <= last_confirmed_ts
+            result[bar] = (ts, ohlcv, confirmed)
+        else:
+            result[bar] = resample(ts, ohlcv, base_bar, bar, last_confirmed_ts)
+    return result
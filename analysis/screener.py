@@ -0,0 +1,556 @@
+"""
+全市场筛选模块
+一次拉取全部永续合约的行情与资金费率，在整个合约池上批量评估条件，例如：
+    rsi@4H<30, bb@4H outside, funding>0.05
+
+接口调用：
+- 合约池（instruments）在内存和磁盘缓存一天
+- 行情（tickers）与资金费率（funding-rate?instId=ANY）每次各 1 次，先用行情条件过滤，只有通过的合约才需要K线
+- K线指标读取本地 K 线存储（有 WebSocket 推送的合约由行情内存簿补齐），未收盘K线直接用行情最新价补齐，
+  同一周期内重复筛选不产生K线请求
+- 需要增量拉取的合约每次最多前台请求 SCAN_MAX_REQUESTS 个（按成交额），其余落后不多的合约用本地K线近似计算，
+  并在后台低优先级补齐，下一次筛选即为最新数据
+"""
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from okx_api.candle_store import candle_store
+from okx_api.client import async_okx_client
+from okx_api.history import BAR_MS
+from okx_api.models import CandleBatch
+from okx_api.rate_limiter import Priority, request_priority
+from .indicators import compute_batch, last_values
+
+# 合约池缓存文件与有效期（秒）
+UNIVERSE_FILE = Path(__file__).parent.parent / "data" / "universe.json"
+UNIVERSE_TTL = 86400
+
+# 计算K线指标使用的K线数量
+SCAN_BARS = 100
+
+# 需要K线指标时最多评估的合约数（按 24h 成交额取前 N）
+SCAN_MAX_CANDIDATES = 150
+
+# 单次筛选最多前台拉取K线的合约数，超出部分在后台补齐
+SCAN_MAX_REQUESTS = 10
+
+# 本地K线最多落后多少根已收盘K线时仍可用于近似计算
+SCAN_MAX_LAG_BARS = 3
+
+# 后台补齐K线的并发数
+SCAN_BACKGROUND_CONCURRENCY = 4
+
+# 行情字段（来自 tickers / funding-rate，无需K线）
+TICKER_FIELDS = {
+    "price": "最新价",
+    "change": "24h涨跌幅(%)",
+    "volume": "24h成交额(USDT)",
+    "funding": "资金费率(%)",
+}
+
+# K线指标字段，需要指定周期，如 rsi@4H
+CANDLE_FIELDS = {
+    "rsi": "RSI(14)",
+    "bb": "布林带位置(0=下轨, 1=上轨)",
+    "ma20": "偏离MA20(%)",
+    "volatility": "年化波动率(%)",
+}
+
+DEFAULT_BAR = "1H"
+
+# 条件语法：字段[@周期] 比较符 数值[%]，或 字段[@周期] outside/inside（仅 bb）
+CONDITION_PATTERN = re.compile(
+    r"^\s*(?P<field>[a-z0-9_]+)(?:@(?P<bar>\w+))?\s*"
+    r"(?:(?P<op><=|>=|<|>)\s*(?P<value>-?\d+(?:\.\d+)?)%?|(?P<band>outside|inside))\s*$",
+    re.IGNORECASE,
+)
+
+
+@dataclass(slots=True)
+class Condition:
+    """单个筛选条件"""
+    field: str
+    op: str
+    value: float = 0.0
+    bar: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """字段列名，K线指标带周期后缀，如 rsi@4H"""
+        return f"{self.field}@{self.bar}" if self.bar else self.field
+
+    def evaluate(self, values: np.ndarray) -> np.ndarray:
+        """对整列取值批量求值，NaN 一律不满足"""
+        with np.errstate(invalid="ignore"):
+            if self.op == "outside":
+                return (values < 0) | (values > 1)
+            if self.op == "inside":
+                return (values >= 0) & (values <= 1)
+            return {
+                "<": values < self.value,
+                "<=": values <= self.value,
+                ">": values > self.value,
+                ">=": values >= self.value,
+            }[self.op]
+
+    def extremity(self, values: np.ndarray) -> np.ndarray:
+        """排序用的偏离程度，越大越靠前"""
+        if self.op in ("outside", "inside"):
+            return np.abs(values - 0.5)
+        return -values if self.op in ("<", "<=") else values
+
+    def __str__(self) -> str:
+        if self.op in ("outside", "inside"):
+            return f"{self.key} {self.op}"
+        return f"{self.key}{self.op}{self.value:g}"
+
+
+@dataclass(slots=True)
+class ScanResult:
+    """筛选结果"""
+    conditions: list[Condition]
+    columns: list[str]
+    rows: list[dict[str, Any]]
+    matched: int
+    universe_size: int
+    evaluated: int
+    refreshed: int
+    elapsed: float
+    truncated: bool = False
+    approximate: int = 0
+    pending: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def _normalize_bar(bar: str) -> str:
+    """周期大小写容错：4h -> 4H，15M -> 15m"""
+    for candidate in (bar, bar.upper(), bar.lower()):
+        if candidate in BAR_MS:
+            return candidate
+    raise ValueError(f"不支持的K线周期: {bar}")
+
+
+def parse_conditions(text: str) -> list[Condition]:
+    """
+    解析筛选条件，多个条件以逗号、分号或 and 分隔（同时满足）
+
+    Raises:
+        ValueError: 条件格式错误、字段或周期不支持
+    """
+    conditions = []
+    for part in re.split(r"\s*(?:,|;|，|\band\b)\s*", text.strip(), flags=re.IGNORECASE):
+        if not part:
+            continue
+        match = CONDITION_PATTERN.match(part)
+        if not match:
+            raise ValueError(f"无法解析条件: {part}")
+
+        name = match["field"].lower()
+        bar = match["bar"]
+        if name in CANDLE_FIELDS:
+            bar = _normalize_bar(bar or DEFAULT_BAR)
+        elif name in TICKER_FIELDS:
+            if bar:
+                raise ValueError(f"行情字段 {name} 不需要指定周期")
+        else:
+            raise ValueError(f"未知字段: {name}，可用字段: {', '.join([*TICKER_FIELDS, *CANDLE_FIELDS])}")
+
+        if match["band"]:
+            if name != "bb":
+                raise ValueError("outside / inside 只能用于 bb")
+            conditions.append(Condition(name, match["band"].lower(), bar=bar))
+        else:
+            conditions.append(Condition(name, match["op"], float(match["value"]), bar))
+
+    if not conditions:
+        raise ValueError("请至少提供一个筛选条件")
+    return conditions
+
+
+class Universe:
+    """
+    永续合约池缓存
+    合约列表变化很慢，内存和磁盘各缓存一份，过期后才重新拉取
+    """
+
+    def __init__(self, path: Path = UNIVERSE_FILE, ttl: float = UNIVERSE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._instruments: list[dict[str, Any]] = []
+        self._updated_at = 0.0
+        self._locks: dict[asyncio.AbstractEventLoop, asyncio.Lock] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._instruments = data.get("instruments", [])
+            self._updated_at = float(data.get("updated_at", 0))
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_suffix(".tmp")
+            payload = {"updated_at": self._updated_at, "instruments": self._instruments}
+            tmp_file.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            tmp_file.replace(self.path)
+        except OSError as e:
+            print(f"[WARN] 保存合约池缓存失败: {e}")
+
+    async def refresh(self):
+        """重新拉取全部永续合约"""
+        res = await async_okx_client.get_instruments("SWAP")
+        self._instruments = [
+            {
+                "instId": item.get("instId", ""),
+                "settleCcy": item.get("settleCcy", ""),
+                "ctVal": item.get("ctVal", ""),
+                "listTime": item.get("listTime", ""),
+            }
+            for item in res.get("data", [])
+            if item.get("state") == "live"
+        ]
+        self._updated_at = time.time()
+        self._save()
+
+    async def get(self, settle_ccy: Optional[str] = "USDT") -> list[str]:
+        """
+        获取合约池
+
+        Args:
+            settle_ccy: 只保留指定结算币种的合约，为空时返回全部
+
+        Returns:
+            产品ID列表
+        """
+        loop = asyncio.get_running_loop()
+        lock = self._locks.setdefault(loop, asyncio.Lock())
+        async with lock:
+            if not self._instruments or time.time() - self._updated_at > self.ttl:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    # 拉取失败时继续使用过期的缓存
+                    if not self._instruments:
+                        raise
+                    print(f"[WARN] 刷新合约池失败，使用缓存: {e}")
+
+        return [
+            item["instId"]
+            for item in self._instruments
+            if not settle_ccy or item.get("settleCcy") == settle_ccy
+        ]
+
+
+def _float_or_nan(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _market_columns(inst_ids: list[str], tickers: list[dict], funding: list[dict]) -> dict[str, np.ndarray]:
+    """将行情与资金费率对齐到合约池，构成列式数组"""
+    ticker_map = {t.get("instId"): t for t in tickers}
+    funding_map = {f.get("instId"): _float_or_nan(f.get("fundingRate")) for f in funding}
+
+    last = np.array([_float_or_nan(ticker_map.get(i, {}).get("last")) for i in inst_ids])
+    open_24h = np.array([_float_or_nan(ticker_map.get(i, {}).get("open24h")) for i in inst_ids])
+    vol_ccy = np.array([_float_or_nan(ticker_map.get(i, {}).get("volCcy24h")) for i in inst_ids])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (last / open_24h - 1) * 100
+    return {
+        "price": last,
+        "change": change,
+        # 永续合约的 volCcy24h 以币计，折算为 USDT 成交额
+        "volume": vol_ccy * last,
+        "funding": np.array([funding_map.get(i, np.nan) for i in inst_ids]) * 100,
+    }
+
+
+def _local_batch(inst_id: str, bar: str, last: float, now_ms: int) -> tuple[Optional[CandleBatch], int]:
+    """
+    读取本地存储的K线，并用最新价补齐未收盘K线（不发起网络请求）
+
+    Returns:
+        (K线批次, 落后的已收盘K线数)，本地没有数据时批次为 None
+    """
+    bar_ms = BAR_MS[bar]
+    ts, ohlcv = candle_store.read(inst_id, bar)
+    if len(ts) == 0:
+        return None, 0
+    lag = max(0, (now_ms - int(ts[-1])) // bar_ms - 1)
+
+    ts, ohlcv = np.array(ts[-(SCAN_BARS - 1):]), np.array(ohlcv[-(SCAN_BARS - 1):])
+    if not np.isnan(last):
+        live = np.array([[last, last, last, last, 0.0]])
+        ts = np.append(ts, int(ts[-1]) + bar_ms)
+        ohlcv = np.concatenate((ohlcv, live))
+    return CandleBatch(inst_id, bar, ts, ohlcv), lag
+
+
+async def _fetch_batch(inst_id: str, bar: str, last: float, now_ms: int) -> CandleBatch:
+    """增量拉取单个合约的K线，并用最新价覆盖未收盘K线"""
+    bar_ms = BAR_MS[bar]
+    with request_priority(Priority.BACKGROUND):
+        ts, ohlcv = await candle_store.get(inst_id, bar, SCAN_BARS)
+    ts, ohlcv = np.array(ts), np.array(ohlcv)
+    if len(ts) and int(ts[-1]) + bar_ms > now_ms and not np.isnan(last):
+        ohlcv[-1, 3] = last
+    return CandleBatch(inst_id, bar, ts, ohlcv)
+
+
+# 后台补齐中的 (产品ID, 周期)，以及持有的任务引用
+_refreshing: set[tuple[str, str]] = set()
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _refresh_in_background(keys: list[tuple[str, str]]):
+    """在后台低优先级补齐K线，已在补齐中的合约不重复请求"""
+    keys = [key for key in keys if key not in _refreshing]
+    if not keys:
+        return
+    _refreshing.update(keys)
+
+    async def refresh():
+        semaphore = asyncio.Semaphore(SCAN_BACKGROUND_CONCURRENCY)
+
+        async def one(inst_id: str, bar: str):
+            try:
+                async with semaphore:
+                    with request_priority(Priority.BACKGROUND):
+                        await candle_store.get(inst_id, bar, SCAN_BARS)
+            except Exception as e:
+                print(f"[WARN] 后台补齐K线失败 {inst_id} {bar}: {e}")
+            finally:
+                _refreshing.discard((inst_id, bar))
+
+        await asyncio.gather(*(one(inst_id, bar) for inst_id, bar in keys))
+
+    task = asyncio.ensure_future(refresh())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _candle_columns(batches: dict[str, CandleBatch], bar: str, inst_ids: list[str]) -> dict[str, np.ndarray]:
+    """批量计算一个周期的指标，取各合约最新值"""
+    series = compute_batch({inst_id: batches[inst_id] for inst_id in inst_ids})
+    columns = {name: np.full(len(inst_ids), np.nan) for name in CANDLE_FIELDS}
+    for i, inst_id in enumerate(inst_ids):
+        values = last_values(series[inst_id])
+        close, lower, upper, ma20 = values["close"], values["bb_lower"], values["bb_upper"], values["ma20"]
+        if values["rsi"] is not None:
+            columns["rsi"][i] = values["rsi"]
+        if close is not None and lower is not None and upper is not None and upper > lower:
+            columns["bb"][i] = (close - lower) / (upper - lower)
+        if close is not None and ma20:
+            columns["ma20"][i] = (close / ma20 - 1) * 100
+        if values["volatility"] is not None:
+            columns["volatility"][i] = values["volatility"] * 100
+    return {f"{name}@{bar}": values for name, values in columns.items()}
+
+
+async def scan(
+    conditions: list[Condition],
+    settle_ccy: Optional[str] = "USDT",
+    limit: int = 20,
+    max_candidates: int = SCAN_MAX_CANDIDATES,
+    max_requests: int = SCAN_MAX_REQUESTS,
+) -> ScanResult:
+    """
+    在全部永续合约上批量评估筛选条件
+
+    Args:
+        conditions: 筛选条件（同时满足）
+        settle_ccy: 结算币种，为空时包含全部合约
+        limit: 返回条数
+        max_candidates: 需要K线指标时，按成交额最多评估的合约数
+        max_requests: 本次最多前台拉取K线的合约数（各周期合计）
+
+    Returns:
+        筛选结果，按第一个条件的偏离程度排序
+    """
+    started = time.perf_counter()
+    inst_ids, tickers_res, funding_res = await asyncio.gather(
+        universe.get(settle_ccy),
+        async_okx_client.get_tickers("SWAP"),
+        async_okx_client.get_funding_rate("ANY"),
+        return_exceptions=True,
+    )
+    if isinstance(inst_ids, BaseException):
+        raise inst_ids
+    if isinstance(tickers_res, BaseException):
+        raise tickers_res
+
+    errors = []
+    funding = []
+    if isinstance(funding_res, BaseException):
+        errors.append(f"资金费率获取失败: {funding_res}")
+    else:
+        funding = funding_res.get("data", [])
+
+    columns = _market_columns(inst_ids, tickers_res.get("data", []), funding)
+    mask = ~np.isnan(columns["price"])
+    for condition in conditions:
+        if condition.field in TICKER_FIELDS:
+            mask &= condition.evaluate(columns[condition.field])
+
+    # 先用行情条件缩小范围，再对成交额靠前的合约计算K线指标
+    candle_conditions = [c for c in conditions if c.field in CANDLE_FIELDS]
+    candidates = np.flatnonzero(mask)
+    truncated = False
+    refreshed = approximate = pending = 0
+    if candle_conditions:
+        # 按成交额从高到低排列，前台请求名额优先给成交额大的合约
+        volume = np.nan_to_num(columns["volume"][candidates], nan=-1)
+        candidates = candidates[np.argsort(-volume, kind="stable")]
+        if len(candidates) > max_candidates:
+            candidates = candidates[:max_candidates]
+            truncated = True
+            keep = np.zeros_like(mask)
+            keep[candidates] = True
+            mask &= keep
+
+        now_ms = int(time.time() * 1000)
+        position = {inst_id: i for i, inst_id in enumerate(inst_ids)}
+        budget = max_requests
+        for bar in sorted({c.bar for c in candle_conditions if c.bar}):
+            batches: dict[str, CandleBatch] = {}
+            # 需要拉取的合约：(本地K线可否近似计算, 产品ID, 最新价, 本地批次)
+            stale: list[tuple[bool, str, float, Optional[CandleBatch]]] = []
+            for i in candidates:
+                inst_id, last = inst_ids[i], float(columns["price"][i])
+                batch, lag = _local_batch(inst_id, bar, last, now_ms)
+                if batch is not None and lag == 0:
+                    batches[inst_id] = batch
+                else:
+                    stale.append((batch is not None and lag <= SCAN_MAX_LAG_BARS, inst_id, last, batch))
+
+            # 前台名额先给无法近似计算的合约（稳定排序，同类中仍按成交额）
+            stale.sort(key=lambda item: item[0])
+            to_fetch = [(inst_id, last) for _, inst_id, last, _ in stale[:budget]]
+            budget -= len(to_fetch)
+            for usable, inst_id, _, batch in stale[len(to_fetch):]:
+                if usable and batch is not None:
+                    batches[inst_id] = batch
+                    approximate += 1
+                else:
+                    pending += 1
+            _refresh_in_background([(inst_id, bar) for _, inst_id, _, _ in stale[len(to_fetch):]])
+
+            loaded = await asyncio.gather(
+                *(_fetch_batch(inst_id, bar, last, now_ms) for inst_id, last in to_fetch),
+                return_exceptions=True,
+            )
+            for (inst_id, _), item in zip(to_fetch, loaded):
+                if isinstance(item, BaseException):
+                    errors.append(f"{inst_id} {bar} K线获取失败: {item}")
+                    continue
+                batches[inst_id] = item
+                refreshed += 1
+
+            indicator_columns = _candle_columns(batches, bar, list(batches))
+            index = np.array([position[inst_id] for inst_id in batches], dtype=np.int64)
+            for name, values in indicator_columns.items():
+                full = np.full(len(inst_ids), np.nan)
+                full[index] = values
+                columns[name] = full
+
+        for condition in candle_conditions:
+            mask &= condition.evaluate(columns[condition.key])
+
+    matched = np.flatnonzero(mask)
+    order = np.argsort(-np.nan_to_num(conditions[0].extremity(columns[conditions[0].key][matched]), nan=-np.inf), kind="stable")
+    matched_sorted = matched[order][:limit]
+
+    shown = ["price", "change", "volume", "funding"]
+    shown += [c.key for c in conditions if c.key not in shown]
+    rows = [
+        {"instId": inst_ids[i], **{name: float(columns[name][i]) for name in shown}}
+        for i in matched_sorted
+    ]
+    return ScanResult(
+        conditions=conditions,
+        columns=shown,
+        rows=rows,
+        matched=len(matched),
+        universe_size=len(inst_ids),
+        evaluated=len(candidates),
+        refreshed=refreshed,
+        elapsed=time.perf_counter() - started,
+        truncated=truncated,
+        approximate=approximate,
+        pending=pending,
+        errors=errors,
+    )
+
+
+async def scan_text(text: str, limit: int = 20, settle_ccy: Optional[str] = "USDT") -> ScanResult:
+    """
+    解析条件文本并筛选
+
+    Raises:
+        ValueError: 条件格式错误
+    """
+    return await scan(parse_conditions(text), settle_ccy, limit)
+
+
+def _format_value(name: str, value: float) -> str:
+    if np.isnan(value):
+        return "N/A"
+    base = name.split("@")[0]
+    if base == "volume":
+        return f"{value / 1e6:,.2f}M"
+    if base in ("change", "ma20", "volatility"):
+        return f"{value:+.2f}%" if base != "volatility" else f"{value:.1f}%"
+    if base == "funding":
+        return f"{value:+.4f}%"
+    if base == "bb":
+        return f"{value:.2f}"
+    if base == "rsi":
+        return f"{value:.1f}"
+    return f"{value:g}"
+
+
+def format_scan(result: ScanResult) -> str:
+    """
+    格式化筛选结果
+
+    Returns:
+        筛选结果文本
+    """
+    condition_text = ", ".join(str(c) for c in result.conditions)
+    lines = [
+        f"全市场筛选 [{condition_text}]: 命中 {result.matched} 个"
+        f"（合约池 {result.universe_size}，耗时 {result.elapsed:.2f}s）"
+    ]
+    if result.truncated:
+        lines.append(f"注: K线指标只评估了成交额前 {result.evaluated} 的合约")
+    if result.refreshed:
+        lines.append(f"注: 本次增量更新了 {result.refreshed} 个合约的K线")
+    if result.approximate or result.pending:
+        lines.append(
+            f"注: {result.approximate} 个合约使用稍旧的K线近似计算，{result.pending} 个合约暂无K线未参与筛选，"
+            f"已在后台补齐，稍后重试可得到完整结果"
+        )
+
+    for row in result.rows:
+        values = ", ".join(f"{name} {_format_value(name, row[name])}" for name in result.columns)
+        lines.append(f"- {row['instId']}: {values}")
+
+    if result.errors:
+        lines.append(f"\n部分数据获取失败（{len(result.errors)}）: {result.errors[0]}")
+    return "\n".join(lines)
+
+
+universe = Universe()
@@ -0,0 +1,593 @@
+"""
+流式指标模块
+为每个 (产品ID, 周期) 维护增量更新的 MA / EMA / RSI / 布林带状态：
+新K线收盘时 O(1) 提交，最新K线跳动时 O(1) 预览，不再每次从整段窗口重算
+
+状态按 (产品ID, 周期) 保存为 JSON，机器人进程、每日分析守护进程和定时任务脚本共享：
+- 机器人进程由实时行情推送驱动更新
+- 定时任务执行前增量补齐，脚本中通过 read_indicators() 读取最新值
+- 每日分析从磁盘恢复状态，只回放上次之后新收盘的K线
+"""
+import asyncio
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from okx_api.candle_store import candle_store
+from okx_api.client import async_okx_client
+from okx_api.history import BAR_MS
+
+# 状态文件目录
+INDICATOR_DIR = Path(__file__).parent.parent / "data" / "indicators"
+
+# 首次建立状态时回放的K线数量（EMA 需要足够长的历史才能收敛）
+WARMUP_BARS = 200
+
+# 跳动（未收盘K线）最多每隔多少秒落盘一次
+SNAPSHOT_INTERVAL = 10
+
+# 滚动和每提交多少次按窗口重新求和一次，消除浮点累计误差
+RESYNC_EVERY = 1000
+
+
+class RollingWindow:
+    """
+    固定窗口的滚动和与平方和
+    以窗口内第一个值为偏移量累计，避免大数相减造成的精度损失
+    """
+
+    __slots__ = ("period", "values", "shift", "total", "total_sq", "pushes")
+
+    def __init__(self, period: int, values: Optional[list[float]] = None):
+        self.period = period
+        self.values: deque[float] = deque(maxlen=period)
+        self.shift = 0.0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.pushes = 0
+        if values:
+            self.values.extend(values[-period:])
+            self._resync()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.period
+
+    def _resync(self):
+        self.shift = self.values[0] if self.values else 0.0
+        self.total = sum(v - self.shift for v in self.values)
+        self.total_sq = sum((v - self.shift) ** 2 for v in self.values)
+
+    def push(self, value: float):
+        if self.full:
+            old = self.values[0] - self.shift
+            self.total -= old
+            self.total_sq -= old * old
+        elif not self.values:
+            self.shift = value
+        self.values.append(value)
+        diff = value - self.shift
+        self.total += diff
+        self.total_sq += diff * diff
+
+        self.pushes += 1
+        if self.pushes % RESYNC_EVERY == 0:
+            self._resync()
+
+    def stats(self, extra: Optional[float] = None) -> Optional[tuple[float, float]]:
+        """
+        窗口均值与总体方差；extra 不为空时视为追加该值后的窗口（不修改状态）
+
+        Returns:
+            (mean, variance)，窗口未满时返回 None
+        """
+        total, total_sq, count = self.total, self.total_sq, len(self.values)
+        # 窗口为空时以追加的值本身为偏移量
+        shift = self.shift if self.values or extra is None else extra
+        if extra is not None:
+            if self.full:
+                old = self.values[0] - shift
+                total -= old
+                total_sq -= old * old
+            else:
+                count += 1
+            diff = extra - shift
+            total += diff
+            total_sq += diff * diff
+
+        if count < self.period:
+            return None
+        mean = total / count
+        variance = max(total_sq / count - mean * mean, 0.0)
+        return mean + shift, variance
+
+
+class StreamingSMA:
+    """简单移动平均"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = RollingWindow(period)
+
+    def update(self, close: float):
+        self.window.push(close)
+
+    def value(self, current: Optional[float] = None) -> Optional[float]:
+        stats = self.window.stats(current)
+        return stats[0] if stats else None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"period": self.period, "values": list(self.window.values)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "StreamingSMA":
+        obj = cls(data["period"])
+        obj.window = RollingWindow(data["period"], data.get("values"))
+        return obj
+
+
+class StreamingEMA:
+    """
+    指数移动平均
+    与 analysis.indicators.ema 口径一致：以前 period 个值的均值为初始值
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.seed_total = 0.0
+        self.ema: Optional[float] = None
+
+    def update(self, close: float):
+        if self.ema is None:
+            self.count += 1
+            self.seed_total += close
+            if self.count == self.period:
+                self.ema = self.seed_total / self.period
+        else:
+            self.ema += self.alpha * (close - self.ema)
+
+    def value(self, current: Optional[float] = None) -> Optional[float]:
+        if current is None:
+            return self.ema
+        if self.ema is None:
+            if self.count + 1 == self.period:
+                return (self.seed_total + current) / self.period
+            return None
+        return self.ema + self.alpha * (current - self.ema)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"period": self.period, "count": self.count, "seed_total": self.seed_total, "ema": self.ema}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "StreamingEMA":
+        obj = cls(data["period"])
+        obj.count = data.get("count", 0)
+        obj.seed_total = data.get("seed_total", 0.0)
+        obj.ema = data.get("ema")
+        return obj
+
+
+class StreamingRSI:
+    """
+    相对强弱指标
+    wilder=True 使用 Wilder 平滑；False 使用最近 period 个涨跌幅的简单平均（TechnicalAnalyzer 口径）
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = True):
+        self.period = period
+        self.wilder = wilder
+        self.prev_close: Optional[float] = None
+        # 简单平均口径：滚动窗口；Wilder 口径：先累计 period 个涨跌幅作为种子
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+
+    def _next(self, close: float) -> Optional[tuple[float, float]]:
+        """计算追加 close 后的 (平均涨幅, 平均跌幅)，不修改状态"""
+        if self.prev_close is None:
+            return None
+        delta = close - self.prev_close
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+
+        if self.wilder and self.avg_gain is not None and self.avg_loss is not None:
+            return (
+                self.avg_gain + (gain - self.avg_gain) / self.period,
+                self.avg_loss + (loss - self.avg_loss) / self.period,
+            )
+        gain_stats, loss_stats = self.gains.stats(gain), self.losses.stats(loss)
+        if gain_stats is None or loss_stats is None:
+            return None
+        return gain_stats[0], loss_stats[0]
+
+    def update(self, close: float):
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            if self.wilder and self.avg_gain is not None and self.avg_loss is not None:
+                self.avg_gain += (gain - self.avg_gain) / self.period
+                self.avg_loss += (loss - self.avg_loss) / self.period
+            else:
+                self.gains.push(gain)
+                self.losses.push(loss)
+                gain_stats, loss_stats = self.gains.stats(), self.losses.stats()
+                if self.wilder and gain_stats is not None and loss_stats is not None:
+                    self.avg_gain, self.avg_loss = gain_stats[0], loss_stats[0]
+        self.prev_close = close
+
+    def value(self, current: Optional[float] = None) -> Optional[float]:
+        if current is None:
+            averages: Optional[tuple[float, float]] = None
+            if self.wilder:
+                if self.avg_gain is not None and self.avg_loss is not None:
+                    averages = (self.avg_gain, self.avg_loss)
+            else:
+                gain_stats, loss_stats = self.gains.stats(), self.losses.stats()
+                if gain_stats is not None and loss_stats is not None:
+                    averages = (gain_stats[0], loss_stats[0])
+        else:
+            averages = self._next(current)
+
+        if averages is None:
+            return None
+        avg_gain, avg_loss = averages
+        if avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "period": self.period,
+            "wilder": self.wilder,
+            "prev_close": self.prev_close,
+            "gains": list(self.gains.values),
+            "losses": list(self.losses.values),
+            "avg_gain": self.avg_gain,
+            "avg_loss": self.avg_loss,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "StreamingRSI":
+        obj = cls(data["period"], data.get("wilder", True))
+        obj.prev_close = data.get("prev_close")
+        obj.gains = RollingWindow(obj.period, data.get("gains"))
+        obj.losses = RollingWindow(obj.period, data.get("losses"))
+        obj.avg_gain = data.get("avg_gain")
+        obj.avg_loss = data.get("avg_loss")
+        return obj
+
+
+class StreamingBollinger:
+    """布林带（总体标准差，滚动和 + 平方和）"""
+
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.period = period
+        self.num_std = num_std
+        self.window = RollingWindow(period)
+
+    def update(self, close: float):
+        self.window.push(close)
+
+    def value(self, current: Optional[float] = None) -> Optional[tuple[float, float, float]]:
+        stats = self.window.stats(current)
+        if stats is None:
+            return None
+        mean, variance = stats
+        std = math.sqrt(variance)
+        return mean + self.num_std * std, mean, mean - self.num_std * std
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"period": self.period, "num_std": self.num_std, "values": list(self.window.values)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "StreamingBollinger":
+        obj = cls(data["period"], data.get("num_std", 2.0))
+        obj.window = RollingWindow(data["period"], data.get("values"))
+        return obj
+
+
+INDICATOR_TYPES = {
+    "sma": StreamingSMA,
+    "ema": StreamingEMA,
+    "rsi": StreamingRSI,
+    "bollinger": StreamingBollinger,
+}
+
+
+def _default_indicators() -> dict[str, Any]:
+    """默认指标组合，名称与 TechnicalAnalyzer 的输出字段对应"""
+    return {
+        "ma5": StreamingSMA(5),
+        "ma10": StreamingSMA(10),
+        "ma20": StreamingSMA(20),
+        "ema12": StreamingEMA(12),
+        "ema26": StreamingEMA(26),
+        "rsi": StreamingRSI(14, wilder=False),
+        "rsi_wilder": StreamingRSI(14, wilder=True),
+        "bb": StreamingBollinger(20),
+    }
+
+
+class IndicatorSet:
+    """
+    单个 (产品ID, 周期) 的流式指标状态
+    """
+
+    def __init__(self, inst_id: str, bar: str):
+        self.inst_id = inst_id
+        self.bar = bar
+        self.last_ts: Optional[int] = None
+        self.last_close: Optional[float] = None
+        self.indicators = _default_indicators()
+        # 最新未收盘K线 (ts, close)
+        self.live: Optional[tuple[int, float]] = None
+
+    def update(self, ts: int, close: float) -> bool:
+        """
+        提交一根已收盘K线
+
+        Returns:
+            是否被提交（重复或更早的K线会被忽略）
+        """
+        if self.last_ts is not None and ts <= self.last_ts:
+            return False
+        for indicator in self.indicators.values():
+            indicator.update(close)
+        self.last_ts = ts
+        self.last_close = close
+        if self.live and self.live[0] <= ts:
+            self.live = None
+        return True
+
+    def tick(self, ts: int, close: float):
+        """记录最新未收盘K线的价格"""
+        if self.last_ts is None or ts > self.last_ts:
+            self.live = (ts, close)
+
+    def values(self) -> dict[str, Any]:
+        """
+        获取最新指标值，有未收盘K线时按其价格预览
+        """
+        current = self.live[1] if self.live else None
+        result: dict[str, Any] = {
+            "inst_id": self.inst_id,
+            "bar": self.bar,
+            "ts": self.live[0] if self.live else self.last_ts,
+            "close": current if current is not None else self.last_close,
+        }
+        for name, indicator in self.indicators.items():
+            value = indicator.value(current)
+            if isinstance(indicator, StreamingBollinger):
+                upper, middle, lower = value if value else (None, None, None)
+                result[f"{name}_upper"], result[f"{name}_middle"], result[f"{name}_lower"] = upper, middle, lower
+            else:
+                result[name] = value
+        return result
+
+    def to_dict(self) -> dict[str, Any]:
+        type_names = {cls: name for name, cls in INDICATOR_TYPES.items()}
+        return {
+            "inst_id": self.inst_id,
+            "bar": self.bar,
+            "last_ts": self.last_ts,
+            "last_close": self.last_close,
+            "live": list(self.live) if self.live else None,
+            "indicators": {
+                name: {"type": type_names[type(indicator)], **indicator.to_dict()}
+                for name, indicator in self.indicators.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "IndicatorSet":
+        obj = cls(data["inst_id"], data["bar"])
+        obj.last_ts = data.get("last_ts")
+        obj.last_close = data.get("last_close")
+        obj.live = tuple(data["live"]) if data.get("live") else None
+        for name, state in data.get("indicators", {}).items():
+            indicator_cls = INDICATOR_TYPES.get(state.get("type"))
+            if indicator_cls is not None:
+                obj.indicators[name] = indicator_cls.from_dict(state)
+        return obj
+
+
+def _state_file(root: Path, inst_id: str, bar: str) -> Path:
+    return root / inst_id / f"{bar}.json"
+
+
+class StreamingIndicators:
+    """
+    流式指标状态管理
+    按 (产品ID, 周期) 懒加载状态，负责回放、落盘和恢复
+    """
+
+    def __init__(self, root: Path = INDICATOR_DIR):
+        self.root = root
+        self._sets: dict[tuple[str, str], IndicatorSet] = {}
+        self._saved_at: dict[tuple[str, str], float] = {}
+        self._warming: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def get(self, inst_id: str, bar: str) -> IndicatorSet:
+        """获取状态，内存中没有时从磁盘恢复"""
+        key = (inst_id, bar)
+        with self._lock:
+            state = self._sets.get(key)
+            if state is None:
+                state = self._sets[key] = self._load(inst_id, bar) or IndicatorSet(inst_id, bar)
+            return state
+
+    def _load(self, inst_id: str, bar: str) -> Optional[IndicatorSet]:
+        state_file = _state_file(self.root, inst_id, bar)
+        if not state_file.exists():
+            return None
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                return IndicatorSet.from_dict(json.load(f)["state"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, OSError) as e:
+            print(f"[WARN] 恢复指标状态失败 {inst_id} {bar}: {e}")
+            return None
+
+    def save(self, inst_id: str, bar: str):
+        """
+        原子写入状态与最新指标值
+        机器人与每日分析进程可能同时写同一文件，临时文件使用唯一文件名；写入失败只打印警告
+        """
+        state = self.get(inst_id, bar)
+        state_file = _state_file(self.root, inst_id, bar)
+        payload = {"updated_at": time.time(), "values": state.values(), "state": state.to_dict()}
+        tmp_name = None
+        try:
+            state_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=state_file.parent, prefix=state_file.stem, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_name, state_file)
+        except OSError as e:
+            print(f"[WARN] 保存指标状态失败 {inst_id} {bar}: {e}")
+            if tmp_name is not None:
+                Path(tmp_name).unlink(missing_ok=True)
+            return
+        self._saved_at[(inst_id, bar)] = time.monotonic()
+
+    def save_all(self):
+        """保存全部状态"""
+        for inst_id, bar in list(self._sets):
+            self.save(inst_id, bar)
+
+    def catch_up(self, inst_id: str, bar: str, ts: np.ndarray, closes: np.ndarray) -> IndicatorSet:
+        """
+        用已收盘K线补齐状态
+        状态最后时间戳之后的K线逐根提交；与状态之间有缺口时丢弃旧状态重新回放
+
+        Args:
+            ts: 已收盘K线时间戳（升序）
+            closes: 对应的收盘价
+        """
+        state = self.get(inst_id, bar)
+        if len(ts) == 0:
+            return state
+
+        if state.last_ts is not None and state.last_ts < int(ts[0]):
+            state = IndicatorSet(inst_id, bar)
+            with self._lock:
+                self._sets[(inst_id, bar)] = state
+
+        start = 0 if state.last_ts is None else int(np.searchsorted(ts, state.last_ts, side="right"))
+        for t, close in zip(ts[start:].tolist(), closes[start:].tolist()):
+            state.update(t, close)
+        return state
+
+    async def refresh(self, inst_id: str, bar: str, limit: int = WARMUP_BARS) -> IndicatorSet:
+        """
+        从K线存储增量补齐状态并落盘
+
+        Args:
+            limit: 状态为空或有缺口时回放的K线数量
+
+        Returns:
+            补齐后的状态
+        """
+        ts, ohlcv = await candle_store.get(inst_id, bar, limit)
+        last_confirmed = candle_store.last_confirmed_ts(inst_id, bar)
+        confirmed = ts <= last_confirmed if last_confirmed is not None else np.zeros(len(ts), dtype=bool)
+        state = self.ingest(inst_id, bar, ts, ohlcv[:, 3], confirmed)
+        self.save(inst_id, bar)
+        return state
+
+    def ingest(self, inst_id: str, bar: str, ts: np.ndarray, closes: np.ndarray, confirmed: np.ndarray) -> IndicatorSet:
+        """
+        写入一段K线：已收盘部分补齐状态，最后一根未收盘K线作为预览价格
+
+        Args:
+            ts: K线时间戳（升序）
+            closes: 收盘价
+            confirmed: 是否已收盘
+        """
+        state = self.catch_up(inst_id, bar, ts[confirmed], closes[confirmed])
+        if (~confirmed).any():
+            state.tick(int(ts[~confirmed][-1]), float(closes[~confirmed][-1]))
+        return state
+
+    def refresh_sync(self, inst_id: str, bar: str, limit: int = WARMUP_BARS) -> IndicatorSet:
+        """
+        从K线存储增量补齐状态并落盘 (同步封装)
+        """
+        return async_okx_client.run_sync(self.refresh(inst_id, bar, limit))
+
+    async def _warm_up(self, inst_id: str, bar: str):
+        try:
+            await self.refresh(inst_id, bar)
+        except Exception as e:
+            print(f"[WARN] 指标状态预热失败 {inst_id} {bar}: {e}")
+        finally:
+            self._warming.discard((inst_id, bar))
+
+    def on_candle(self, inst_id: str, bar: str, row: list):
+        """
+        处理实时K线推送（在事件循环中调用）
+        收盘K线 O(1) 提交，未收盘K线只更新预览价格；状态为空或出现缺口时后台补齐
+        """
+        key = (inst_id, bar)
+        if key in self._warming:
+            return
+
+        state = self.get(inst_id, bar)
+        ts, close = int(row[0]), float(row[4])
+        confirmed = len(row) >= 9 and row[8] == "1"
+
+        # 收盘K线应紧接上一根；未收盘K线最多领先一根（容忍上一根收盘推送晚到）
+        bar_ms = BAR_MS.get(bar)
+        max_step = None if bar_ms is None else bar_ms * (1 if confirmed else 2)
+        if state.last_ts is None or (max_step is not None and ts - state.last_ts > max_step):
+            self._warming.add(key)
+            asyncio.get_running_loop().create_task(self._warm_up(inst_id, bar))
+            return
+
+        if confirmed:
+            if state.update(ts, close):
+                self.save(inst_id, bar)
+            return
+
+        state.tick(ts, close)
+        if time.monotonic() - self._saved_at.get(key, 0.0) >= SNAPSHOT_INTERVAL:
+            self.save(inst_id, bar)
+
+
+def read_indicators(inst_id: str, bar: str = "1H", root: Path = INDICATOR_DIR) -> Optional[dict[str, Any]]:
+    """
+    读取已落盘的最新指标值（供定时任务脚本在子进程中使用）
+
+    Args:
+        inst_id: 产品ID，如 BTC-USDT-SWAP
+        bar: K线周期
+
+    Returns:
+        指标字典（close、ma5/ma10/ma20、ema12/ema26、rsi、rsi_wilder、bb_upper/bb_middle/bb_lower、
+        ts、updated_at），没有状态时返回 None
+    """
+    state_file = _state_file(root, inst_id, bar)
+    if not state_file.exists():
+        return None
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+    return {**payload.get("values", {}), "updated_at": payload.get("updated_at")}
+
+
+streaming_indicators = StreamingIndicators()
@@ -5,6 +5,9 @@ Discord Bot Cogs 模块
 from .position import PositionCog
 from .grid import GridCog
 from .balance import BalanceCog
+from .portfolio import PortfolioCog
+from .backtest import BacktestCog
+from .scan import ScanCog
 from .ai_chat import AIChatCog
 
-__all__ = ["PositionCog", "GridCog", "BalanceCog", "AIChatCog"]
+__all__ = ["PositionCog", "GridCog", "BalanceCog", "PortfolioCog", "BacktestCog", "ScanCog", "AIChatCog"]
@@ -3,12 +3,18 @@ AI 对话命令模块
 处理 @机器人 的消息，使用 AI 进行智能回复
 支持定时任务创建和管理
 """
+import asyncio
+import time
 import uuid
 
 import discord
 from discord.ext import commands
 
-from services import ai_service, scheduler_service, ScheduledTask
+from cogs.messages import StreamingReply
+from services import ai_service, conversation_store, intent_router, scheduler_service, ScheduledTask
+from services.ai_service import ScheduleAnalysisError
+from services.conversation import estimate_tokens
+from services.llm_queue import LLMQueueError, llm_queue
 
 
 class AIChatCog(commands.Cog):
@@ -19,8 +25,10 @@ class AIChatCog(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.chat_histories = {}
+        # 排队提示的回复任务，保留引用避免被垃圾回收
+        self._reply_tasks: set[asyncio.Task] = set()
         scheduler_service.set_result_callback(self._on_task_result)
+        conversation_store.set_summarizer(ai_service.summarize_conversation)
 
     async def _on_task_result(self, user_id: str, task_name: str, result: str):
         """
@@ -70,8 +78,24 @@ class AIChatCog(commands.Cog):
 
         print(f"[INFO] 清洗后的用户输入: {user_input[:100]}{'...' if len(user_input) > 100 else ''}")
         async with message.channel.typing():
-            print(f"[INFO] 调用 AI 分析用户请求...")
-            schedule_task = await ai_service.analyze_schedule_task(user_input)
+            # 本地预分类，明显的普通对话不再调用 LLM 判断定时任务
+            decision = intent_router.route(user_input)
+            schedule_task = None
+            if decision.needs_llm:
+                print(f"[INFO] 调用 AI 分析用户请求...")
+                try:
+                    schedule_task = await ai_service.analyze_schedule_task(
+                        user_input, user_id, self._queue_notifier(message)
+                    )
+                except LLMQueueError as e:
+                    print(f"[INFO] LLM 请求队列拒绝: {e}")
+                    await message.reply(f"当前请求较多，请稍后再试（{e}）")
+                    return
+                except ScheduleAnalysisError as e:
+                    # 判断失败不能当作 "不是定时任务" 学习，否则会把模型带偏；按普通对话处理
+                    print(f"[ERROR] 分析定时任务失败: {e}")
+                else:
+                    intent_router.record_llm_result(user_input, decision, schedule_task is not None)
 
             if schedule_task:
                 print(f"[INFO] 检测到定时任务请求: {schedule_task.get('task_name')}")
@@ -81,6 +105,28 @@ class AIChatCog(commands.Cog):
                 print(f"[INFO] 判定为普通对话，转入 AI 聊天处理")
                 await self._handle_normal_chat(message, user_id, user_input)
 
+    def _queue_notifier(self, message: discord.Message):
+        """
+        LLM 请求需要排队时回复一次排队提示
+        """
+        notified = False
+
+        def on_position(ahead):
+            nonlocal notified
+            if ahead is not None and not notified:
+                notified = True
+                task = asyncio.create_task(message.reply(f"当前请求较多，正在排队，前面还有 {ahead} 个请求..."))
+                self._reply_tasks.add(task)
+                task.add_done_callback(self._on_reply_done)
+
+        return on_position
+
+    def _on_reply_done(self, task: asyncio.Task):
+        """回收排队提示任务并记录发送失败"""
+        self._reply_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[WARN] 发送排队提示失败: {task.exception()}")
+
     async def _handle_schedule_task(
         self,
         message: discord.Message,
@@ -114,7 +160,7 @@ class AIChatCog(commands.Cog):
                     print(f"[INFO] 脚本验证失败，尝试修复...")
                     print(f"[INFO] 错误信息: {result[:200]}...")
                     await message.channel.typing()
-                    fix_result = await ai_service.fix_script(script, result, user_input)
+                    fix_result = await ai_service.fix_script(script, result, user_input, user_id)
 
                     if fix_result and fix_result.get("script"):
                         script = fix_result["script"]
@@ -194,26 +240,40 @@ class AIChatCog(commands.Cog):
         """
         处理普通 AI 对话
         """
-        chat_history = self.chat_histories.get(user_id, [])
-        history_len = len(chat_history)
+        chat_history = conversation_store.history(user_id)
         print(f"[INFO] ========== 处理普通对话 ==========")
-        print(f"[INFO] 当前对话历史长度: {history_len} 条")
-        print(f"[INFO] 正在调用 AI 服务...")
-        
-        response = await ai_service.chat(user_input, chat_history)
-        
-        print(f"[INFO] AI 响应长度: {len(response)} 字符")
-        
-        self.chat_histories[user_id] = chat_history + [
-            {"role": "user", "content": user_input},
-            {"role": "assistant", "content": response},
-        ]
-
-        if len(self.chat_histories[user_id]) > 20:
-            self.chat_histories[user_id] = self.chat_histories[user_id][-20:]
-            print(f"[INFO] 对话历史已裁剪至 20 条")
-
-        await message.reply(response)
+        print(f"[INFO] 当前对话历史: {len(chat_history)} 条，约 {sum(estimate_tokens(m['content']) for m in chat_history)} tokens")
+        print(f"[INFO] 正在调用 AI 服务（流式）...")
+
+        reply = StreamingReply(message)
+        await reply.start()
+
+        def on_position(ahead):
+            reply.set_status(f"当前请求较多，正在排队，前面还有 {ahead} 个请求..." if ahead is not None else None)
+
+        error = None
+        async for event in ai_service.chat_stream(user_input, chat_history, user_id, on_position):
+            if event.kind == "token":
+                reply.append(event.text)
+            elif event.kind == "tool_start":
+                # 工具调用前的说明文字不属于最终回复
+                reply.reset()
+                reply.set_status(f"正在查询: {event.text}...")
+                print(f"[INFO] 调用工具: {event.text}")
+            elif event.kind == "error":
+                error = event.text
+        await reply.finish(error)
+        response = reply.text
+
+        first_text = f"{reply.first_text_at - reply.started_at:.2f}s" if reply.first_text_at else "N/A"
+        print(
+            f"[INFO] AI 响应长度: {len(response)} 字符，首字延迟 {first_text}，"
+            f"总耗时 {time.perf_counter() - reply.started_at:.2f}s，编辑 {reply.edits} 次，消息 {len(reply.sent)} 条"
+        )
+
+        if error is None:
+            # 回复已经发出，超出预算时的摘要不影响本轮响应时间
+            await conversation_store.add_turn(user_id, user_input, response)
 
     @commands.command(name="clear")
     async def clear_history(self, ctx: commands.Context):
@@ -223,14 +283,31 @@ class AIChatCog(commands.Cog):
         """
         user_id = str(ctx.author.id)
         print(f"[INFO] 用户 {ctx.author.name} (ID: {user_id}) 执行 !clear 命令")
-        if user_id in self.chat_histories:
-            del self.chat_histories[user_id]
+        if conversation_store.clear(user_id):
             print(f"[INFO] 已清除用户 {user_id} 的对话历史")
             await ctx.send("对话历史已清除。")
         else:
             print(f"[INFO] 用户 {user_id} 无对话历史可清除")
             await ctx.send("暂无对话历史。")
 
+    @commands.command(name="memory")
+    async def memory_stats(self, ctx: commands.Context):
+        """
+        查看对话记忆占用
+        用法: !memory
+        """
+        history = conversation_store.history(str(ctx.author.id))
+        stats = conversation_store.stats()
+        summary = next((m for m in history if m["role"] == "system"), None)
+        await ctx.send(
+            "对话记忆:\n"
+            f"您的上下文: {sum(m['role'] != 'system' for m in history)} 条消息，"
+            f"约 {sum(estimate_tokens(m['content']) for m in history)}/{stats['max_tokens']} tokens，"
+            f"{'已有' if summary else '暂无'}早期对话摘要\n"
+            f"全部用户: {stats['users']} 人，约 {stats['total_tokens']}/{stats['total_max_tokens']} tokens\n"
+            f"摘要次数: {stats['summaries']}，淘汰用户: {stats['evictions']}，落盘: {'是' if stats['persist'] else '否'}"
+        )
+
     @commands.command(name="tasks")
     async def list_tasks(self, ctx: commands.Context):
         """
@@ -290,6 +367,38 @@ class AIChatCog(commands.Cog):
             print(f"[ERROR] 任务 {task_id} 删除失败")
             await ctx.send("删除任务失败")
 
+    @commands.command(name="llmqueue")
+    async def llm_queue_stats(self, ctx: commands.Context):
+        """
+        查看 LLM 请求队列状态
+        用法: !llmqueue
+        """
+        stats = llm_queue.stats()
+        await ctx.send(
+            "LLM 请求队列:\n"
+            f"执行中: {stats['in_flight']}/{stats['max_concurrency']}（每用户上限 {stats['max_per_user']}），排队: {stats['waiting']}\n"
+            f"已放行: {stats['granted']}，完成: {stats['completed']}，失败: {stats['failed']}\n"
+            f"拒绝: {stats['rejected']}，排队超时: {stats['queue_timeouts']}，执行超时: {stats['request_timeouts']}\n"
+            f"平均排队: {stats['avg_wait']:.2f}s（最长 {stats['max_wait']:.2f}s），平均执行: {stats['avg_run']:.2f}s"
+        )
+
+    @commands.command(name="router")
+    async def router_stats(self, ctx: commands.Context):
+        """
+        查看意图路由统计（本地预分类跳过的定时任务判断次数）
+        用法: !router
+        """
+        stats = intent_router.stats()
+        await ctx.send(
+            "意图路由统计:\n"
+            f"总请求: {stats['total']}\n"
+            f"直接对话（跳过 LLM 判断）: {stats['chat']}（{stats['saved_ratio'] * 100:.1f}%）\n"
+            f"规则命中定时任务: {stats['schedule']}，其中 LLM 判定为普通对话: {stats['rule_false_positive']}\n"
+            f"模型无法确定: {stats['ambiguous']}\n"
+            f"LLM 判定: 定时任务 {stats['llm_schedule']} / 普通对话 {stats['llm_chat']}\n"
+            f"训练样本: {stats['samples']}"
+        )
+
 
 async def setup(bot: commands.Bot):
     """
@@ -0,0 +1,43 @@
+"""
+预测回测命令模块
+将每日分析的历史预测与实际行情对比，展示命中率与校准情况
+"""
+import discord
+from discord.ext import commands
+
+from analysis.backtest import format_report, run_backtest
+
+
+class BacktestCog(commands.Cog):
+    """
+    预测回测命令组
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.command(name="backtest")
+    async def backtest(self, ctx: commands.Context, horizon: float = 24, group_by: str = "symbol"):
+        """
+        回测每日分析的历史预测
+        用法: !backtest [周期小时数] [分组字段 symbol/model/prompt_version]
+        """
+        if horizon <= 0:
+            await ctx.send("周期必须大于 0")
+            return
+
+        await ctx.send("正在回测历史预测...")
+        try:
+            report = await run_backtest(horizon_hours=horizon, group_by=group_by)
+            result = format_report(report)
+            for i in range(0, len(result), 2000):
+                await ctx.send(result[i:i + 2000])
+        except Exception as e:
+            await ctx.send(f"回测失败: {e}")
+
+
+async def setup(bot: commands.Bot):
+    """
+    Cog 加载入口函数
+    """
+    await bot.add_cog(BacktestCog(bot))
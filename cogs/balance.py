@@ -5,7 +5,7 @@
 import discord
 from discord.ext import commands
 
-from okx_api import query_account_balance
+from okx_api import aquery_account_balance
 
 
 class BalanceCog(commands.Cog):
@@ -24,7 +24,7 @@ class BalanceCog(commands.Cog):
         """
         await ctx.send("正在查询 OKX 账户余额...")
         try:
-            result = query_account_balance()
+            result = await aquery_account_balance()
             await ctx.send(result)
         except Exception as e:
             await ctx.send(f"查询失败: {e}")
@@ -5,7 +5,12 @@
 import discord
 from discord.ext import commands
 
-from okx_api import query_grid_strategies
+from analysis.grid_sim import DIRECTIONS, format_result, format_sweep, param_grid, run_grid_sweep
+from okx_api import aquery_grid_strategies
+
+# !gridsim 未指定网格数量 / 杠杆时扫描的取值
+SWEEP_GRID_NUMS = range(10, 160, 10)
+SWEEP_LEVERS = (1, 2, 3, 5, 10, 20)
 
 
 class GridCog(commands.Cog):
@@ -24,11 +29,56 @@ class GridCog(commands.Cog):
         """
         await ctx.send("正在查询 OKX 合约网格策略...")
         try:
-            result = query_grid_strategies()
+            result = await aquery_grid_strategies()
             await ctx.send(result)
         except Exception as e:
             await ctx.send(f"查询失败: {e}")
 
+    @commands.command(name="gridsim")
+    async def gridsim(
+        self,
+        ctx: commands.Context,
+        inst_id: str,
+        min_px: float,
+        max_px: float,
+        grid_num: int = 0,
+        lever: float = 0,
+        direction: str = "neutral",
+        days: float = 30,
+    ):
+        """
+        用历史K线回测合约网格参数
+        用法: !gridsim <产品ID> <区间下沿> <区间上沿> [网格数量] [杠杆] [方向 neutral/long/short] [天数]
+        网格数量或杠杆为 0 时扫描多组取值并展示收益率靠前的组合
+        """
+        inst_id = inst_id.upper()
+        if not 0 < min_px < max_px:
+            await ctx.send("区间下沿必须大于 0 且小于上沿")
+            return
+        if direction not in DIRECTIONS:
+            await ctx.send(f"方向必须是 {' / '.join(DIRECTIONS)} 之一")
+            return
+
+        params = param_grid(
+            [min_px],
+            [max_px],
+            [grid_num] if grid_num > 0 else SWEEP_GRID_NUMS,
+            [lever] if lever > 0 else SWEEP_LEVERS,
+            [direction],
+        )
+        await ctx.send(f"正在回测 {inst_id} 最近 {days:g} 天的网格参数（{len(params)} 组）...")
+        try:
+            results = await run_grid_sweep(inst_id, params, days=days)
+            if len(results) == 1:
+                result = f"{inst_id} 网格回测（最近 {days:g} 天，投入 {params[0].investment:g} USDT）:\n"
+                result += format_result(results[0])
+            else:
+                result = format_sweep(results)
+            for i in range(0, len(result), 2000):
+                await ctx.send(result[i:i + 2000])
+        except Exception as e:
+            await ctx.send(f"回测失败: {e}")
+
 
 async def setup(bot: commands.Bot):
     """
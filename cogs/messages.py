@@ -0,0 +1,169 @@
+"""
+Discord 消息工具模块
+长消息切分，以及边生成边编辑的流式回复
+"""
+import asyncio
+import time
+from typing import Optional
+
+import discord
+
+# Discord 单条消息长度上限
+MESSAGE_LIMIT = 2000
+
+# 流式回复两次编辑之间的最小间隔（秒）；Discord 对同一频道的编辑约为每 5 秒 5 次
+STREAM_EDIT_INTERVAL = 1.2
+
+# 生成过程中附在末尾的光标
+STREAM_CURSOR = " ▌"
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """
+    按行切分超过 Discord 长度限制的消息，单行超长时按长度硬切
+
+    前面的分段只取决于它之前的文本，流式追加内容时已发送的分段基本保持不变
+    """
+    if len(text) <= limit:
+        return [text]
+
+    chunks = []
+    current_chunk = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current_chunk:
+                chunks.append(current_chunk)
+                current_chunk = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if len(current_chunk) + len(line) + 1 > limit:
+            chunks.append(current_chunk)
+            current_chunk = line
+        else:
+            current_chunk += "\n" + line if current_chunk else line
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+class StreamingReply:
+    """
+    流式回复
+    先立即回复一条占位消息，收到文本后由后台任务编辑进去（两次编辑之间至少间隔 interval），超过长度限制时续发新消息
+
+    用法:
+        reply = StreamingReply(message)
+        await reply.start()
+        reply.append("文本增量")
+        await reply.finish()
+    """
+
+    def __init__(
+        self,
+        message: discord.Message,
+        placeholder: str = "正在思考...",
+        interval: float = STREAM_EDIT_INTERVAL,
+        limit: int = MESSAGE_LIMIT,
+    ):
+        self.message = message
+        self.placeholder = placeholder
+        self.interval = interval
+        # 预留光标的长度，避免生成中与结束后分段位置不同
+        self.limit = limit - len(STREAM_CURSOR)
+        self.text = ""
+        self.status: Optional[str] = None
+        self.sent: list[discord.Message] = []
+        self._rendered: list[str] = []
+        self._dirty = asyncio.Event()
+        self._last_render = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.started_at = 0.0
+        self.first_text_at: Optional[float] = None
+        self.edits = 0
+
+    async def start(self):
+        """发送占位消息并启动后台编辑"""
+        self.started_at = time.perf_counter()
+        first = await self.message.reply(self.placeholder)
+        self.sent.append(first)
+        self._rendered.append(self.placeholder)
+        self._task = asyncio.create_task(self._flush_loop())
+
+    def append(self, delta: str):
+        """追加文本增量（不等待 Discord 请求）"""
+        if not delta:
+            return
+        if self.first_text_at is None:
+            self.first_text_at = time.perf_counter()
+        self.text += delta
+        self.status = None
+        self._dirty.set()
+
+    def set_status(self, status: Optional[str]):
+        """设置状态提示，如正在调用的工具；只在还没有正文时显示"""
+        self.status = status
+        self._dirty.set()
+
+    def reset(self):
+        """丢弃已生成的正文（如模型先输出说明文字再调用工具）"""
+        self.text = ""
+        self._dirty.set()
+
+    def _chunks(self, final: bool) -> list[str]:
+        if not self.text.strip():
+            return [self.status or self.placeholder]
+        chunks = split_message(self.text, self.limit)
+        if not final:
+            chunks[-1] += STREAM_CURSOR
+        return chunks
+
+    async def _render(self, final: bool = False):
+        async with self._lock:
+            await self._apply(final)
+
+    async def _apply(self, final: bool):
+        self._dirty.clear()
+        self._last_render = time.monotonic()
+        chunks = self._chunks(final)
+        for i, chunk in enumerate(chunks):
+            if i < len(self.sent):
+                if self._rendered[i] != chunk:
+                    await self.sent[i].edit(content=chunk)
+                    self._rendered[i] = chunk
+                    self.edits += 1
+            else:
+                self.sent.append(await self.sent[-1].channel.send(chunk))
+                self._rendered.append(chunk)
+        # 内容变短时（如 reset）删除多余的续发消息
+        while len(self.sent) > len(chunks):
+            await self.sent.pop().delete()
+            self._rendered.pop()
+
+    async def _flush_loop(self):
+        while True:
+            # 有新内容时立即编辑（首段文字不必等待），但两次编辑至少间隔 interval
+            await self._dirty.wait()
+            await asyncio.sleep(max(0.0, self._last_render + self.interval - time.monotonic()))
+            try:
+                # 结束时取消的是等待，进行中的编辑仍会完成，避免重复续发消息
+                await asyncio.shield(self._render())
+            except discord.HTTPException as e:
+                print(f"[WARN] 更新流式回复失败: {e}")
+
+    async def finish(self, text: Optional[str] = None):
+        """
+        停止后台编辑并写入最终内容
+
+        Args:
+            text: 最终文本，为空时使用已接收的全部增量
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if text is not None:
+            self.text = text
+        if not self.text.strip():
+            self.text = "抱歉，我无法处理您的请求。"
+        await self._render(final=True)
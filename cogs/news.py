@@ -5,7 +5,11 @@
 import discord
 from discord.ext import commands
 
-from services import fetch_news, RSS_SOURCES
+from cogs.messages import split_message
+from news.alerts import news_alerts
+from news.store import StoredNews
+from services import afetch_news
+from services.rss_service import format_news, format_sources
 
 
 class NewsCog(commands.Cog):
@@ -15,36 +19,32 @@ class NewsCog(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        news_alerts.set_push_callback(self._push_news)
+
+    async def _push_news(self, channel_id: int, items: list[StoredNews]) -> bool:
+        """
+        新闻推送回调
+        向订阅频道发送新条目，频道不存在或不可发送消息时返回 False
+        """
+        channel = self.bot.get_channel(channel_id)
+        if channel is None or not isinstance(channel, discord.abc.Messageable):
+            return False
+        for chunk in split_message(format_news("订阅", items)):
+            await channel.send(chunk)
+        return True
 
     @commands.command(name="news")
     async def news(self, ctx: commands.Context, limit: int = 10):
         """
-        获取加密货币新闻快讯
+        获取加密货币新闻快讯（全部新闻源合并去重）
         用法: !news [数量]
         示例: !news 5
         """
         await ctx.send("正在获取加密货币新闻快讯...")
         try:
-            result = fetch_news(limit=limit)
-            if len(result) > 2000:
-                chunks = []
-                current_chunk = ""
-                for line in result.split("\n"):
-                    if len(current_chunk) + len(line) + 1 > 2000:
-                        chunks.append(current_chunk)
-                        current_chunk = line
-                    else:
-                        current_chunk += "\n" + line if current_chunk else line
-                if current_chunk:
-                    chunks.append(current_chunk)
-
-                for i, chunk in enumerate(chunks):
-                    if i == 0:
-                        await ctx.send(chunk)
-                    else:
-                        await ctx.send(chunk)
-            else:
-                await ctx.send(result)
+            result = await afetch_news(limit=limit)
+            for chunk in split_message(result):
+                await ctx.send(chunk)
         except Exception as e:
             await ctx.send(f"获取新闻失败: {e}")
 
@@ -54,10 +54,43 @@ class NewsCog(commands.Cog):
         显示可用的新闻源
         用法: !sources
         """
-        lines = ["可用的新闻源:"]
-        for key, info in RSS_SOURCES.items():
-            lines.append(f"- {key}: {info['name']}")
-        await ctx.send("\n".join(lines))
+        await ctx.send(format_sources())
+
+    @commands.command(name="newssub")
+    async def news_subscribe(self, ctx: commands.Context, *words: str):
+        """
+        在当前频道订阅新闻推送，只推送新出现的快讯
+        大写代码（如 BTC）按币种匹配，其余按关键词匹配，任一命中即推送；不带参数时推送全部新闻
+        用法: !newssub [币种/关键词...]
+        示例: !newssub BTC ETH 监管
+        """
+        subscription = news_alerts.subscribe(ctx.channel.id, list(words), str(ctx.author.id))
+        filters = "、".join(subscription.filters) or "全部新闻"
+        await ctx.send(f"已订阅新闻推送: {filters}\n新快讯将自动推送到本频道，使用 !newsunsub 取消")
+
+    @commands.command(name="newsunsub")
+    async def news_unsubscribe(self, ctx: commands.Context):
+        """
+        取消当前频道的新闻推送
+        用法: !newsunsub
+        """
+        if news_alerts.unsubscribe(ctx.channel.id):
+            await ctx.send("已取消本频道的新闻推送")
+        else:
+            await ctx.send("本频道没有订阅新闻推送")
+
+    @commands.command(name="newssubs")
+    async def news_subscriptions(self, ctx: commands.Context):
+        """
+        查看当前频道的新闻订阅
+        用法: !newssubs
+        """
+        subscription = news_alerts.subscriptions.get(ctx.channel.id)
+        if subscription is None:
+            await ctx.send("本频道没有订阅新闻推送，使用 !newssub [币种/关键词...] 订阅")
+            return
+        filters = "、".join(subscription.filters) or "全部新闻"
+        await ctx.send(f"本频道新闻订阅: {filters}\n已推送 {subscription.pushed} 条")
 
 
 async def setup(bot: commands.Bot):
@@ -0,0 +1,41 @@
+"""
+账户总览命令模块
+一次拉取余额、持仓和网格策略并汇总展示
+"""
+import discord
+from discord.ext import commands
+
+from okx_api import aquery_portfolio
+
+
+class PortfolioCog(commands.Cog):
+    """
+    账户总览命令组
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.command(name="portfolio")
+    async def portfolio(self, ctx: commands.Context):
+        """
+        查询账户总览（余额 + 持仓 + 网格）
+        用法: !portfolio
+        """
+        await ctx.send("正在查询 OKX 账户总览...")
+        try:
+            result = await aquery_portfolio(refresh=True)
+            if len(result) > 2000:
+                for i in range(0, len(result), 2000):
+                    await ctx.send(result[i:i + 2000])
+            else:
+                await ctx.send(result)
+        except Exception as e:
+            await ctx.send(f"查询失败: {e}")
+
+
+async def setup(bot: commands.Bot):
+    """
+    Cog 加载入口函数
+    """
+    await bot.add_cog(PortfolioCog(bot))
@@ -5,7 +5,7 @@
 import discord
 from discord.ext import commands
 
-from okx_api import query_swap_positions
+from okx_api import aquery_swap_positions
 
 
 class PositionCog(commands.Cog):
@@ -24,7 +24,7 @@ class PositionCog(commands.Cog):
         """
         await ctx.send("正在查询 OKX 合约仓位...")
         try:
-            result = query_swap_positions()
+            result = await aquery_swap_positions()
             await ctx.send(result)
         except Exception as e:
             await ctx.send(f"查询失败: {e}")
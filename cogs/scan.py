@@ -0,0 +1,58 @@
+"""
+全市场筛选命令模块
+在全部永续合约上批量评估行情与指标条件
+"""
+import discord
+from discord.ext import commands
+
+from analysis.screener import CANDLE_FIELDS, TICKER_FIELDS, format_scan, scan_text
+
+# 每次展示的合约数
+SCAN_LIMIT = 15
+
+
+def _usage() -> str:
+    fields = [f"{name}: {desc}" for name, desc in {**TICKER_FIELDS, **CANDLE_FIELDS}.items()]
+    return (
+        "用法: !scan <条件>，多个条件用逗号分隔\n"
+        "示例: !scan rsi@4H<30, funding>0.05\n"
+        "示例: !scan bb@1H outside, volume>50000000\n"
+        "可用字段（K线指标用 @周期 指定周期）:\n" + "\n".join(f"- {f}" for f in fields)
+    )
+
+
+class ScanCog(commands.Cog):
+    """
+    全市场筛选命令组
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.command(name="scan")
+    async def scan(self, ctx: commands.Context, *, conditions: str = ""):
+        """
+        全市场筛选永续合约
+        用法: !scan <条件>
+        示例: !scan rsi@4H<30, bb@4H outside, funding>0.05
+        """
+        if not conditions.strip():
+            await ctx.send(_usage())
+            return
+
+        await ctx.send("正在筛选全部永续合约...")
+        try:
+            result = format_scan(await scan_text(conditions, limit=SCAN_LIMIT))
+            for i in range(0, len(result), 2000):
+                await ctx.send(result[i:i + 2000])
+        except ValueError as e:
+            await ctx.send(f"条件格式错误: {e}\n\n{_usage()}")
+        except Exception as e:
+            await ctx.send(f"筛选失败: {e}")
+
+
+async def setup(bot: commands.Bot):
+    """
+    Cog 加载入口函数
+    """
+    await bot.add_cog(ScanCog(bot))
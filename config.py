@@ -19,14 +19,47 @@ OKX_PASSPHRASE = os.getenv("OKX_PASSPHRASE", "")
 BASE_URL = os.getenv("OKX_BASE_URL", "https://www.okx.com")
 OKX_FLAG = os.getenv("OKX_FLAG", "0")
 
+# OKX WebSocket（tickers/mark-price 在 public 通道，K线在 business 通道）
+OKX_WS_PUBLIC_URL = os.getenv("OKX_WS_PUBLIC_URL", "wss://ws.okx.com:8443/ws/v5/public")
+OKX_WS_BUSINESS_URL = os.getenv("OKX_WS_BUSINESS_URL", "wss://ws.okx.com:8443/ws/v5/business")
+# 实时订阅的K线周期（多个用逗号分隔）
+MARKET_DATA_BARS = os.getenv("MARKET_DATA_BARS", "1H,4H").split(",")
+
 # LLM 配置
 LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://apis.iflow.cn/v1")
 LLM_API_KEY = os.getenv("LLM_API_KEY", "")
 LLM_MODEL = os.getenv("LLM_MODEL", "qwen3-max")
 
+# LLM 请求队列：全局并发上限、单用户并发上限、单用户排队上限、排队超时与单次请求超时（秒）
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_PER_USER = int(os.getenv("LLM_MAX_PER_USER", "1"))
+LLM_MAX_QUEUED_PER_USER = int(os.getenv("LLM_MAX_QUEUED_PER_USER", "3"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "60"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "180"))
+
+# 对话记忆：单个用户的 token 预算、所有用户的 token 总上限、是否落盘
+CONVERSATION_MAX_TOKENS = int(os.getenv("CONVERSATION_MAX_TOKENS", "3000"))
+CONVERSATION_TOTAL_MAX_TOKENS = int(os.getenv("CONVERSATION_TOTAL_MAX_TOKENS", "300000"))
+CONVERSATION_PERSIST = os.getenv("CONVERSATION_PERSIST", "false").lower() in ("1", "true", "yes")
+
+# 意图路由：是否把 LLM 判定过的用户消息原文作为训练样本保存到 data/intent/samples.jsonl
+INTENT_SAMPLE_PERSIST = os.getenv("INTENT_SAMPLE_PERSIST", "false").lower() in ("1", "true", "yes")
+
+# AI 工具调用超时（秒）：普通查询 / 全市场筛选
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "20"))
+TOOL_SCAN_TIMEOUT = float(os.getenv("TOOL_SCAN_TIMEOUT", "60"))
+
 # Discord Webhook
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "")
 
 # 交易分析配置
 TRADING_SYMBOLS = os.getenv("TRADING_SYMBOLS", "BTC-USDT-SWAP").split(",")
 TRADING_ANALYSIS_TIME = os.getenv("TRADING_ANALYSIS_TIME", "09:00")
+
+# OKX 请求缓存 TTL（秒）
+# 私有账户数据（持仓/余额/网格）变化快，使用较短 TTL；公共行情数据使用较长 TTL
+OKX_CACHE_TTL_PRIVATE = float(os.getenv("OKX_CACHE_TTL_PRIVATE", "2"))
+OKX_CACHE_TTL_PUBLIC = float(os.getenv("OKX_CACHE_TTL_PUBLIC", "10"))
+
+# 指标结果缓存的内存上限（MB）
+INDICATOR_CACHE_MAX_MB = float(os.getenv("INDICATOR_CACHE_MAX_MB", "64"))
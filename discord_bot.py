@@ -9,7 +9,9 @@ import discord
 from discord.ext import commands
 
 from config import DISCORD_BOT_TOKEN
-from services import scheduler_service
+from news.alerts import news_alerts
+from news.feeds import feed_cache
+from services import scheduler_service, market_data_service
 
 
 class GridAIBot(commands.Bot):
@@ -34,6 +36,9 @@ class GridAIBot(commands.Bot):
             "cogs.grid",
             "cogs.ai_chat",
             "cogs.balance",
+            "cogs.portfolio",
+            "cogs.backtest",
+            "cogs.scan",
             "cogs.news",
         ]
 
@@ -47,8 +52,11 @@ class GridAIBot(commands.Bot):
     async def on_ready(self):
         """
         Bot 连接成功时的回调
-        启动定时任务调度器
+        启动定时任务调度器、实时行情服务、新闻源轮询与新闻推送
         """
+        await market_data_service.start()
+        await feed_cache.start()
+        await news_alerts.start()
         await scheduler_service.start()
 
         print(f"[OK] 机器人已上线: {self.user}")
@@ -0,0 +1,33 @@
+"""
+新闻模块
+提供 RSS 新闻源的异步条件轮询与内存缓存，以及多源合并去重，供 Bot 命令、Agent 工具和每日分析共享；
+新条目持久化到本地存储，按游标增量读取并推送给订阅频道
+"""
+from .feeds import RSS_SOURCES, FeedEntry, FeedState, FeedCache, feed_cache, parse_feed, strip_html
+from .aggregate import NewsItem, NewsAggregator, news_aggregator, merge_entries, normalize_text
+from .store import StoredNews, NewsStore, news_store
+from .alerts import NewsSubscription, NewsAlerts, news_alerts
+from .relevance import NewsIndex, base_asset
+
+__all__ = [
+    "RSS_SOURCES",
+    "FeedEntry",
+    "FeedState",
+    "FeedCache",
+    "feed_cache",
+    "parse_feed",
+    "strip_html",
+    "NewsItem",
+    "NewsAggregator",
+    "news_aggregator",
+    "merge_entries",
+    "normalize_text",
+    "StoredNews",
+    "NewsStore",
+    "news_store",
+    "NewsSubscription",
+    "NewsAlerts",
+    "news_alerts",
+    "NewsIndex",
+    "base_asset",
+]
@@ -0,0 +1,205 @@
+"""
+多源新闻聚合模块
+并发读取全部新闻源，合并为一条按时间倒序的新闻流，并折叠不同媒体转发的同一条快讯
+
+去重方法：标题 + 描述归一化后取字符 3-gram，计算 MinHash 签名估计 Jaccard 相似度，
+相似度不低于阈值的条目归为一组（并查集传递），每组保留最早发布的一条，其余来源记在 also_in 中
+"""
+import asyncio
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+
+from okx_api.client import async_okx_client
+from .feeds import FEED_MAX_AGE, FEED_MAX_ENTRIES, FeedEntry, feed_cache
+
+# MinHash 签名长度与判定为重复的相似度阈值
+MINHASH_PERMUTATIONS = 64
+DEDUP_THRESHOLD = 0.5
+
+# 字符 shingle 长度（中文没有空格分词，按字符切分）
+SHINGLE_SIZE = 3
+
+# 归一化时去掉的媒体前缀，如 "Odaily星球日报讯"、"PANews 6月1日消息"
+SOURCE_PREFIX_PATTERN = re.compile(r"^.{0,20}?(?:讯|消息|报道)[，,:：]\s*")
+
+# 大于 2^32 的素数，用于 (a * x + b) mod p 的哈希族，乘积不会溢出 uint64
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20240601)
+_HASH_A = _rng.integers(1, 2**31, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, 2**31, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+@dataclass(slots=True)
+class NewsItem:
+    """聚合后的新闻（代表条目 + 重复转发的来源）"""
+    entry: FeedEntry
+    also_in: list[str] = field(default_factory=list)
+
+    @property
+    def sources(self) -> list[str]:
+        return [self.entry.source_name, *self.also_in]
+
+    def to_dict(self) -> dict[str, Any]:
+        data = self.entry.to_dict()
+        data["also_in"] = list(self.also_in)
+        return data
+
+
+def normalize_text(text: str) -> str:
+    """全角转半角、转小写，去掉媒体前缀、空白与标点"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = SOURCE_PREFIX_PATTERN.sub("", text)
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    """字符 n-gram 的 32 位稳定哈希（不受 PYTHONHASHSEED 影响）"""
+    if len(text) <= SHINGLE_SIZE:
+        grams = {text} if text else set()
+    else:
+        grams = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), "little") for g in grams],
+        dtype=np.uint64,
+    )
+
+
+def minhash_signatures(texts: list[str]) -> np.ndarray:
+    """
+    计算 MinHash 签名
+
+    Returns:
+        (文本数, MINHASH_PERMUTATIONS) 的签名矩阵，空文本整行为最大值
+    """
+    signatures = np.full((len(texts), MINHASH_PERMUTATIONS), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for i, text in enumerate(texts):
+        hashes = _shingle_hashes(text)
+        if len(hashes):
+            signatures[i] = ((hashes[:, np.newaxis] * _HASH_A + _HASH_B) % _PRIME).min(axis=0)
+    return signatures
+
+
+def duplicate_groups(texts: list[str], threshold: float = DEDUP_THRESHOLD) -> np.ndarray:
+    """
+    按 MinHash 估计的 Jaccard 相似度对文本分组
+
+    Returns:
+        每个文本所属组的代表下标（组内最小下标）
+    """
+    n = len(texts)
+    parent = np.arange(n)
+    if n < 2:
+        return parent
+
+    signatures = minhash_signatures(texts)
+    empty = signatures[:, 0] == np.iinfo(np.uint64).max
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # 分块计算两两相似度，避免 n^2 * k 的布尔矩阵过大
+    block = max(1, 4_000_000 // (n * MINHASH_PERMUTATIONS))
+    for start in range(0, n, block):
+        part = signatures[start:start + block]
+        similarity = (part[:, np.newaxis, :] == signatures[np.newaxis, :, :]).mean(axis=2)
+        rows, cols = np.nonzero(similarity >= threshold)
+        for i, j in zip((rows + start).tolist(), cols.tolist()):
+            if i < j and not empty[i] and not empty[j]:
+                a, b = find(i), find(j)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+
+    return np.array([find(i) for i in range(n)])
+
+
+def merge_entries(entries: list[FeedEntry], threshold: float = DEDUP_THRESHOLD) -> list[NewsItem]:
+    """
+    合并多源条目：按发布时间倒序，折叠近似重复的快讯
+
+    Args:
+        entries: 各新闻源的条目
+        threshold: 判定为重复的相似度阈值
+
+    Returns:
+        去重后的新闻，最新在前
+    """
+    # 最早发布的排在前面，成为组代表；没有发布时间的视为最晚
+    ordered = sorted(entries, key=lambda e: (e.published is None, e.published or 0))
+    groups = duplicate_groups([normalize_text(f"{e.title} {e.description}") for e in ordered], threshold)
+
+    items: dict[int, NewsItem] = {}
+    for entry, group in zip(ordered, groups.tolist()):
+        item = items.get(group)
+        if item is None:
+            items[group] = NewsItem(entry)
+        elif entry.source_name not in item.sources:
+            item.also_in.append(entry.source_name)
+
+    return sorted(items.values(), key=lambda item: item.entry.published or 0, reverse=True)
+
+
+class NewsAggregator:
+    """
+    多源新闻聚合器
+    各源内容未变化时直接复用上次的合并结果
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self._version: Optional[tuple] = None
+        self._items: list[NewsItem] = []
+        self.errors: dict[str, str] = {}
+
+    async def get_items(self, limit: int = 20, sources: Optional[list[str]] = None, max_age: float = FEED_MAX_AGE) -> list[NewsItem]:
+        """
+        获取合并后的新闻流
+
+        Args:
+            limit: 返回数量
+            sources: 新闻源列表，默认全部
+            max_age: 允许的最大缓存时长（秒）
+
+        Returns:
+            去重后的新闻，最新在前
+
+        Raises:
+            RuntimeError: 全部新闻源都获取失败
+        """
+        sources = list(sources or feed_cache.sources)
+        results = await asyncio.gather(
+            *(feed_cache.get_entries(s, FEED_MAX_ENTRIES, max_age) for s in sources),
+            return_exceptions=True,
+        )
+
+        entries = []
+        self.errors = {}
+        for source, result in zip(sources, results):
+            if isinstance(result, BaseException):
+                self.errors[source] = str(result) or type(result).__name__
+            else:
+                entries.extend(result)
+        if not entries and self.errors:
+            raise RuntimeError("; ".join(f"{s}: {e}" for s, e in self.errors.items()))
+
+        version = (self.threshold, *((s, feed_cache.state(s).updated_at) for s in sources))
+        if version != self._version:
+            self._items = await asyncio.to_thread(merge_entries, entries, self.threshold)
+            self._version = version
+        return self._items[:limit]
+
+    def get_items_sync(self, limit: int = 20, sources: Optional[list[str]] = None, max_age: float = FEED_MAX_AGE) -> list[NewsItem]:
+        """
+        获取合并后的新闻流 (同步封装)
+        """
+        return async_okx_client.run_sync(self.get_items(limit, sources, max_age))
+
+
+news_aggregator = NewsAggregator()
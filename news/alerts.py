@@ -0,0 +1,262 @@
+"""
+新闻推送模块
+频道订阅新闻后，后台任务从新闻存储读取各订阅游标之后的新条目，按关键词 / 币种过滤后推送；
+每条新闻只推送一次，重启后从保存的游标继续
+"""
+import asyncio
+import json
+import os
+import re
+import time
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from .store import NewsStore, StoredNews, news_store
+
+SUBSCRIPTION_FILE = Path(__file__).parent.parent / "data" / "news" / "subscriptions.json"
+
+# 检查新条目的间隔（秒）；读取的是订阅缓存，源未更新时几乎没有开销
+NEWS_ALERT_INTERVAL = 15
+
+# 单次推送的最大条数，积压更多时只推送最新的部分
+NEWS_ALERT_MAX_ITEMS = 10
+
+# 由大写字母和数字组成（或以 $ 开头）的过滤词视为币种代码，按完整单词匹配（BTC 不会匹配 WBTC）
+TICKER_PATTERN = re.compile(r"^[A-Z][A-Z0-9]{1,9}$")
+
+
+def _fold(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+@dataclass
+class NewsSubscription:
+    """频道的新闻订阅"""
+    channel_id: int
+    keywords: list[str] = field(default_factory=list)
+    tickers: list[str] = field(default_factory=list)
+    cursor: int = 0
+    created_by: str = ""
+    created_at: float = field(default_factory=time.time)
+    pushed: int = 0
+
+    def __post_init__(self):
+        self._ticker_pattern = (
+            re.compile(r"(?<![a-z0-9])(?:" + "|".join(re.escape(t.lower()) for t in self.tickers) + r")(?![a-z0-9])")
+            if self.tickers else None
+        )
+        self._keywords = [_fold(k) for k in self.keywords]
+
+    @property
+    def filters(self) -> list[str]:
+        return [*self.tickers, *self.keywords]
+
+    def matches(self, item: StoredNews) -> bool:
+        """没有过滤条件时全部匹配，否则任一关键词或币种出现在标题 / 描述中即匹配"""
+        if not self.keywords and not self.tickers:
+            return True
+        text = _fold(f"{item.entry.title} {item.entry.description}")
+        if self._ticker_pattern is not None and self._ticker_pattern.search(text):
+            return True
+        return any(keyword in text for keyword in self._keywords)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "NewsSubscription":
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+
+def parse_filters(words: list[str]) -> tuple[list[str], list[str]]:
+    """
+    拆分过滤词
+
+    Returns:
+        (关键词列表, 币种代码列表)
+    """
+    keywords, tickers = [], []
+    for word in words:
+        word = word.strip()
+        if word.startswith("$"):
+            word = word[1:].upper()
+        if not word:
+            continue
+        if TICKER_PATTERN.match(word):
+            if word not in tickers:
+                tickers.append(word)
+        elif word not in keywords:
+            keywords.append(word)
+    return keywords, tickers
+
+
+# 推送回调：(频道ID, 新闻列表) -> 是否推送成功
+PushCallback = Callable[[int, list[StoredNews]], Awaitable[bool]]
+
+
+class NewsAlerts:
+    """
+    新闻推送服务
+    使用单例模式确保全局唯一实例
+    """
+
+    _instance: Optional["NewsAlerts"] = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, store: NewsStore = news_store, path: Path = SUBSCRIPTION_FILE):
+        if self._initialized:
+            return
+
+        self.store = store
+        self.path = path
+        self.interval = NEWS_ALERT_INTERVAL
+        self.subscriptions: dict[int, NewsSubscription] = {}
+        self.push_callback: Optional[PushCallback] = None
+        self._task: Optional[asyncio.Task] = None
+        self._load()
+        self._initialized = True
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def set_push_callback(self, callback: PushCallback):
+        """
+        设置推送回调函数
+        回调参数: (channel_id, items)，返回 False 时不推进游标，下次重试
+        """
+        self.push_callback = callback
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for sub in data.get("subscriptions", []):
+                subscription = NewsSubscription.from_dict(sub)
+                self.subscriptions[subscription.channel_id] = subscription
+        except (json.JSONDecodeError, OSError, TypeError, KeyError) as e:
+            print(f"[ERROR] 加载新闻订阅失败: {e}")
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_suffix(".tmp")
+            payload = {"subscriptions": [s.to_dict() for s in self.subscriptions.values()]}
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.path)
+        except OSError as e:
+            print(f"[WARN] 保存新闻订阅失败: {e}")
+
+    def subscribe(self, channel_id: int, words: Optional[list[str]] = None, created_by: str = "") -> NewsSubscription:
+        """
+        订阅新闻推送，同一频道重复订阅时替换过滤条件并保留游标
+
+        Args:
+            channel_id: Discord 频道ID
+            words: 过滤词，大写代码（如 BTC）按币种匹配，其余按关键词匹配；为空时推送全部新闻
+            created_by: 订阅者
+
+        Returns:
+            订阅
+        """
+        keywords, tickers = parse_filters(words or [])
+        old = self.subscriptions.get(channel_id)
+        subscription = NewsSubscription(
+            channel_id,
+            keywords,
+            tickers,
+            cursor=old.cursor if old else self.store.cursor,
+            created_by=created_by,
+            pushed=old.pushed if old else 0,
+        )
+        self.subscriptions[channel_id] = subscription
+        self._save()
+        return subscription
+
+    def unsubscribe(self, channel_id: int) -> bool:
+        """取消订阅，返回是否存在该订阅"""
+        if self.subscriptions.pop(channel_id, None) is None:
+            return False
+        self._save()
+        return True
+
+    async def dispatch(self) -> int:
+        """
+        推送各订阅游标之后的新条目
+
+        Returns:
+            推送的新闻条数
+        """
+        if self.push_callback is None or not self.subscriptions:
+            return 0
+
+        total = 0
+        changed = False
+        cursor = self.store.cursor
+        for subscription in list(self.subscriptions.values()):
+            if subscription.cursor > cursor:
+                # 存储被清空后序号重新开始，游标随之回退
+                subscription.cursor = cursor
+                changed = True
+            if subscription.cursor == cursor:
+                continue
+
+            items = [item for item in self.store.since(subscription.cursor) if subscription.matches(item)]
+            batch = items[-NEWS_ALERT_MAX_ITEMS:]
+            if batch:
+                try:
+                    ok = await self.push_callback(subscription.channel_id, batch)
+                except Exception as e:
+                    print(f"[WARN] 推送新闻失败 {subscription.channel_id}: {e}")
+                    ok = False
+                if not ok:
+                    continue
+                subscription.pushed += len(batch)
+                total += len(batch)
+
+            subscription.cursor = cursor
+            changed = True
+
+        if changed:
+            self._save()
+        return total
+
+    async def poll_once(self) -> int:
+        """同步新闻存储并推送，返回推送条数"""
+        await self.store.sync()
+        return await self.dispatch()
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"[WARN] 新闻推送轮询失败: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        """启动后台推送"""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._poll_loop(), name="news-alerts")
+        print(f"[OK] 新闻推送已启动，共 {len(self.subscriptions)} 个订阅，间隔 {self.interval}s")
+
+    async def stop(self):
+        """停止后台推送"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+news_alerts = NewsAlerts()
@@ -0,0 +1,318 @@
+"""
+RSS 订阅缓存模块
+异步轮询各新闻源，使用 ETag / Last-Modified 条件请求：源未更新时服务端返回 304，不下载也不解析；
+解析在线程中完成，不阻塞事件循环
+
+解析后的条目统一为 FeedEntry 保存在内存中，Bot 命令、Agent 工具和每日分析都从这里读取，
+同一进程内的多个调用方共享一次下载
+"""
+import asyncio
+import calendar
+import time
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Any, Optional
+
+import feedparser
+import httpx
+
+from okx_api.client import async_okx_client
+
+# 新闻源
+RSS_SOURCES = {
+    "odaily": {
+        "name": "Odaily星球日报",
+        "url": "https://rss.odaily.news/rss/newsflash",
+    },
+    "coindesk": {
+        "name": "CoinDesk",
+        "url": "https://www.coindesk.com/arc/outboundfeeds/rss/",
+    },
+    "cointelegraph": {
+        "name": "Cointelegraph",
+        "url": "https://cointelegraph.com/rss",
+    },
+    "decrypt": {
+        "name": "Decrypt",
+        "url": "https://decrypt.co/feed",
+    },
+}
+
+# 后台轮询间隔，以及读取时允许的最大缓存时长（秒），后者略大于前者以便读取总能命中轮询结果
+FEED_POLL_INTERVAL = 60
+FEED_MAX_AGE = 90
+
+# 单次请求超时（秒）
+FEED_TIMEOUT = 10
+
+# 每个源在内存中保留的条目数
+FEED_MAX_ENTRIES = 200
+
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    HTML 文本提取器
+    从 HTML 中提取纯文本内容
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.text_parts = []
+
+    def handle_data(self, data):
+        self.text_parts.append(data)
+
+    def get_text(self) -> str:
+        return "".join(self.text_parts).strip()
+
+
+def strip_html(html_content: str) -> str:
+    """
+    移除 HTML 标签，提取纯文本
+
+    Args:
+        html_content: HTML 内容
+
+    Returns:
+        纯文本内容
+    """
+    if not html_content:
+        return ""
+    extractor = HTMLTextExtractor()
+    extractor.feed(html_content)
+    return extractor.get_text()
+
+
+@dataclass(slots=True)
+class FeedEntry:
+    """标准化后的新闻条目"""
+    source: str
+    source_name: str
+    guid: str
+    title: str
+    link: str
+    description: str
+    published: Optional[float]  # 发布时间（Unix 秒），无法解析时为 None
+    pub_date: str               # 原始发布时间文本
+
+    def to_dict(self) -> dict[str, Any]:
+        """转换为与旧版新闻字典兼容的格式"""
+        return {
+            "source": self.source_name,
+            "title": self.title,
+            "link": self.link,
+            "description": self.description,
+            "pubDate": self.pub_date,
+            "published": self.published,
+        }
+
+
+@dataclass(slots=True)
+class FeedState:
+    """单个新闻源的缓存状态"""
+    entries: list[FeedEntry] = field(default_factory=list)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    checked_at: float = 0.0   # 最近一次成功检查（含 304）的时间
+    updated_at: float = 0.0   # 最近一次内容变化的时间
+    error: Optional[str] = None
+    fetched: int = 0
+    not_modified: int = 0
+    failures: int = 0
+
+
+def _normalize(source: str, source_name: str, entry: Any) -> FeedEntry:
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    link = entry.get("link", "")
+    return FeedEntry(
+        source=source,
+        source_name=source_name,
+        guid=entry.get("id") or link or entry.get("title", ""),
+        title=strip_html(entry.get("title", "")),
+        link=link,
+        description=strip_html(entry.get("description", "")),
+        published=float(calendar.timegm(parsed)) if parsed else None,
+        pub_date=entry.get("published", entry.get("pubDate", "")),
+    )
+
+
+def parse_feed(source: str, source_name: str, content: bytes) -> list[FeedEntry]:
+    """
+    解析 RSS 内容为标准化条目（CPU 密集，应在线程中调用）
+
+    Raises:
+        ValueError: 内容无法解析且没有任何条目
+    """
+    feed = feedparser.parse(content)
+    if feed.bozo and not feed.entries:
+        raise ValueError(f"RSS 解析失败: {feed.bozo_exception}")
+    return [_normalize(source, source_name, entry) for entry in feed.entries[:FEED_MAX_ENTRIES]]
+
+
+class FeedCache:
+    """
+    新闻源缓存
+    使用单例模式确保全局唯一实例
+    """
+
+    _instance: Optional["FeedCache"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.sources = RSS_SOURCES
+        self.poll_interval = FEED_POLL_INTERVAL
+        self._states: dict[str, FeedState] = {}
+        # 进行中的刷新：(事件循环, 源) -> Future，并发读取共享同一次请求
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._initialized = True
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def state(self, source: str) -> FeedState:
+        """获取新闻源的缓存状态"""
+        state = self._states.get(source)
+        if state is None:
+            state = self._states[source] = FeedState()
+        return state
+
+    async def _fetch(self, source: str) -> FeedState:
+        """发起条件请求，内容变化时在线程中解析并替换缓存"""
+        info = self.sources[source]
+        state = self.state(source)
+        headers = {}
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+
+        try:
+            async with httpx.AsyncClient(timeout=FEED_TIMEOUT, follow_redirects=True) as client:
+                response = await client.get(info["url"], headers=headers)
+
+            if response.status_code == 304:
+                state.not_modified += 1
+            else:
+                response.raise_for_status()
+                state.entries = await asyncio.to_thread(parse_feed, source, info["name"], response.content)
+                state.etag = response.headers.get("ETag")
+                state.last_modified = response.headers.get("Last-Modified")
+                state.updated_at = time.time()
+                state.fetched += 1
+        except Exception as e:
+            state.failures += 1
+            state.error = str(e)
+            raise
+
+        state.checked_at = time.time()
+        state.error = None
+        return state
+
+    async def refresh(self, source: str) -> FeedState:
+        """
+        刷新新闻源，同一事件循环内的并发刷新只发出一次请求
+
+        Raises:
+            KeyError: 未知的新闻源
+        """
+        if source not in self.sources:
+            raise KeyError(source)
+
+        key = (asyncio.get_running_loop(), source)
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._fetch(source))
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def get_entries(self, source: str = "odaily", limit: int = 10, max_age: float = FEED_MAX_AGE) -> list[FeedEntry]:
+        """
+        读取新闻条目，缓存超过 max_age 时先刷新
+        刷新失败但已有缓存时返回旧数据
+
+        Args:
+            source: 新闻源名称
+            limit: 返回数量
+            max_age: 允许的最大缓存时长（秒）
+
+        Returns:
+            新闻条目，按源中的顺序（通常最新在前）
+
+        Raises:
+            KeyError: 未知的新闻源
+            Exception: 首次获取失败
+        """
+        if source not in self.sources:
+            raise KeyError(source)
+
+        state = self.state(source)
+        if time.time() - state.checked_at > max_age:
+            try:
+                state = await self.refresh(source)
+            except Exception as e:
+                if not state.entries:
+                    raise
+                print(f"[WARN] 刷新新闻源失败 {source}，使用缓存: {e}")
+        return state.entries[:limit]
+
+    def get_entries_sync(self, source: str = "odaily", limit: int = 10, max_age: float = FEED_MAX_AGE) -> list[FeedEntry]:
+        """
+        读取新闻条目 (同步封装)
+        缓存新鲜时直接返回，否则在共享的后台事件循环中刷新
+        """
+        state = self.state(source)
+        if source in self.sources and state.entries and time.time() - state.checked_at <= max_age:
+            return state.entries[:limit]
+        return async_okx_client.run_sync(self.get_entries(source, limit, max_age))
+
+    async def _poll_loop(self):
+        while True:
+            results = await asyncio.gather(*(self.refresh(s) for s in self.sources), return_exceptions=True)
+            for source, result in zip(self.sources, results):
+                if isinstance(result, Exception):
+                    print(f"[WARN] 轮询新闻源失败 {source}: {result}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self):
+        """启动后台轮询"""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._poll_loop(), name="feed-cache-poll")
+        print(f"[OK] 新闻源轮询已启动，共 {len(self.sources)} 个源，间隔 {self.poll_interval}s")
+
+    async def stop(self):
+        """停止后台轮询"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """各新闻源的请求统计"""
+        return {
+            source: {
+                "entries": len(state.entries),
+                "fetched": state.fetched,
+                "not_modified": state.not_modified,
+                "failures": state.failures,
+                "checked_at": state.checked_at,
+                "error": state.error,
+            }
+            for source, state in self._states.items()
+        }
+
+
+feed_cache = FeedCache()
@@ -0,0 +1,198 @@
+"""
+新闻相关度索引模块
+从币种代码及其别名（如 BTC / Bitcoin / 比特币）建立到新闻的倒排索引，并为每条命中计算相关度：
+标题命中权重高于描述，多家媒体转发的新闻加权，越新的新闻得分越高
+
+每个交易对的提示词只取相关度最高的前 k 条，并受字符预算限制；
+不提及任何币种的宏观 / 监管新闻作为全市场新闻以较低权重参与排序
+"""
+import math
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# 币种别名（小写），未列出的币种只按代码匹配
+ASSET_ALIASES: dict[str, tuple[str, ...]] = {
+    "BTC": ("bitcoin", "比特币", "xbt"),
+    "ETH": ("ethereum", "以太坊", "ether"),
+    "SOL": ("solana", "索拉纳"),
+    "XRP": ("ripple", "瑞波"),
+    "BNB": ("binance coin", "币安币", "bnb chain"),
+    "DOGE": ("dogecoin", "狗狗币"),
+    "ADA": ("cardano", "艾达币"),
+    "TON": ("toncoin", "the open network"),
+    "AVAX": ("avalanche",),
+    "LINK": ("chainlink",),
+    "DOT": ("polkadot", "波卡"),
+    "TRX": ("tron", "波场"),
+    "LTC": ("litecoin", "莱特币"),
+    "SUI": ("sui network",),
+    "ARB": ("arbitrum",),
+    "OP": ("optimism",),
+}
+
+# 影响全市场的宏观 / 监管关键词
+MARKET_KEYWORDS = (
+    "fed", "fomc", "cpi", "sec", "etf", "interest rate", "inflation", "tariff", "regulation", "stablecoin",
+    "美联储", "加息", "降息", "利率", "通胀", "非农", "关税", "监管", "稳定币", "现货etf", "清算",
+)
+
+# 特殊 key：全市场新闻
+MARKET = "*"
+
+# 命中权重：标题 / 描述，全市场新闻相对于直接提及该币种的折扣
+TITLE_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+MARKET_WEIGHT = 0.4
+
+# 每多一家媒体转发的加权
+SOURCE_BOOST = 0.25
+
+# 新闻热度半衰期（小时），以及进入提示词的最低得分（约为两天前的单条标题命中）
+HALF_LIFE_HOURS = 12.0
+MIN_SCORE = 0.05 * TITLE_WEIGHT
+
+# 默认每个交易对保留的新闻条数、字符预算与单条描述截断长度
+DEFAULT_TOP_K = 5
+DEFAULT_MAX_CHARS = 1200
+DESCRIPTION_CHARS = 120
+
+
+def base_asset(symbol: str) -> str:
+    """交易对的基础币种，如 BTC-USDT-SWAP -> BTC"""
+    return symbol.split("-")[0].upper()
+
+
+def _fold(text: str) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def _term_pattern(terms: list[str]) -> re.Pattern:
+    # 长词优先，字母数字词按完整单词匹配（ETH 不匹配 ETHENA，OP 不匹配 TOP）
+    alternatives = "|".join(re.escape(t) for t in sorted(set(terms), key=len, reverse=True))
+    return re.compile(rf"(?<![a-z0-9])(?:{alternatives})(?![a-z0-9])")
+
+
+@dataclass(slots=True)
+class ScoredNews:
+    """某个币种下的一条相关新闻"""
+    news: dict[str, Any]
+    score: float
+    market: bool = False
+
+
+class NewsIndex:
+    """
+    新闻相关度倒排索引
+    一轮分析构建一次，所有交易对共享：每条新闻只扫描一遍
+    """
+
+    def __init__(self, news_list: list[dict[str, Any]], symbols: Optional[list[str]] = None, now: Optional[float] = None):
+        """
+        Args:
+            news_list: 新闻字典（title / description / published / also_in）
+            symbols: 需要额外索引的交易对（不在别名表中的币种按代码匹配）
+            now: 计算时效衰减的当前时间，默认当前时间
+        """
+        self.news_list = news_list
+        self.now = time.time() if now is None else now
+
+        self._term_asset: dict[str, str] = {}
+        for asset, aliases in ASSET_ALIASES.items():
+            for term in (asset.lower(), *aliases):
+                self._term_asset[term] = asset
+        for symbol in symbols or []:
+            asset = base_asset(symbol)
+            self._term_asset.setdefault(asset.lower(), asset)
+        for term in MARKET_KEYWORDS:
+            self._term_asset.setdefault(term, MARKET)
+
+        self._pattern = _term_pattern(list(self._term_asset))
+        self.postings: dict[str, dict[int, float]] = {}
+        for i, news in enumerate(news_list):
+            self._index(i, news)
+
+    def _weight(self, news: dict[str, Any]) -> float:
+        weight = 1.0 + SOURCE_BOOST * len(news.get("also_in") or [])
+        published = news.get("published")
+        if published:
+            age_hours = max(0.0, self.now - published) / 3600
+            weight *= math.pow(0.5, age_hours / HALF_LIFE_HOURS)
+        return weight
+
+    def _index(self, i: int, news: dict[str, Any]):
+        hits: dict[str, float] = {}
+        for text, field_weight in ((news.get("title", ""), TITLE_WEIGHT), (news.get("description", ""), DESCRIPTION_WEIGHT)):
+            # 同一字段重复提及只计一次
+            for asset in {self._term_asset[m.group()] for m in self._pattern.finditer(_fold(text))}:
+                hits[asset] = hits.get(asset, 0.0) + field_weight
+
+        weight = self._weight(news)
+        for asset, score in hits.items():
+            self.postings.setdefault(asset, {})[i] = score * weight
+
+    def search(self, symbol: str, k: int = DEFAULT_TOP_K) -> list[ScoredNews]:
+        """
+        按相关度排序的新闻
+
+        Args:
+            symbol: 交易对或币种代码
+            k: 返回条数
+
+        Returns:
+            相关新闻，得分从高到低；全市场新闻按折扣后的得分参与排序，过旧的新闻不返回
+        """
+        asset = base_asset(symbol)
+        direct = self.postings.get(asset, {})
+        scored = [ScoredNews(self.news_list[i], score) for i, score in direct.items()]
+        scored += [
+            ScoredNews(self.news_list[i], score * MARKET_WEIGHT, market=True)
+            for i, score in self.postings.get(MARKET, {}).items()
+            if i not in direct
+        ]
+        scored = [s for s in scored if s.score >= MIN_SCORE]
+        scored.sort(key=lambda s: s.score, reverse=True)
+        return scored[:k]
+
+    def render(self, symbol: str, k: int = DEFAULT_TOP_K, max_chars: int = DEFAULT_MAX_CHARS) -> str:
+        """
+        生成某个交易对提示词中的新闻段落
+
+        Args:
+            symbol: 交易对
+            k: 最多包含的新闻条数
+            max_chars: 字符预算，超出预算的新闻不再加入
+
+        Returns:
+            新闻文本
+        """
+        header = f"【{base_asset(symbol)} 相关新闻】"
+        lines = [header]
+        used = len(header)
+        for scored in self.search(symbol, k):
+            block = format_news_block(len(lines), scored)
+            if used + len(block) + 1 > max_chars:
+                continue
+            lines.append(block)
+            used += len(block) + 1
+
+        if len(lines) == 1:
+            return "暂无相关新闻"
+        return "\n".join(lines)
+
+
+def format_news_block(number: int, scored: ScoredNews) -> str:
+    """单条新闻：标题、截断后的描述与发布时间"""
+    news = scored.news
+    description = (news.get("description") or "").strip()
+    if len(description) > DESCRIPTION_CHARS:
+        description = description[:DESCRIPTION_CHARS] + "…"
+    tag = "（市场）" if scored.market else ""
+    lines = [f"{number}. {news.get('title', '')}{tag}"]
+    if description:
+        lines.append(f"描述: {description}")
+    if news.get("pubDate"):
+        lines.append(f"发布时间: {news['pubDate']}")
+    return "\n".join(lines)
@@ -0,0 +1,293 @@
+"""
+增量新闻存储模块
+把各新闻源的条目持久化到本地 JSONL 文件，按 (新闻源, GUID) 的哈希建立索引：
+同一条目只入库一次，其他媒体转发的近似重复快讯合并到已有条目的 also_in 中
+
+每条新入库的新闻分配递增的序号 seq 作为游标，调用方通过 since(cursor) 只读取游标之后的新条目，
+不必每次重新获取、解析和格式化整个新闻列表
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from .aggregate import DEDUP_THRESHOLD, NewsItem, minhash_signatures, normalize_text
+from .feeds import FEED_MAX_AGE, FEED_MAX_ENTRIES, FeedEntry, feed_cache
+
+NEWS_STORE_FILE = Path(__file__).parent.parent / "data" / "news" / "store.jsonl"
+
+# 保留的新闻条数，文件超出该值的 1.25 倍时压缩重写
+NEWS_STORE_MAX_ITEMS = 5000
+
+# 近似去重时比较的最近条目数
+NEWS_DEDUP_WINDOW = 500
+
+
+@dataclass(slots=True)
+class StoredNews(NewsItem):
+    """入库的新闻（带游标序号与索引 key）"""
+    seq: int = 0
+    key: str = ""
+    seen_at: float = 0.0
+
+    def to_record(self) -> dict[str, Any]:
+        entry = self.entry
+        return {
+            "seq": self.seq,
+            "key": self.key,
+            "seen_at": self.seen_at,
+            "also_in": self.also_in,
+            "source": entry.source,
+            "source_name": entry.source_name,
+            "guid": entry.guid,
+            "title": entry.title,
+            "link": entry.link,
+            "description": entry.description,
+            "published": entry.published,
+            "pub_date": entry.pub_date,
+        }
+
+    @classmethod
+    def from_record(cls, data: dict[str, Any]) -> "StoredNews":
+        entry = FeedEntry(
+            source=data["source"],
+            source_name=data["source_name"],
+            guid=data["guid"],
+            title=data["title"],
+            link=data["link"],
+            description=data["description"],
+            published=data.get("published"),
+            pub_date=data.get("pub_date", ""),
+        )
+        return cls(entry, list(data.get("also_in", [])), data["seq"], data["key"], data.get("seen_at", 0.0))
+
+
+def entry_key(entry: FeedEntry) -> str:
+    """条目索引 key：新闻源 + GUID 的稳定哈希"""
+    return hashlib.blake2b(f"{entry.source}\0{entry.guid}".encode(), digest_size=8).hexdigest()
+
+
+def _dedup_text(entry: FeedEntry) -> str:
+    return normalize_text(f"{entry.title} {entry.description}")
+
+
+class NewsStore:
+    """
+    本地新闻存储（线程安全）
+    条目按 seq 升序保存在内存中，变化以追加方式写入 JSONL 文件，同一 seq 以最后一行为准
+    """
+
+    def __init__(self, path: Path = NEWS_STORE_FILE, max_items: int = NEWS_STORE_MAX_ITEMS, threshold: float = DEDUP_THRESHOLD):
+        self.path = path
+        self.max_items = max_items
+        self.threshold = threshold
+        self._items: list[StoredNews] = []
+        self._seqs: list[int] = []
+        self._index: dict[str, StoredNews] = {}
+        # 最近 NEWS_DEDUP_WINDOW 条的 MinHash 签名，与 _window 一一对应
+        self._window: list[StoredNews] = []
+        self._signatures = minhash_signatures([])
+        self._versions: dict[str, float] = {}
+        self._lines = 0
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    @property
+    def cursor(self) -> int:
+        """最新条目的序号，没有条目时为 0"""
+        self._load()
+        return self._seqs[-1] if self._seqs else 0
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._items)
+
+    def _load(self):
+        """首次使用时加载文件，只导入模块的进程（如 Webhook）不读取存储"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if self.path.exists():
+                self._read()
+
+    def _read(self):
+        records: dict[int, dict[str, Any]] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._lines += 1
+                    try:
+                        data = json.loads(line)
+                        records[data["seq"]] = data
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError as e:
+            print(f"[WARN] 加载新闻存储失败: {e}")
+            return
+
+        for seq in sorted(records)[-self.max_items:]:
+            try:
+                item = StoredNews.from_record(records[seq])
+            except (KeyError, TypeError):
+                continue
+            self._items.append(item)
+            self._seqs.append(item.seq)
+            self._index[item.key] = item
+
+        self._window = self._items[-NEWS_DEDUP_WINDOW:]
+        self._signatures = minhash_signatures([_dedup_text(item.entry) for item in self._window])
+
+    def _append(self, items: list[StoredNews]):
+        if not items:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                for item in items:
+                    f.write(json.dumps(item.to_record(), ensure_ascii=False) + "\n")
+            self._lines += len(items)
+        except OSError as e:
+            print(f"[WARN] 写入新闻存储失败: {e}")
+
+    def _compact(self):
+        """淘汰最旧的条目并重写文件"""
+        self._items = self._items[-self.max_items:]
+        self._seqs = self._seqs[-self.max_items:]
+        first_seq = self._seqs[0] if self._seqs else 0
+        # 同时清理指向被淘汰条目的转发稿索引
+        self._index = {key: item for key, item in self._index.items() if item.seq >= first_seq}
+
+        tmp_file = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                for item in self._items:
+                    f.write(json.dumps(item.to_record(), ensure_ascii=False) + "\n")
+            os.replace(tmp_file, self.path)
+            self._lines = len(self._items)
+        except OSError as e:
+            print(f"[WARN] 压缩新闻存储失败: {e}")
+
+    def ingest(self, entries: list[FeedEntry]) -> list[StoredNews]:
+        """
+        写入条目：已索引的跳过，与最近条目近似重复的合并到已有条目，其余分配新序号入库
+
+        Args:
+            entries: 新闻条目（任意来源、任意顺序）
+
+        Returns:
+            新入库的新闻，按 seq 升序
+        """
+        self._load()
+        with self._lock:
+            fresh = [e for e in entries if entry_key(e) not in self._index]
+            if not fresh:
+                return []
+
+            # 先发布的先入库，转发稿合并到首发条目
+            fresh.sort(key=lambda e: (e.published is None, e.published or 0))
+            signatures = minhash_signatures([_dedup_text(e) for e in fresh])
+            empty = np.iinfo(np.uint64).max
+
+            added: list[StoredNews] = []
+            changed: list[StoredNews] = []
+            now = time.time()
+            for entry, signature in zip(fresh, signatures):
+                key = entry_key(entry)
+                if key in self._index:
+                    continue
+
+                duplicate = None
+                if signature[0] != empty and len(self._window):
+                    similarity = (self._signatures == signature).mean(axis=1)
+                    best = int(similarity.argmax())
+                    if similarity[best] >= self.threshold:
+                        duplicate = self._window[best]
+
+                if duplicate is not None:
+                    # 转发稿只登记索引，不产生新序号
+                    self._index[key] = duplicate
+                    if entry.source_name != duplicate.entry.source_name and entry.source_name not in duplicate.also_in:
+                        duplicate.also_in.append(entry.source_name)
+                        if duplicate not in changed:
+                            changed.append(duplicate)
+                    continue
+
+                item = StoredNews(entry, seq=self.cursor + 1, key=key, seen_at=now)
+                self._items.append(item)
+                self._seqs.append(item.seq)
+                self._index[key] = item
+                self._window.append(item)
+                self._signatures = np.vstack([self._signatures, signature[np.newaxis, :]])
+                if len(self._window) > NEWS_DEDUP_WINDOW:
+                    self._window = self._window[-NEWS_DEDUP_WINDOW:]
+                    self._signatures = self._signatures[-NEWS_DEDUP_WINDOW:]
+                added.append(item)
+
+            self._append(changed + added)
+            if self._lines > self.max_items * 1.25:
+                self._compact()
+            return added
+
+    def since(self, cursor: int = 0, limit: Optional[int] = None, sources: Optional[list[str]] = None) -> list[StoredNews]:
+        """
+        读取游标之后入库的新闻
+
+        Args:
+            cursor: 上次读取到的序号，0 表示从最早的条目开始
+            limit: 最多返回的条数（取最早的），为空时不限制
+            sources: 只返回这些新闻源首发的条目，为空时不过滤
+
+        Returns:
+            新闻，按 seq 升序；下次读取时传入最后一条的 seq
+        """
+        self._load()
+        with self._lock:
+            items = self._items[bisect_right(self._seqs, cursor):]
+        if sources:
+            items = [item for item in items if item.entry.source in sources]
+        return items[:limit] if limit is not None else items
+
+    def latest(self, limit: int = 10) -> list[StoredNews]:
+        """最近入库的新闻，最新在前"""
+        self._load()
+        with self._lock:
+            return self._items[::-1][:limit]
+
+    async def sync(self, sources: Optional[list[str]] = None, max_age: float = FEED_MAX_AGE) -> list[StoredNews]:
+        """
+        从订阅缓存同步新条目，新闻源内容没有变化时不做任何处理
+
+        Returns:
+            新入库的新闻，按 seq 升序
+        """
+        sources = list(sources or feed_cache.sources)
+        results = await asyncio.gather(
+            *(feed_cache.get_entries(s, FEED_MAX_ENTRIES, max_age) for s in sources),
+            return_exceptions=True,
+        )
+
+        entries = []
+        for source, result in zip(sources, results):
+            if isinstance(result, BaseException):
+                print(f"[WARN] 同步新闻源失败 {source}: {result}")
+                continue
+            version = feed_cache.state(source).updated_at
+            if self._versions.get(source) != version:
+                entries.extend(result)
+                self._versions[source] = version
+
+        if not entries:
+            return []
+        return await asyncio.to_thread(self.ingest, entries)
+
+
+news_store = NewsStore()
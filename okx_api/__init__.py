@@ -4,19 +4,68 @@ OKX API 模块
 
 注意：OKX_TOOLS 需要从 okx_api.tools 单独导入，避免循环导入
 """
-from .client import OKXClient, okx_client
+from .cache import TTLCache
+from .client import OKXClient, okx_client, AsyncOKXClient, async_okx_client, OKXAPIError
+from .market_book import MarketBook, market_book
+from .history import CandleBuffer, iter_history_candles, load_history, load_history_sync
+from .models import AccountSnapshot, Position, GridStrategy, Balance, CandleBatch, Ticker
+from .snapshot import get_account_snapshot
+from .data import fetch_positions, fetch_grid_strategies, fetch_balance, fetch_candles, fetch_ticker
+from .rate_limiter import Priority, RateLimiter, rate_limiter, request_priority
 from .queries import (
+    aquery_swap_positions,
+    aquery_grid_strategies,
+    aquery_account_balance,
+    aquery_candlesticks,
+    aquery_ticker,
+    aquery_portfolio,
     query_swap_positions,
     query_grid_strategies,
     query_account_balance,
     query_candlesticks,
+    query_ticker,
+    query_portfolio,
 )
 
 __all__ = [
     "OKXClient",
     "okx_client",
+    "AsyncOKXClient",
+    "async_okx_client",
+    "OKXAPIError",
+    "TTLCache",
+    "MarketBook",
+    "market_book",
+    "CandleBuffer",
+    "iter_history_candles",
+    "load_history",
+    "load_history_sync",
+    "AccountSnapshot",
+    "Position",
+    "GridStrategy",
+    "Balance",
+    "CandleBatch",
+    "Ticker",
+    "get_account_snapshot",
+    "fetch_positions",
+    "fetch_grid_strategies",
+    "fetch_balance",
+    "fetch_candles",
+    "fetch_ticker",
+    "Priority",
+    "RateLimiter",
+    "rate_limiter",
+    "request_priority",
+    "aquery_swap_positions",
+    "aquery_grid_strategies",
+    "aquery_account_balance",
+    "aquery_candlesticks",
+    "aquery_ticker",
+    "aquery_portfolio",
     "query_swap_positions",
     "query_grid_strategies",
     "query_account_balance",
     "query_candlesticks",
+    "query_ticker",
+    "query_portfolio",
 ]
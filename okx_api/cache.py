@@ -0,0 +1,135 @@
+"""
+OKX 请求缓存模块
+按接口配置 TTL 的内存缓存，并发的相同请求只会真正发出一次 (single-flight)
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    带 single-flight 合并的 TTL 缓存
+
+    - 命中且未过期时直接返回缓存值
+    - 未命中时，同一事件循环内并发的相同 key 共享同一个进行中的请求（独立任务，单个等待者取消不影响其他等待者）
+    - 请求异常不会被缓存，所有等待者都会收到同一个异常
+    """
+
+    def __init__(self, default_ttl: float = 5.0, ttls: Optional[dict[str, float]] = None, max_entries: int = 1024):
+        """
+        Args:
+            default_ttl: 未单独配置的接口使用的 TTL（秒）
+            ttls: 按接口路径配置的 TTL（秒），<= 0 表示不缓存
+            max_entries: 最大缓存条目数
+        """
+        self.default_ttl = default_ttl
+        self.ttls: dict[str, float] = dict(ttls or {})
+        self.max_entries = max_entries
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._inflight: dict[Hashable, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def ttl_for(self, endpoint: str) -> float:
+        """获取接口对应的 TTL"""
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def set_ttl(self, endpoint: str, ttl: float):
+        """设置接口对应的 TTL"""
+        self.ttls[endpoint] = ttl
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """
+        读取未过期的缓存
+
+        Returns:
+            (是否命中, 缓存值)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return False, None
+        return True, value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """写入缓存"""
+        if ttl <= 0:
+            return
+        if len(self._entries) >= self.max_entries:
+            self._evict()
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+    def _evict(self):
+        """清理过期条目，仍然超限时按写入顺序淘汰最旧的条目"""
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        while len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    async def get_or_fetch(self, key: Hashable, fetcher: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        """
+        读取缓存，未命中时调用 fetcher 获取并写入缓存
+
+        Args:
+            key: 缓存 key
+            fetcher: 无参协程函数，返回需要缓存的值
+            ttl: 本次写入使用的 TTL（秒）
+
+        Returns:
+            缓存值或新获取的值
+        """
+        hit, value = self.get(key)
+        if hit:
+            self.hits += 1
+            return value
+
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[0] is loop:
+            self.coalesced += 1
+            return await asyncio.shield(inflight[1])
+
+        self.misses += 1
+        # 请求作为独立任务运行：发起者被取消（如工具超时）时不影响合并进来的其他等待者，结果仍会写入缓存
+        task = asyncio.ensure_future(fetcher())
+        self._inflight[key] = (loop, task)
+        task.add_done_callback(lambda t: self._finish(key, t, ttl))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future, ttl: float):
+        if self._inflight.get(key, (None, None))[1] is task:
+            del self._inflight[key]
+        # 读取异常以避免没有等待者时的 "exception was never retrieved" 警告
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result(), ttl)
+
+    def invalidate(self, prefix: Optional[str] = None):
+        """
+        失效缓存
+
+        Args:
+            prefix: 只失效 key[0] 以该前缀开头的条目，为空时清空全部
+        """
+        if prefix is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if isinstance(k, tuple) and str(k[0]).startswith(prefix)]:
+            del self._entries[key]
+
+    def stats(self) -> dict[str, Any]:
+        """获取缓存统计信息"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
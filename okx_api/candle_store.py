@@ -0,0 +1,386 @@
+"""
+K线本地存储模块
+按 (产品ID, 周期) 将已收盘K线以 numpy 数组形式保存到磁盘，
+每次请求只增量拉取最后存储时间戳之后缺失的K线，其余部分从磁盘（内存映射）读取
+
+Discord 机器人、同步封装的后台线程、每日分析守护进程和任务子进程会同时写同一份存储，
+写入在文件锁内与磁盘上的最新数据合并，时间戳与 OHLCV 保存在同一个文件中整体替换
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+import numpy as np
+
+from .client import async_okx_client
+from .history import HISTORY_PAGE_LIMIT, CandleBuffer, iter_history_candles, parse_candles
+from .market_book import market_book
+
+# K线存储目录
+CANDLE_DIR = Path(__file__).parent.parent / "data" / "candles"
+
+# ohlcv 数组的列顺序
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+# 存储文件的记录格式，时间戳与 OHLCV 在同一条记录中，保证两者总是来自同一次写入
+RECORD_DTYPE = np.dtype([("ts", np.int64), ("ohlcv", np.float64, (5,))])
+
+# candles 接口单页最大条数
+CANDLES_PAGE_LIMIT = 300
+
+# 向后衔接最新K线或补齐缺口时每次最多翻页数，未衔接的部分记为缺口，下次请求继续补齐
+MAX_PAGES = 50
+
+# 产品ID与K线周期会拼入存储路径，只允许这些字符
+INST_ID_PATTERN = re.compile(r"^[A-Z0-9-]+$")
+BAR_PATTERN = re.compile(r"^[0-9A-Za-z]+$")
+
+
+def merge_candles(
+    ts_a: np.ndarray, ohlcv_a: np.ndarray, ts_b: np.ndarray, ohlcv_b: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    合并两段K线，按时间戳去重（后者覆盖前者）并升序排列
+    """
+    if len(ts_a) == 0:
+        return ts_b, ohlcv_b
+    if len(ts_b) == 0:
+        return ts_a, ohlcv_a
+
+    ts = np.concatenate([ts_b, ts_a])
+    ohlcv = np.concatenate([ohlcv_b, ohlcv_a])
+    # np.unique 返回首次出现的位置，ts_b 在前因此新数据优先
+    ts, index = np.unique(ts, return_index=True)
+    return ts, ohlcv[index]
+
+
+def _empty() -> tuple[np.ndarray, np.ndarray]:
+    return np.empty(0, dtype=np.int64), np.empty((0, 5), dtype=np.float64)
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """跨进程互斥锁（阻塞等待），锁文件本身不删除"""
+    with open(path, "a+b") as f:
+        if sys.platform == "win32":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _replace_atomic(directory: Path, target: Path, write) -> None:
+    """写入唯一命名的临时文件后替换目标文件，失败时清理临时文件"""
+    fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class CandleStore:
+    """
+    K线本地存储
+    只持久化已收盘的K线，未收盘的最新K线每次实时获取
+    """
+
+    def __init__(self, root: Path = CANDLE_DIR):
+        self.root = root
+        self._locks: dict[tuple, asyncio.Lock] = {}
+        self._write_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._write_locks_guard = threading.Lock()
+        self.fetched_pages = 0
+
+    def _dir(self, inst_id: str, bar: str) -> Path:
+        if not INST_ID_PATTERN.match(inst_id):
+            raise ValueError(f"无效的产品ID: {inst_id!r}")
+        if not BAR_PATTERN.match(bar):
+            raise ValueError(f"无效的K线周期: {bar!r}")
+        return self.root / inst_id / bar
+
+    def _lock(self, inst_id: str, bar: str) -> asyncio.Lock:
+        key = (asyncio.get_running_loop(), inst_id, bar)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    @contextmanager
+    def _write_lock(self, inst_id: str, bar: str, directory: Path) -> Iterator[None]:
+        """
+        写入锁：线程锁串行化本进程内各事件循环/线程，文件锁串行化其他进程
+        """
+        with self._write_locks_guard:
+            lock = self._write_locks.setdefault((inst_id, bar), threading.Lock())
+        with lock, _file_lock(directory / ".lock"):
+            yield
+
+    def read(self, inst_id: str, bar: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        读取已存储的K线（内存映射，只读）
+
+        Returns:
+            (ts int64, ohlcv float64 (N, 5))，按时间升序
+        """
+        directory = self._dir(inst_id, bar)
+        candle_file = directory / "candles.npy"
+        try:
+            if candle_file.exists():
+                records = np.load(candle_file, mmap_mode="r")
+                return records["ts"], records["ohlcv"]
+            # 旧版按列分别保存的存储，下次写入时迁移
+            ts_file, ohlcv_file = directory / "ts.npy", directory / "ohlcv.npy"
+            if not ts_file.exists() or not ohlcv_file.exists():
+                return _empty()
+            ts = np.load(ts_file, mmap_mode="r")
+            ohlcv = np.load(ohlcv_file, mmap_mode="r")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] 读取K线缓存失败 {inst_id} {bar}: {e}")
+            return _empty()
+
+        if len(ts) != len(ohlcv):
+            return _empty()
+        return ts, ohlcv
+
+    def last_confirmed_ts(self, inst_id: str, bar: str) -> Optional[int]:
+        """
+        已存储的最后一根（已收盘）K线时间戳，用于区分 get() 结果中的未收盘K线
+        """
+        ts = self.read(inst_id, bar)[0]
+        return int(ts[-1]) if len(ts) else None
+
+    def write(self, inst_id: str, bar: str, ts: np.ndarray, ohlcv: np.ndarray) -> bool:
+        """
+        原子写入K线
+        在写入锁内先与磁盘上的最新数据合并（其他进程可能刚写入了更多K线），
+        再写入唯一命名的临时文件并整体替换
+
+        Returns:
+            是否写入成功；失败时只打印警告，调用方继续使用内存中的数据
+        """
+        directory = self._dir(inst_id, bar)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with self._write_lock(inst_id, bar, directory):
+                current_ts, current_ohlcv = self.read(inst_id, bar)
+                # 复制后释放内存映射再替换文件（Windows 下被映射的文件无法替换）
+                current_ts, current_ohlcv = np.array(current_ts), np.array(current_ohlcv)
+                ts, ohlcv = merge_candles(current_ts, current_ohlcv, ts, ohlcv)
+
+                records = np.empty(len(ts), dtype=RECORD_DTYPE)
+                records["ts"] = ts
+                records["ohlcv"] = ohlcv
+                _replace_atomic(directory, directory / "candles.npy", lambda f: np.save(f, records))
+                for name in ("ts.npy", "ohlcv.npy"):
+                    (directory / name).unlink(missing_ok=True)
+        except OSError as e:
+            print(f"[WARN] 写入K线缓存失败 {inst_id} {bar}: {e}")
+            return False
+        return True
+
+    def read_gaps(self, inst_id: str, bar: str) -> list[tuple[int, int]]:
+        """
+        读取已存储K线中未补齐的缺口
+
+        Returns:
+            [(start, end), ...]，两个时间戳之间（不含两端）的K线缺失
+        """
+        gap_file = self._dir(inst_id, bar) / "gaps.json"
+        if not gap_file.exists():
+            return []
+        try:
+            with open(gap_file, "r", encoding="utf-8") as f:
+                return [(int(start), int(end)) for start, end in json.load(f)]
+        except (json.JSONDecodeError, OSError, TypeError, ValueError) as e:
+            print(f"[WARN] 读取K线缺口记录失败 {inst_id} {bar}: {e}")
+            return []
+
+    def write_gaps(self, inst_id: str, bar: str, gaps: list[tuple[int, int]]):
+        """
+        原子写入缺口记录，没有缺口时删除记录文件
+        """
+        directory = self._dir(inst_id, bar)
+        gap_file = directory / "gaps.json"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with self._write_lock(inst_id, bar, directory):
+                if not gaps:
+                    gap_file.unlink(missing_ok=True)
+                    return
+                payload = json.dumps([list(gap) for gap in gaps]).encode("utf-8")
+                _replace_atomic(directory, gap_file, lambda f: f.write(payload))
+        except OSError as e:
+            print(f"[WARN] 写入K线缺口记录失败 {inst_id} {bar}: {e}")
+
+    async def _fetch_page(self, inst_id: str, bar: str, after: str = "", before: str = "", history: bool = False) -> list:
+        """获取一页K线（最新在前）"""
+        self.fetched_pages += 1
+        if history:
+            res = await async_okx_client.get_history_candlesticks(
+                inst_id, bar=bar, limit=HISTORY_PAGE_LIMIT, after=after, before=before
+            )
+        else:
+            res = await async_okx_client.get_candlesticks(
+                inst_id, bar=bar, limit=CANDLES_PAGE_LIMIT, after=after, before=before
+            )
+        return res.get("data", [])
+
+    async def _fetch_back(self, inst_id: str, bar: str, rows: list, start: int) -> Optional[tuple[int, int]]:
+        """
+        从 rows 中最早的K线向前翻页，直到衔接 start 或达到 MAX_PAGES，翻到的K线追加到 rows
+
+        Returns:
+            仍未衔接时返回缺口 (start, 已取到的最早时间戳)，否则为 None
+        """
+        # rows 已包含第一页，与之合计不超过 MAX_PAGES 页
+        for _ in range(MAX_PAGES - 1):
+            oldest = int(rows[-1][0])
+            if oldest <= start:
+                return None
+            page = await self._fetch_page(inst_id, bar, after=str(oldest), history=True)
+            if not page:
+                break
+            rows.extend(page)
+        oldest = int(rows[-1][0])
+        return (start, oldest) if oldest > start else None
+
+    async def _fill_gaps(self, inst_id: str, bar: str, gaps: list[tuple[int, int]]) -> tuple[list, list[tuple[int, int]]]:
+        """
+        从上次记录的缺口末端继续向前翻页补齐
+
+        Returns:
+            (补回的K线（最新在前）, 仍未补齐的缺口)
+        """
+        filled: list = []
+        remaining: list[tuple[int, int]] = []
+        for start, end in gaps:
+            rows = await self._fetch_page(inst_id, bar, after=str(end), history=True)
+            if not rows:
+                remaining.append((start, end))
+                continue
+            gap = await self._fetch_back(inst_id, bar, rows, start)
+            filled.extend(r for r in rows if start < int(r[0]) < end)
+            if gap is not None:
+                remaining.append(gap)
+        return filled, remaining
+
+    async def _fetch_newer(
+        self, inst_id: str, bar: str, last_ts: Optional[int], limit: int
+    ) -> tuple[list, Optional[tuple[int, int]]]:
+        """
+        获取 last_ts 之后的全部K线
+        WebSocket 内存簿已覆盖 last_ts 时直接使用，无需网络请求；
+        否则先取最新一页，若未衔接到 last_ts 再用 after 游标向前翻页补齐缺口
+
+        Returns:
+            (K线（最新在前）, 翻页达到上限仍未衔接 last_ts 时留下的缺口)
+        """
+        live_rows = market_book.get_candles(inst_id, bar)
+        if last_ts is not None and live_rows and int(live_rows[-1][0]) <= last_ts:
+            return [r for r in live_rows if int(r[0]) > last_ts], None
+
+        before = str(last_ts) if last_ts is not None else ""
+        rows = await self._fetch_page(inst_id, bar, before=before)
+        if not rows:
+            return [], None
+        # 带 before 游标且未取满一页，说明缺口已全部取回
+        if last_ts is not None and len(rows) < CANDLES_PAGE_LIMIT:
+            return rows, None
+
+        if last_ts is not None:
+            gap = await self._fetch_back(inst_id, bar, rows, last_ts)
+            return [r for r in rows if int(r[0]) > last_ts], gap
+
+        pages = 1
+        while pages < MAX_PAGES and len(rows) < limit:
+            page = await self._fetch_page(inst_id, bar, after=rows[-1][0], history=True)
+            pages += 1
+            if not page:
+                break
+            rows.extend(page)
+        return rows, None
+
+    async def get(self, inst_id: str, bar: str = "1H", limit: int = 100) -> tuple[np.ndarray, np.ndarray]:
+        """
+        获取最近 limit 条K线（包含未收盘的最新K线）
+
+        Args:
+            inst_id: 产品ID，如 BTC-USDT-SWAP
+            bar: K线周期
+            limit: 返回数量
+
+        Returns:
+            (ts int64, ohlcv float64 (N, 5))，按时间升序
+        """
+        async with self._lock(inst_id, bar):
+            stored_ts, stored_ohlcv = self.read(inst_id, bar)
+            last_ts = int(stored_ts[-1]) if len(stored_ts) else None
+
+            stored_gaps = self.read_gaps(inst_id, bar)
+            filled, gaps = await self._fill_gaps(inst_id, bar, stored_gaps)
+            rows, gap = await self._fetch_newer(inst_id, bar, last_ts, limit)
+            if gap is not None:
+                gaps.append(gap)
+                print(f"[WARN] K线翻页达到上限，{inst_id} {bar} 留有缺口，下次请求继续补齐")
+
+            gap_ts, gap_ohlcv, _ = parse_candles(filled)
+            new_ts, new_ohlcv, confirmed = parse_candles(rows)
+
+            ts, ohlcv = merge_candles(stored_ts, stored_ohlcv, gap_ts, gap_ohlcv)
+            ts, ohlcv = merge_candles(ts, ohlcv, new_ts[confirmed], new_ohlcv[confirmed])
+
+            missing = limit - len(ts) - int((~confirmed).sum())
+            if missing > 0 and len(ts):
+                buffer = CandleBuffer(missing)
+                async for page_ts, page_ohlcv in iter_history_candles(inst_id, bar, end_ts=int(ts[0]), max_bars=missing):
+                    self.fetched_pages += 1
+                    buffer.extend(page_ts, page_ohlcv)
+                old_ts, old_ohlcv = buffer.arrays()
+                ts, ohlcv = merge_candles(old_ts, old_ohlcv, ts, ohlcv)
+
+            changed = len(ts) != len(stored_ts) or (len(ts) and ts[-1] != stored_ts[-1])
+            # 释放内存映射后再替换文件（Windows 下被映射的文件无法替换）
+            del stored_ts, stored_ohlcv
+            if changed:
+                self.write(inst_id, bar, ts, ohlcv)
+            if gaps != stored_gaps:
+                self.write_gaps(inst_id, bar, gaps)
+
+            # 未收盘K线只返回，不落盘
+            if (~confirmed).any():
+                ts, ohlcv = merge_candles(ts, ohlcv, new_ts[~confirmed], new_ohlcv[~confirmed])
+
+        return np.array(ts[-limit:]), np.array(ohlcv[-limit:])
+
+    def get_sync(self, inst_id: str, bar: str = "1H", limit: int = 100) -> tuple[np.ndarray, np.ndarray]:
+        """
+        获取K线 (同步封装)
+        """
+        return async_okx_client.run_sync(self.get(inst_id, bar, limit))
+
+
+candle_store = CandleStore()
@@ -1,7 +1,19 @@
 """
 OKX API 客户端管理模块
 统一管理所有 OKX API 客户端实例
+提供同步（python-okx）与原生异步（httpx 连接池）两套客户端
 """
+import asyncio
+import base64
+import hmac
+import json
+import threading
+import weakref
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Optional, TypeVar
+from urllib.parse import urlencode
+
+import httpx
 from okx import Account, Grid, MarketData
 
 from config import (
@@ -9,7 +21,42 @@ from config import (
     OKX_API_SECRET,
     OKX_PASSPHRASE,
     OKX_FLAG,
+    BASE_URL,
+    OKX_CACHE_TTL_PRIVATE,
+    OKX_CACHE_TTL_PUBLIC,
 )
+from .cache import TTLCache
+from .rate_limiter import RateLimiter, current_priority, rate_limiter
+
+T = TypeVar("T")
+
+# OKX REST 接口路径
+POSITIONS_PATH = "/api/v5/account/positions"
+BALANCE_PATH = "/api/v5/account/balance"
+GRID_PENDING_PATH = "/api/v5/tradingBot/grid/orders-algo-pending"
+CANDLES_PATH = "/api/v5/market/candles"
+HISTORY_CANDLES_PATH = "/api/v5/market/history-candles"
+TICKER_PATH = "/api/v5/market/ticker"
+TICKERS_PATH = "/api/v5/market/tickers"
+INSTRUMENTS_PATH = "/api/v5/public/instruments"
+FUNDING_RATE_PATH = "/api/v5/public/funding-rate"
+
+# 触发限频时的错误码与最大重试次数
+RATE_LIMIT_CODE = "50011"
+MAX_RATE_LIMIT_RETRIES = 3
+
+# 按接口配置的缓存 TTL（秒）
+ENDPOINT_TTLS = {
+    POSITIONS_PATH: OKX_CACHE_TTL_PRIVATE,
+    BALANCE_PATH: OKX_CACHE_TTL_PRIVATE,
+    GRID_PENDING_PATH: OKX_CACHE_TTL_PRIVATE,
+    CANDLES_PATH: OKX_CACHE_TTL_PUBLIC,
+    HISTORY_CANDLES_PATH: OKX_CACHE_TTL_PUBLIC * 6,
+    TICKER_PATH: OKX_CACHE_TTL_PRIVATE,
+    TICKERS_PATH: OKX_CACHE_TTL_PRIVATE,
+    INSTRUMENTS_PATH: OKX_CACHE_TTL_PUBLIC * 6,
+    FUNDING_RATE_PATH: OKX_CACHE_TTL_PUBLIC,
+}
 
 
 class OKXClient:
@@ -83,4 +130,242 @@ class OKXClient:
         return self._market
 
 
+class OKXAPIError(Exception):
+    """
+    OKX 接口返回非 0 code 或 HTTP 错误时抛出
+    """
+
+    def __init__(self, code: str, msg: str, path: str = ""):
+        self.code = code
+        self.msg = msg
+        self.path = path
+        super().__init__(f"OKX API 错误 [{code}] {msg} ({path})")
+
+
+class AsyncOKXClient:
+    """
+    原生异步 OKX API 客户端
+    自行完成请求签名，每个事件循环复用同一个 keep-alive 连接池，
+    避免在 Discord 事件循环中阻塞等待 HTTP 往返
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.base_url = BASE_URL.rstrip("/")
+        self.timeout = httpx.Timeout(10.0, connect=5.0)
+        self.limits = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_thread: Optional[threading.Thread] = None
+        self._sync_lock = threading.Lock()
+        self.cache = TTLCache(default_ttl=0, ttls=ENDPOINT_TTLS)
+        self.rate_limiter: RateLimiter = rate_limiter
+        self._initialized = True
+
+    @property
+    def session(self) -> httpx.AsyncClient:
+        """
+        获取当前事件循环对应的连接池会话
+        httpx.AsyncClient 与创建它的事件循环绑定，因此按事件循环缓存
+        """
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.is_closed:
+            session = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                headers={"Content-Type": "application/json", "x-simulated-trading": OKX_FLAG},
+            )
+            self._sessions[loop] = session
+        return session
+
+    @staticmethod
+    def _timestamp() -> str:
+        """生成 OKX 要求的 ISO8601 毫秒时间戳"""
+        now = datetime.now(timezone.utc)
+        return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+
+    @staticmethod
+    def _sign(timestamp: str, method: str, request_path: str, body: str) -> str:
+        """HMAC-SHA256 签名，返回 base64 字符串"""
+        message = f"{timestamp}{method.upper()}{request_path}{body}"
+        mac = hmac.new(OKX_API_SECRET.encode("utf-8"), message.encode("utf-8"), digestmod="sha256")
+        return base64.b64encode(mac.digest()).decode()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict[str, Any]] = None,
+        auth: bool = False,
+        use_cache: bool = True,
+    ) -> dict[str, Any]:
+        """
+        发送 REST 请求
+        GET 请求按接口 TTL 缓存，并发的相同请求合并为一次
+
+        Args:
+            method: GET / POST
+            path: 接口路径，如 /api/v5/account/positions
+            params: 请求参数（GET 为查询参数，POST 为 JSON body）
+            auth: 是否为私有接口（需要签名）
+            use_cache: 是否使用缓存（仅对 GET 生效）
+
+        Returns:
+            OKX 返回的完整 JSON
+
+        Raises:
+            OKXAPIError: 接口返回非 0 code 或 HTTP 状态异常
+        """
+        method = method.upper()
+        params = {k: v for k, v in (params or {}).items() if v is not None and v != ""}
+
+        ttl = self.cache.ttl_for(path)
+        if method == "GET" and use_cache and ttl > 0:
+            key = (path, tuple(sorted((k, str(v)) for k, v in params.items())))
+            return await self.cache.get_or_fetch(key, lambda: self._send(method, path, params, auth), ttl)
+
+        return await self._send(method, path, params, auth)
+
+    async def _send(self, method: str, path: str, params: dict[str, Any], auth: bool) -> dict[str, Any]:
+        """
+        经过限频器发送请求
+        遇到 429 / 50011 时清空该接口令牌桶并重试
+        """
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire(path)
+            try:
+                return await self._send_once(method, path, params, auth)
+            except OKXAPIError as e:
+                if e.code not in ("429", RATE_LIMIT_CODE) or attempt >= MAX_RATE_LIMIT_RETRIES:
+                    raise
+                attempt += 1
+                print(f"[WARN] OKX 接口限频，等待后重试 ({attempt}/{MAX_RATE_LIMIT_RETRIES}): {path}")
+                self.rate_limiter.penalize(path)
+
+    async def _send_once(self, method: str, path: str, params: dict[str, Any], auth: bool) -> dict[str, Any]:
+        """签名并发送请求，校验返回 code"""
+        request_path = path
+        body = ""
+        if method == "GET":
+            if params:
+                request_path = f"{path}?{urlencode(params)}"
+        else:
+            body = json.dumps(params) if params else ""
+
+        headers = {}
+        if auth:
+            timestamp = self._timestamp()
+            headers = {
+                "OK-ACCESS-KEY": OKX_API_KEY,
+                "OK-ACCESS-SIGN": self._sign(timestamp, method, request_path, body),
+                "OK-ACCESS-TIMESTAMP": timestamp,
+                "OK-ACCESS-PASSPHRASE": OKX_PASSPHRASE,
+            }
+
+        try:
+            response = await self.session.request(method, request_path, content=body or None, headers=headers)
+        except httpx.HTTPError as e:
+            raise OKXAPIError("-1", f"网络错误: {e}", path) from e
+
+        try:
+            data = response.json()
+        except ValueError:
+            raise OKXAPIError(str(response.status_code), response.text[:200], path)
+
+        if response.status_code != 200 or str(data.get("code", "0")) != "0":
+            raise OKXAPIError(str(data.get("code", response.status_code)), data.get("msg", ""), path)
+
+        return data
+
+    async def get_positions(self, inst_type: str = "", inst_id: str = "") -> dict[str, Any]:
+        """查询持仓（私有）"""
+        return await self.request("GET", POSITIONS_PATH, {"instType": inst_type, "instId": inst_id}, auth=True)
+
+    async def get_account_balance(self, ccy: str = "") -> dict[str, Any]:
+        """查询账户余额（私有）"""
+        return await self.request("GET", BALANCE_PATH, {"ccy": ccy}, auth=True)
+
+    async def grid_orders_algo_pending(self, algo_ord_type: str = "contract_grid") -> dict[str, Any]:
+        """查询运行中的网格策略（私有）"""
+        return await self.request("GET", GRID_PENDING_PATH, {"algoOrdType": algo_ord_type}, auth=True)
+
+    async def get_candlesticks(self, inst_id: str, bar: str = "1H", limit: int = 100, after: str = "", before: str = "") -> dict[str, Any]:
+        """查询近期K线（公共）"""
+        params = {"instId": inst_id, "bar": bar, "limit": str(limit), "after": after, "before": before}
+        return await self.request("GET", CANDLES_PATH, params)
+
+    async def get_history_candlesticks(self, inst_id: str, bar: str = "1H", limit: int = 100, after: str = "", before: str = "") -> dict[str, Any]:
+        """查询历史K线（公共）"""
+        params = {"instId": inst_id, "bar": bar, "limit": str(limit), "after": after, "before": before}
+        return await self.request("GET", HISTORY_CANDLES_PATH, params)
+
+    async def get_ticker(self, inst_id: str) -> dict[str, Any]:
+        """查询单个产品行情（公共）"""
+        return await self.request("GET", TICKER_PATH, {"instId": inst_id})
+
+    async def get_tickers(self, inst_type: str = "SWAP") -> dict[str, Any]:
+        """查询某一类产品的全部行情（公共）"""
+        return await self.request("GET", TICKERS_PATH, {"instType": inst_type})
+
+    async def get_instruments(self, inst_type: str = "SWAP") -> dict[str, Any]:
+        """查询某一类产品的全部交易产品信息（公共）"""
+        return await self.request("GET", INSTRUMENTS_PATH, {"instType": inst_type})
+
+    async def get_funding_rate(self, inst_id: str = "ANY") -> dict[str, Any]:
+        """查询永续合约当前资金费率，inst_id 为 ANY 时返回全部永续合约（公共）"""
+        return await self.request("GET", FUNDING_RATE_PATH, {"instId": inst_id})
+
+    def _ensure_sync_loop(self) -> asyncio.AbstractEventLoop:
+        """启动供同步调用使用的后台事件循环线程"""
+        with self._sync_lock:
+            if self._sync_loop is None or self._sync_loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="okx-sync-loop", daemon=True)
+                thread.start()
+                self._sync_loop = loop
+                self._sync_thread = thread
+            return self._sync_loop
+
+    def run_sync(self, coro: Awaitable[T]) -> T:
+        """
+        在后台事件循环中同步执行协程
+        无论调用方线程是否已有运行中的事件循环都可以安全使用，
+        所有同步调用共享后台循环上的同一个连接池；调用方的请求优先级会被带入后台循环
+        """
+        priority = current_priority.get()
+
+        async def _run() -> T:
+            current_priority.set(priority)
+            return await coro
+
+        loop = self._ensure_sync_loop()
+        future = asyncio.run_coroutine_threadsafe(_run(), loop)
+        return future.result()
+
+    async def close(self):
+        """关闭当前事件循环上的连接池"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        session = self._sessions.pop(loop, None)
+        if session is not None:
+            await session.aclose()
+
+
 okx_client = OKXClient()
+async_okx_client = AsyncOKXClient()
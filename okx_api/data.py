@@ -0,0 +1,97 @@
+"""
+OKX 数据层模块
+只负责拉取与解析，返回带类型的记录（持仓、网格、余额、K线批次、行情），不做任何文本格式化
+
+Cogs、Agent 工具和分析逻辑共享同一份解析结果，需要展示时再交给 formatters 渲染
+"""
+from typing import Optional
+
+from .candle_store import candle_store
+from .client import async_okx_client
+from .market_book import market_book
+from .models import AccountSnapshot, Balance, CandleBatch, GridStrategy, Position, Ticker
+from .snapshot import get_account_snapshot
+
+
+async def _snapshot_part(key: str) -> AccountSnapshot:
+    """获取账户快照，指定部分拉取失败时抛出对应异常"""
+    snapshot = await get_account_snapshot()
+    error = snapshot.errors.get(key)
+    if error is not None:
+        raise error
+    return snapshot
+
+
+async def fetch_positions() -> list[Position]:
+    """
+    获取非零的永续合约持仓
+
+    Returns:
+        持仓记录列表
+    """
+    snapshot = await _snapshot_part("positions")
+    return snapshot.positions
+
+
+async def fetch_grid_strategies() -> list[GridStrategy]:
+    """
+    获取运行中的合约网格策略
+
+    Returns:
+        网格策略记录列表
+    """
+    snapshot = await _snapshot_part("grids")
+    return snapshot.grids
+
+
+async def fetch_balance() -> Optional[Balance]:
+    """
+    获取账户余额
+
+    Returns:
+        余额记录，无数据时返回 None
+    """
+    snapshot = await _snapshot_part("balance")
+    return snapshot.balance
+
+
+async def fetch_candles(inst_id: str, bar: str = "1H", limit: int = 100) -> CandleBatch:
+    """
+    获取最近 limit 条K线（本地存储 + 增量拉取）
+
+    Args:
+        inst_id: 产品ID，如 BTC-USDT-SWAP
+        bar: K线周期
+        limit: 返回数量
+
+    Returns:
+        K线批次，按时间升序
+    """
+    market_book.watch(inst_id)
+    ts, ohlcv = await candle_store.get(inst_id, bar, limit)
+    return CandleBatch(inst_id, bar, ts, ohlcv)
+
+
+async def fetch_ticker(inst_id: str) -> Optional[Ticker]:
+    """
+    获取最新行情
+    优先读取 WebSocket 内存簿，没有实时数据时回退到 REST 接口
+
+    Args:
+        inst_id: 产品ID，如 BTC-USDT-SWAP
+
+    Returns:
+        行情记录，无数据时返回 None
+    """
+    market_book.watch(inst_id)
+    data = market_book.get_ticker(inst_id)
+    if data is None:
+        res = await async_okx_client.get_ticker(inst_id)
+        rows = res.get("data", [])
+        if not rows:
+            return None
+        data = rows[0]
+
+    ticker = Ticker.from_okx(data, market_book.get_mark_price(inst_id))
+    ticker.inst_id = ticker.inst_id or inst_id
+    return ticker
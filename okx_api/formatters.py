@@ -0,0 +1,207 @@
+"""
+OKX 文本渲染模块
+将数据层返回的带类型记录渲染为中文文本，供 Discord 命令与 Agent 工具展示
+"""
+from datetime import datetime
+from typing import Optional
+
+from .models import AccountSnapshot, Balance, CandleBatch, GridStrategy, Position, Ticker
+
+
+def _signed(value: float, suffix: str = "") -> str:
+    """带正负号的两位小数"""
+    return f"+{value:.2f}{suffix}" if value >= 0 else f"{value:.2f}{suffix}"
+
+
+def _num(value: Optional[float]) -> str:
+    """数值原样展示（去掉多余的小数位），空值显示 N/A"""
+    if value is None:
+        return "N/A"
+    return f"{value:.10g}"
+
+
+def format_positions(positions: list[Position]) -> str:
+    """
+    格式化合约持仓
+
+    Args:
+        positions: 持仓记录列表
+
+    Returns:
+        格式化的持仓信息文本
+    """
+    if not positions:
+        return "当前无任何合约持仓"
+
+    lines = ["当前合约持仓:"]
+    for pos in positions:
+        direction = "多" if pos.direction == "long" else "空"
+        lines.append(
+            f"- {pos.inst_id}: {direction}方, "
+            f"数量: {_num(pos.pos)}, 均价: {_num(pos.avg_px)}, "
+            f"未实现盈亏: {_signed(pos.upl)} USDT, 杠杆: {_num(pos.lever)}x"
+        )
+
+    return "\n".join(lines)
+
+
+def format_grid_strategies(grids: list[GridStrategy]) -> str:
+    """
+    格式化合约网格策略
+
+    Args:
+        grids: 网格策略记录列表
+
+    Returns:
+        格式化的网格策略信息文本
+    """
+    if not grids:
+        return "当前无运行中的合约网格策略"
+
+    state_map = {
+        "running": "运行中",
+        "paused": "已暂停",
+        "stopped": "已停止",
+    }
+
+    direction_map = {
+        "long": "做多",
+        "short": "做空",
+    }
+
+    lines = ["合约网格策略列表:"]
+    for g in grids:
+        state = state_map.get(g.state, g.state)
+        direction = direction_map.get(g.direction, g.direction)
+
+        lever_text = f"{_num(g.lever)}x"
+        if g.actual_lever is not None:
+            lever_text = f"{_num(g.lever)}x(实际{g.actual_lever:.2f}x)"
+
+        lines.append(
+            f"- {g.inst_id or 'N/A'} ({state}):\n"
+            f"  方向: {direction}, 杠杆: {lever_text}\n"
+            f"  网格区间: {_num(g.min_px)} ~ {_num(g.max_px)}, 网格数: {g.grid_num}\n"
+            f"  总盈亏: {_signed(g.total_pnl)} USDT, 浮动盈亏: {_signed(g.float_profit)}\n"
+            f"  网格收益: {_signed(g.grid_profit)}, 收益率: {_signed(g.pnl_ratio * 100, '%')}\n"
+            f"  爆仓价: {_num(g.liq_px)}"
+        )
+
+    return "\n".join(lines)
+
+
+def format_balance(balance: Optional[Balance]) -> str:
+    """
+    格式化账户余额
+
+    Args:
+        balance: 余额记录
+
+    Returns:
+        格式化的余额信息文本
+    """
+    if balance is None:
+        return "无法获取账户余额"
+
+    return (
+        f"账户余额:\n"
+        f"总权益: {balance.total_eq:.2f} USDT\n\n"
+        f"{balance.ccy}:\n"
+        f"  币种余额: {balance.cash_bal:.2f}\n"
+        f"  可用余额: {balance.avail_bal:.2f}\n"
+        f"  冻结金额: {balance.frozen_bal:.2f}"
+    )
+
+
+def format_account_snapshot(snapshot: AccountSnapshot) -> str:
+    """
+    格式化账户总览（余额 + 持仓 + 网格）
+
+    Args:
+        snapshot: 账户快照
+
+    Returns:
+        格式化的账户总览文本
+    """
+    sections = []
+    for key, render in (
+        ("balance", lambda: format_balance(snapshot.balance)),
+        ("positions", lambda: format_positions(snapshot.positions)),
+        ("grids", lambda: format_grid_strategies(snapshot.grids)),
+    ):
+        error = snapshot.errors.get(key)
+        sections.append(f"查询失败: {error}" if error else render())
+
+    fetched_at = datetime.fromtimestamp(snapshot.fetched_at).strftime("%Y-%m-%d %H:%M:%S")
+    sections.append(f"数据时间: {fetched_at}")
+    return "\n\n".join(sections)
+
+
+BAR_NAMES = {
+    "1m": "1分钟",
+    "5m": "5分钟",
+    "15m": "15分钟",
+    "1H": "1小时",
+    "4H": "4小时",
+    "1D": "1天",
+    "1W": "1周",
+    "1M": "1月",
+}
+
+
+def format_candles(batch: CandleBatch) -> str:
+    """
+    格式化K线数据
+
+    Args:
+        batch: K线批次
+
+    Returns:
+        格式化的K线数据文本
+    """
+    if len(batch) == 0:
+        return f"无法获取 {batch.inst_id} 的K线数据"
+
+    bar_name = BAR_NAMES.get(batch.bar, batch.bar)
+
+    lines = [f"{batch.inst_id} K线数据 ({bar_name}周期):\n"]
+    lines.append("时间|开盘价|最高价|最低价|收盘价|成交量")
+
+    for ts, (o, h, l, c, vol) in zip(batch.ts.tolist(), batch.ohlcv.tolist()):
+        dt = datetime.fromtimestamp(ts / 1000).strftime("%Y-%m-%d %H:%M")
+
+        lines.append(f"{dt}|{o:>10.4f}|{h:>10.4f}|{l:>10.4f}|{c:>10.4f}|{vol:>12.2f}")
+
+    latest_o, latest_c = float(batch.open[-1]), float(batch.close[-1])
+    latest_change = ((latest_c - latest_o) / latest_o) * 100 if latest_o > 0 else 0
+    lines.append(f"\n最新价格: {latest_c:.4f} ({_signed(latest_change, '%')})")
+
+    return "\n".join(lines)
+
+
+def format_ticker(ticker: Optional[Ticker], inst_id: str = "") -> str:
+    """
+    格式化最新行情
+
+    Args:
+        ticker: 行情记录
+        inst_id: 产品ID（行情为空时用于提示）
+
+    Returns:
+        格式化的行情文本
+    """
+    if ticker is None:
+        return f"无法获取 {inst_id} 的行情数据"
+
+    lines = [
+        f"{ticker.inst_id} 最新行情:",
+        f"最新价: {_num(ticker.last)} ({_signed(ticker.change_pct, '%')})",
+        f"24h 最高: {_num(ticker.high_24h)}, 24h 最低: {_num(ticker.low_24h)}",
+        f"买一: {_num(ticker.bid_px)}, 卖一: {_num(ticker.ask_px)}",
+        f"24h 成交量: {_num(ticker.vol_24h)}",
+    ]
+
+    if ticker.mark_px is not None:
+        lines.append(f"标记价格: {_num(ticker.mark_px)}")
+
+    return "\n".join(lines)
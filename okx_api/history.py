@@ -0,0 +1,249 @@
+"""
+历史K线分页模块
+使用 after / before 游标逐页遍历 history-candles，按页惰性产出 numpy 数组，
+可从任意时间戳续传，并直接写入列式缓冲区，避免长区间回测构造巨大的 Python 列表
+"""
+import time
+from typing import AsyncIterator, Optional
+
+import numpy as np
+
+from .client import async_okx_client
+
+# history-candles 接口单页最大条数
+HISTORY_PAGE_LIMIT = 100
+
+# 各周期的毫秒数（正向遍历需要按周期推算窗口，1M 周期长度不固定因此不支持正向遍历）
+BAR_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1H": 3_600_000,
+    "2H": 7_200_000,
+    "4H": 14_400_000,
+    "6H": 21_600_000,
+    "12H": 43_200_000,
+    "1D": 86_400_000,
+    "1W": 604_800_000,
+}
+
+
+def parse_candles(rows: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    将 OKX 返回的K线列表解析为数组
+
+    Args:
+        rows: OKX K线数据，[ts, o, h, l, c, vol, volCcy, volCcyQuote, confirm]，最新在前
+
+    Returns:
+        (ts int64, ohlcv float64 (N, 5), confirmed bool)，按时间升序
+    """
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, 5), dtype=np.float64), np.empty(0, dtype=bool)
+
+    rows = rows[::-1]
+    ts = np.fromiter((int(r[0]) for r in rows), dtype=np.int64, count=len(rows))
+    ohlcv = np.array([r[1:6] for r in rows], dtype=np.float64)
+    confirmed = np.fromiter(
+        (len(r) < 9 or r[8] == "1" for r in rows), dtype=bool, count=len(rows)
+    )
+    return ts, ohlcv, confirmed
+
+
+class CandleBuffer:
+    """
+    可增长的列式K线缓冲区
+    ts 为 int64，ohlcv 为 float64 (N, 5)，容量按倍数扩展
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._ts = np.empty(max(capacity, 1), dtype=np.int64)
+        self._ohlcv = np.empty((max(capacity, 1), 5), dtype=np.float64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, size: int):
+        if size <= len(self._ts):
+            return
+        capacity = max(size, len(self._ts) * 2)
+        ts = np.empty(capacity, dtype=np.int64)
+        ohlcv = np.empty((capacity, 5), dtype=np.float64)
+        ts[: self._size] = self._ts[: self._size]
+        ohlcv[: self._size] = self._ohlcv[: self._size]
+        self._ts, self._ohlcv = ts, ohlcv
+
+    def extend(self, ts: np.ndarray, ohlcv: np.ndarray):
+        """追加一页K线（任意顺序）"""
+        n = len(ts)
+        if n == 0:
+            return
+        self._reserve(self._size + n)
+        self._ts[self._size : self._size + n] = ts
+        self._ohlcv[self._size : self._size + n] = ohlcv
+        self._size += n
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        返回按时间升序、去重后的数组
+        """
+        ts = self._ts[: self._size]
+        ohlcv = self._ohlcv[: self._size]
+        if self._size > 1 and not np.all(ts[1:] > ts[:-1]):
+            ts, index = np.unique(ts, return_index=True)
+            ohlcv = ohlcv[index]
+        return ts.copy(), ohlcv.copy()
+
+
+async def iter_history_candles(
+    inst_id: str,
+    bar: str = "1H",
+    start_ts: Optional[int] = None,
+    end_ts: Optional[int] = None,
+    forward: bool = False,
+    max_bars: Optional[int] = None,
+    page_limit: int = HISTORY_PAGE_LIMIT,
+) -> AsyncIterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    按页遍历历史K线
+
+    每页请求都经过 AsyncOKXClient 的限频器；只产出已收盘的K线
+
+    Args:
+        inst_id: 产品ID，如 BTC-USDT-SWAP
+        bar: K线周期
+        start_ts: 起始时间戳（毫秒，包含），为空时向前遍历到没有数据为止
+        end_ts: 结束时间戳（毫秒，不包含），为空时从最新K线开始
+        forward: 是否按时间正向遍历（需要 start_ts，且周期长度固定）
+        max_bars: 最多产出的K线数量
+        page_limit: 每页条数
+
+    Yields:
+        (ts int64, ohlcv float64 (N, 5))，页内按时间升序；
+        续传时把已处理的最早（反向）或最晚（正向）时间戳作为 end_ts / start_ts 传回即可
+    """
+    if forward:
+        async for page in _iter_forward(inst_id, bar, start_ts, end_ts, max_bars, page_limit):
+            yield page
+        return
+
+    cursor = str(end_ts) if end_ts is not None else ""
+    produced = 0
+    while max_bars is None or produced < max_bars:
+        res = await async_okx_client.get_history_candlesticks(inst_id, bar=bar, limit=page_limit, after=cursor)
+        rows = res.get("data", [])
+        if not rows:
+            return
+
+        ts, ohlcv, confirmed = parse_candles(rows)
+        ts, ohlcv = ts[confirmed], ohlcv[confirmed]
+        cursor = rows[-1][0]
+
+        reached_start = start_ts is not None and len(ts) and ts[0] <= start_ts
+        if start_ts is not None:
+            keep = ts >= start_ts
+            ts, ohlcv = ts[keep], ohlcv[keep]
+        if max_bars is not None and produced + len(ts) > max_bars:
+            drop = produced + len(ts) - max_bars
+            ts, ohlcv = ts[drop:], ohlcv[drop:]
+
+        if len(ts):
+            produced += len(ts)
+            yield ts, ohlcv
+        if reached_start:
+            return
+
+
+async def _iter_forward(
+    inst_id: str,
+    bar: str,
+    start_ts: Optional[int],
+    end_ts: Optional[int],
+    max_bars: Optional[int],
+    page_limit: int,
+) -> AsyncIterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    正向遍历：用 before=游标、after=游标+一页时长 取出两个时间戳之间的K线
+    """
+    if start_ts is None:
+        raise ValueError("正向遍历需要提供 start_ts")
+    bar_ms = BAR_MS.get(bar)
+    if bar_ms is None:
+        raise ValueError(f"周期 {bar} 不支持正向遍历")
+
+    # before 不包含游标本身，因此从 start_ts 前一个周期开始
+    cursor = start_ts - bar_ms
+    produced = 0
+    while max_bars is None or produced < max_bars:
+        window_end = cursor + (page_limit + 1) * bar_ms
+        if end_ts is not None:
+            window_end = min(window_end, end_ts)
+        if window_end <= cursor + bar_ms:
+            return
+
+        res = await async_okx_client.get_history_candlesticks(
+            inst_id, bar=bar, limit=page_limit, after=str(window_end), before=str(cursor)
+        )
+        ts, ohlcv, confirmed = parse_candles(res.get("data", []))
+        ts, ohlcv = ts[confirmed], ohlcv[confirmed]
+
+        if len(ts) == 0:
+            # 窗口内没有已收盘K线：已到达结束时间或当前时间则结束，否则（未上市/停牌区间）跳过该窗口
+            if (end_ts is not None and window_end >= end_ts) or window_end > time.time() * 1000:
+                return
+            cursor = window_end - bar_ms
+            continue
+
+        if max_bars is not None and produced + len(ts) > max_bars:
+            ts, ohlcv = ts[: max_bars - produced], ohlcv[: max_bars - produced]
+
+        produced += len(ts)
+        yield ts, ohlcv
+        cursor = int(ts[-1])
+
+
+async def load_history(
+    inst_id: str,
+    bar: str = "1H",
+    start_ts: Optional[int] = None,
+    end_ts: Optional[int] = None,
+    max_bars: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    加载一段历史K线到列式数组
+
+    Args:
+        inst_id: 产品ID
+        bar: K线周期
+        start_ts: 起始时间戳（毫秒，包含）
+        end_ts: 结束时间戳（毫秒，不包含）
+        max_bars: 最多加载的K线数量（从 end_ts 往前计算）
+
+    Returns:
+        (ts int64, ohlcv float64 (N, 5))，按时间升序
+    """
+    capacity = max_bars or 1024
+    if start_ts is not None and bar in BAR_MS:
+        span_end = end_ts if end_ts is not None else int(time.time() * 1000)
+        capacity = max(int((span_end - start_ts) // BAR_MS[bar]) + 1, 1)
+
+    buffer = CandleBuffer(capacity)
+    async for ts, ohlcv in iter_history_candles(inst_id, bar, start_ts=start_ts, end_ts=end_ts, max_bars=max_bars):
+        buffer.extend(ts, ohlcv)
+    return buffer.arrays()
+
+
+def load_history_sync(
+    inst_id: str,
+    bar: str = "1H",
+    start_ts: Optional[int] = None,
+    end_ts: Optional[int] = None,
+    max_bars: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    加载一段历史K线 (同步封装)
+    """
+    return async_okx_client.run_sync(load_history(inst_id, bar, start_ts, end_ts, max_bars))
@@ -0,0 +1,110 @@
+"""
+行情内存簿模块
+保存 WebSocket 推送的最新 ticker、标记价格和K线，供查询函数、Agent 工具和调度器无网络读取
+
+本模块只负责存储，订阅与推送由 services.market_data_service 完成
+"""
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# 每个 (产品ID, 周期) 在内存中保留的K线数量
+MAX_BOOK_CANDLES = 500
+
+# ticker / 标记价格的默认最大有效期（秒）
+DEFAULT_MAX_AGE = 30.0
+
+
+class MarketBook:
+    """
+    行情内存簿
+    """
+
+    def __init__(self):
+        self.tickers: dict[str, tuple[float, dict[str, Any]]] = {}
+        self.mark_prices: dict[str, tuple[float, dict[str, Any]]] = {}
+        self.candles: dict[tuple[str, str], dict[int, list]] = {}
+        self.watched: set[str] = set()
+        self._watch_listeners: list[Callable[[str], Any]] = []
+        # 同步封装在后台线程读取，K线簿的增删需要加锁
+        self._lock = threading.Lock()
+
+    def add_watch_listener(self, listener: Callable[[str], Any]):
+        """
+        注册关注新产品时的回调
+        回调参数: (inst_id)
+        """
+        self._watch_listeners.append(listener)
+
+    def watch(self, inst_id: str):
+        """
+        声明需要某个产品的实时行情（如聊天或定时任务用到的产品）
+        """
+        if not inst_id or inst_id in self.watched:
+            return
+        self.watched.add(inst_id)
+        for listener in self._watch_listeners:
+            try:
+                listener(inst_id)
+            except Exception as e:
+                print(f"[ERROR] 行情订阅回调失败: {e}")
+
+    def update_ticker(self, inst_id: str, data: dict[str, Any]):
+        """写入 ticker 推送"""
+        self.tickers[inst_id] = (time.monotonic(), data)
+
+    def update_mark_price(self, inst_id: str, data: dict[str, Any]):
+        """写入标记价格推送"""
+        self.mark_prices[inst_id] = (time.monotonic(), data)
+
+    def update_candle(self, inst_id: str, bar: str, row: list):
+        """
+        写入K线推送
+
+        Args:
+            row: OKX K线格式 [ts, o, h, l, c, vol, volCcy, volCcyQuote, confirm]
+        """
+        with self._lock:
+            book = self.candles.setdefault((inst_id, bar), {})
+            book[int(row[0])] = row
+            if len(book) > MAX_BOOK_CANDLES:
+                for ts in sorted(book)[: len(book) - MAX_BOOK_CANDLES]:
+                    del book[ts]
+
+    def get_ticker(self, inst_id: str, max_age: float = DEFAULT_MAX_AGE) -> Optional[dict[str, Any]]:
+        """获取未过期的 ticker，不存在或已过期返回 None"""
+        entry = self.tickers.get(inst_id)
+        if entry is None or time.monotonic() - entry[0] > max_age:
+            return None
+        return entry[1]
+
+    def get_mark_price(self, inst_id: str, max_age: float = DEFAULT_MAX_AGE) -> Optional[dict[str, Any]]:
+        """获取未过期的标记价格，不存在或已过期返回 None"""
+        entry = self.mark_prices.get(inst_id)
+        if entry is None or time.monotonic() - entry[0] > max_age:
+            return None
+        return entry[1]
+
+    def get_candles(self, inst_id: str, bar: str) -> list:
+        """
+        获取内存中的K线
+
+        Returns:
+            OKX 格式K线列表，最新在前；没有实时数据时返回空列表
+        """
+        with self._lock:
+            book = self.candles.get((inst_id, bar))
+            if not book:
+                return []
+            return [book[ts] for ts in sorted(book, reverse=True)]
+
+    def invalidate(self):
+        """
+        连接断开时调用
+        断线期间可能丢失推送，清空K线簿避免出现缺口；ticker 依靠有效期自然过期
+        """
+        with self._lock:
+            self.candles.clear()
+
+
+market_book = MarketBook()
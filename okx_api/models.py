@@ -0,0 +1,224 @@
+"""
+OKX 数据模型模块
+将 OKX 返回的字符串字典解析为带类型的记录，供格式化、Agent 工具和分析逻辑复用
+"""
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+
+
+def _float(value: Any, default: float = 0.0) -> float:
+    """将 OKX 返回的字符串数值转为 float，空值返回默认值"""
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    """将 OKX 返回的字符串数值转为 float，空值或非法值返回 None"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
+class Position:
+    """合约持仓"""
+    inst_id: str
+    pos_side: str
+    pos: float
+    avg_px: float
+    upl: float
+    lever: float
+
+    @property
+    def direction(self) -> str:
+        return "long" if self.pos_side == "long" or (self.pos_side == "net" and self.pos > 0) else "short"
+
+    @classmethod
+    def from_okx(cls, data: dict[str, Any]) -> "Position":
+        return cls(
+            inst_id=data.get("instId", ""),
+            pos_side=data.get("posSide", ""),
+            pos=_float(data.get("pos")),
+            avg_px=_float(data.get("avgPx")),
+            upl=_float(data.get("upl")),
+            lever=_float(data.get("lever")),
+        )
+
+
+@dataclass(slots=True)
+class GridStrategy:
+    """合约网格策略"""
+    algo_id: str
+    inst_id: str
+    state: str
+    direction: str
+    lever: float
+    actual_lever: Optional[float]
+    grid_num: int
+    min_px: float
+    max_px: float
+    total_pnl: float
+    float_profit: float
+    grid_profit: float
+    pnl_ratio: float
+    liq_px: Optional[float]
+
+    @classmethod
+    def from_okx(cls, data: dict[str, Any]) -> "GridStrategy":
+        return cls(
+            algo_id=data.get("algoId", ""),
+            inst_id=data.get("instId", ""),
+            state=data.get("state", ""),
+            direction=data.get("direction", ""),
+            lever=_float(data.get("lever")),
+            actual_lever=_optional_float(data.get("actualLever")),
+            grid_num=int(_float(data.get("gridNum"))),
+            min_px=_float(data.get("minPx")),
+            max_px=_float(data.get("maxPx")),
+            total_pnl=_float(data.get("totalPnl")),
+            float_profit=_float(data.get("floatProfit")),
+            grid_profit=_float(data.get("gridProfit")),
+            pnl_ratio=_float(data.get("pnlRatio")),
+            liq_px=_optional_float(data.get("liqPx")),
+        )
+
+
+@dataclass(slots=True)
+class Balance:
+    """账户余额（总权益 + USDT 明细）"""
+    total_eq: float
+    ccy: str = "USDT"
+    cash_bal: float = 0.0
+    avail_bal: float = 0.0
+    frozen_bal: float = 0.0
+
+    @classmethod
+    def from_okx(cls, data: dict[str, Any], ccy: str = "USDT") -> "Balance":
+        balance = cls(total_eq=_float(data.get("totalEq")), ccy=ccy)
+        for detail in data.get("details", []):
+            if detail.get("ccy") == ccy:
+                balance.cash_bal = _float(detail.get("cashBal"))
+                balance.avail_bal = _float(detail.get("availBal"))
+                balance.frozen_bal = _float(detail.get("frozenBal"))
+                break
+        return balance
+
+
+@dataclass(slots=True)
+class CandleBatch:
+    """
+    一批K线（列式数组）
+    ts 为 int64 毫秒时间戳，ohlcv 为 float64 (N, 5)，列顺序 open/high/low/close/volume，按时间升序
+    """
+    inst_id: str
+    bar: str
+    ts: np.ndarray
+    ohlcv: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.ohlcv[:, 0]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.ohlcv[:, 1]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.ohlcv[:, 2]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.ohlcv[:, 3]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.ohlcv[:, 4]
+
+    def tail(self, n: int) -> "CandleBatch":
+        """最近 n 条K线"""
+        return CandleBatch(self.inst_id, self.bar, self.ts[-n:], self.ohlcv[-n:])
+
+
+@dataclass(slots=True)
+class Ticker:
+    """最新行情"""
+    inst_id: str
+    last: float
+    open_24h: float
+    high_24h: Optional[float]
+    low_24h: Optional[float]
+    bid_px: Optional[float]
+    ask_px: Optional[float]
+    vol_24h: Optional[float]
+    mark_px: Optional[float] = None
+
+    @property
+    def change_pct(self) -> float:
+        """24 小时涨跌幅（百分比）"""
+        return (self.last - self.open_24h) / self.open_24h * 100 if self.open_24h > 0 else 0.0
+
+    @classmethod
+    def from_okx(cls, data: dict[str, Any], mark: Optional[dict[str, Any]] = None) -> "Ticker":
+        return cls(
+            inst_id=data.get("instId", ""),
+            last=_float(data.get("last")),
+            open_24h=_float(data.get("open24h")),
+            high_24h=_optional_float(data.get("high24h")),
+            low_24h=_optional_float(data.get("low24h")),
+            bid_px=_optional_float(data.get("bidPx")),
+            ask_px=_optional_float(data.get("askPx")),
+            vol_24h=_optional_float(data.get("vol24h")),
+            mark_px=_optional_float(mark.get("markPx")) if mark else None,
+        )
+
+
+def parse_positions(data: list[dict[str, Any]]) -> list[Position]:
+    """解析持仓列表，只保留非零的永续合约持仓"""
+    positions = []
+    for item in data:
+        if not item.get("instId", "").endswith("SWAP"):
+            continue
+        position = Position.from_okx(item)
+        if position.pos == 0:
+            continue
+        positions.append(position)
+    return positions
+
+
+def parse_grid_strategies(data: list[dict[str, Any]]) -> list[GridStrategy]:
+    """解析网格策略列表"""
+    return [GridStrategy.from_okx(item) for item in data]
+
+
+def parse_balance(data: list[dict[str, Any]]) -> Optional[Balance]:
+    """解析账户余额，无数据时返回 None"""
+    if not data:
+        return None
+    return Balance.from_okx(data[0])
+
+
+@dataclass(slots=True)
+class AccountSnapshot:
+    """
+    账户快照
+    一次刷新中并发拉取的持仓、余额和网格策略
+    """
+    positions: list[Position] = field(default_factory=list)
+    balance: Optional[Balance] = None
+    grids: list[GridStrategy] = field(default_factory=list)
+    fetched_at: float = 0.0
+    # 拉取失败的部分：positions / balance / grids -> 异常
+    errors: dict[str, BaseException] = field(default_factory=dict)
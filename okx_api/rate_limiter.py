@@ -0,0 +1,178 @@
+"""
+OKX 限频模块
+按接口维护令牌桶，交互式请求（Discord 命令、AI 对话）优先于后台任务（定时任务、每日分析）
+
+令牌桶状态用线程锁保护、等待通过 asyncio.sleep 完成，
+因此 Discord 事件循环与同步封装所在的后台事件循环可以共享同一个限频器
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Iterator, Optional
+
+
+class Priority(IntEnum):
+    """请求优先级，数值越小越优先"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# 当前上下文的请求优先级，未设置时视为交互式请求
+current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "okx_request_priority", default=Priority.INTERACTIVE
+)
+
+# OKX 各接口限频：(请求数, 时间窗口秒)
+ENDPOINT_LIMITS: dict[str, tuple[int, float]] = {
+    "/api/v5/account/positions": (10, 2),
+    "/api/v5/account/balance": (10, 2),
+    "/api/v5/tradingBot/grid/orders-algo-pending": (20, 2),
+    "/api/v5/market/candles": (40, 2),
+    "/api/v5/market/history-candles": (20, 2),
+    "/api/v5/market/ticker": (20, 2),
+    "/api/v5/market/tickers": (20, 2),
+    "/api/v5/market/books": (40, 2),
+    "/api/v5/public/instruments": (20, 2),
+    "/api/v5/public/funding-rate": (10, 2),
+}
+DEFAULT_LIMIT = (10, 2)
+
+# 有更高优先级请求排队时，低优先级请求的轮询间隔（秒）
+YIELD_INTERVAL = 0.05
+
+
+class _Bucket:
+    """单个接口的令牌桶及统计"""
+
+    def __init__(self, capacity: int, per_seconds: float):
+        self.capacity = float(capacity)
+        self.rate = capacity / per_seconds
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.waiting = {priority: 0 for priority in Priority}
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class RateLimiter:
+    """
+    按接口的令牌桶限频器
+    """
+
+    def __init__(self, limits: Optional[dict[str, tuple[int, float]]] = None, default_limit: tuple[int, float] = DEFAULT_LIMIT):
+        self.limits = dict(ENDPOINT_LIMITS if limits is None else limits)
+        self.default_limit = default_limit
+        self._buckets: dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, endpoint: str) -> _Bucket:
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            capacity, per_seconds = self.limits.get(endpoint, self.default_limit)
+            bucket = self._buckets.setdefault(endpoint, _Bucket(capacity, per_seconds))
+        return bucket
+
+    async def acquire(self, endpoint: str, priority: Optional[Priority] = None) -> float:
+        """
+        获取一个令牌，必要时等待
+
+        Args:
+            endpoint: 接口路径
+            priority: 请求优先级，默认取当前上下文的优先级
+
+        Returns:
+            本次等待的秒数
+        """
+        if priority is None:
+            priority = current_priority.get()
+
+        start = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            bucket.waiting[priority] += 1
+
+        try:
+            while True:
+                with self._lock:
+                    bucket.refill()
+                    higher_waiting = any(bucket.waiting[p] for p in Priority if p < priority)
+                    if not higher_waiting and bucket.tokens >= 1:
+                        bucket.tokens -= 1
+                        break
+                    if higher_waiting:
+                        delay = YIELD_INTERVAL
+                    else:
+                        delay = (1 - bucket.tokens) / bucket.rate
+                await asyncio.sleep(delay)
+        finally:
+            waited = time.monotonic() - start
+            with self._lock:
+                bucket.waiting[priority] -= 1
+
+        with self._lock:
+            bucket.acquired += 1
+            if waited > 0.001:
+                bucket.delayed += 1
+            bucket.total_wait += waited
+            bucket.max_wait = max(bucket.max_wait, waited)
+        return waited
+
+    def penalize(self, endpoint: str):
+        """
+        收到 429 / 限频错误时调用，清空令牌桶迫使后续请求等待补充
+        """
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            bucket.refill()
+            bucket.tokens = 0.0
+            bucket.throttled += 1
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """
+        获取各接口的排队深度与等待时间统计
+        """
+        with self._lock:
+            result = {}
+            for endpoint, bucket in self._buckets.items():
+                bucket.refill()
+                result[endpoint] = {
+                    "tokens": round(bucket.tokens, 2),
+                    "queue_interactive": bucket.waiting[Priority.INTERACTIVE],
+                    "queue_background": bucket.waiting[Priority.BACKGROUND],
+                    "acquired": bucket.acquired,
+                    "delayed": bucket.delayed,
+                    "throttled": bucket.throttled,
+                    "avg_wait_ms": round(bucket.total_wait / bucket.acquired * 1000, 2) if bucket.acquired else 0.0,
+                    "max_wait_ms": round(bucket.max_wait * 1000, 2),
+                }
+            return result
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """
+    在上下文中设置请求优先级
+
+    用法:
+        with request_priority(Priority.BACKGROUND):
+            await aquery_candlesticks(...)
+    """
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,76 @@
+"""
+账户快照模块
+一次刷新并发拉取持仓、余额和合约网格，解析为带类型的记录供各处共享
+"""
+import asyncio
+import time
+
+from config import OKX_CACHE_TTL_PRIVATE
+
+from .cache import TTLCache
+from .client import BALANCE_PATH, GRID_PENDING_PATH, POSITIONS_PATH, async_okx_client
+from .models import AccountSnapshot, parse_balance, parse_grid_strategies, parse_positions
+
+_snapshot_cache = TTLCache(default_ttl=OKX_CACHE_TTL_PRIVATE, max_entries=1)
+
+
+async def fetch_account_snapshot() -> AccountSnapshot:
+    """
+    并发拉取持仓、余额和运行中的合约网格
+
+    Returns:
+        账户快照；单个部分失败时记录在 errors 中，其余部分照常返回
+    """
+    positions_res, balance_res, grids_res = await asyncio.gather(
+        async_okx_client.get_positions(),
+        async_okx_client.get_account_balance(),
+        async_okx_client.grid_orders_algo_pending(algo_ord_type="contract_grid"),
+        return_exceptions=True,
+    )
+
+    snapshot = AccountSnapshot(fetched_at=time.time())
+
+    if isinstance(positions_res, BaseException):
+        snapshot.errors["positions"] = positions_res
+    else:
+        snapshot.positions = parse_positions(positions_res.get("data", []))
+
+    if isinstance(balance_res, BaseException):
+        snapshot.errors["balance"] = balance_res
+    else:
+        snapshot.balance = parse_balance(balance_res.get("data", []))
+
+    if isinstance(grids_res, BaseException):
+        snapshot.errors["grids"] = grids_res
+    else:
+        snapshot.grids = parse_grid_strategies(grids_res.get("data", []))
+
+    return snapshot
+
+
+async def get_account_snapshot(refresh: bool = False) -> AccountSnapshot:
+    """
+    获取账户快照
+    TTL 内复用上一次刷新的结果，并发调用共享同一次刷新
+
+    Args:
+        refresh: 是否强制刷新（同时失效客户端中持仓、余额、网格接口的缓存）
+
+    Returns:
+        账户快照
+    """
+    if refresh:
+        _snapshot_cache.invalidate()
+        for path in (POSITIONS_PATH, BALANCE_PATH, GRID_PENDING_PATH):
+            async_okx_client.cache.invalidate(path)
+
+    snapshot = await _snapshot_cache.get_or_fetch("account", fetch_account_snapshot, _snapshot_cache.default_ttl)
+    if snapshot.errors:
+        # 部分失败的快照不缓存，下次调用重新拉取
+        _snapshot_cache.invalidate()
+    return snapshot
+
+
+def snapshot_stats() -> dict:
+    """获取快照缓存统计"""
+    return _snapshot_cache.stats()
@@ -1,50 +1,107 @@
 """
 OKX LangChain 工具模块
 将 OKX 操作封装为 LangChain 工具，供 AI Agent 调用
+
+工具均为异步实现：模型在同一步请求多个工具时由 Agent 并发执行，
+每个工具有独立的超时，多工具问题的耗时约等于最慢的一次调用
 """
+import asyncio
+import functools
+from typing import Awaitable, Callable
+
 from langchain_core.tools import tool
 
+from config import TOOL_SCAN_TIMEOUT, TOOL_TIMEOUT
+from .client import OKXAPIError
 from .queries import (
-    query_swap_positions,
-    query_grid_strategies,
-    query_account_balance,
-    query_candlesticks,
+    aquery_swap_positions,
+    aquery_grid_strategies,
+    aquery_account_balance,
+    aquery_candlesticks,
+    aquery_ticker,
+    aquery_portfolio,
 )
-from services.rss_service import fetch_news
+from services.rss_service import afetch_news
+from analysis.memo import format_indicators, get_indicators as aget_indicators
+from analysis.screener import format_scan, scan_text
+
+
+def with_timeout(seconds: float = TOOL_TIMEOUT):
+    """
+    为工具加上超时，超时后返回提示文本而不是抛出异常，不影响同一步的其他工具
+    """
+    def decorator(func: Callable[..., Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> str:
+            try:
+                async with asyncio.timeout(seconds):
+                    return await func(*args, **kwargs)
+            except TimeoutError:
+                print(f"[WARN] 工具 {func.__name__} 超时 ({seconds:g}s)")
+                return f"查询超时（超过 {seconds:g} 秒），请稍后重试"
+        return wrapper
+    return decorator
 
 
 @tool
-def get_swap_positions() -> str:
+@with_timeout()
+async def get_swap_positions() -> str:
     """
     查询当前合约持仓信息。
     返回所有非零的合约持仓详情，包括方向、数量、均价、未实现盈亏、杠杆等。
     当用户询问持仓、仓位、持有合约等信息时使用此工具。
     """
-    return query_swap_positions()
+    try:
+        return await aquery_swap_positions()
+    except OKXAPIError as e:
+        return f"查询失败: {e}"
 
 
 @tool
-def get_grid_strategies() -> str:
+@with_timeout()
+async def get_grid_strategies() -> str:
     """
     查询合约网格策略信息。
     返回所有运行中的合约网格策略详情，包括方向、杠杆、网格区间、盈亏等。
     当用户询问网格策略、网格交易、网格机器人等信息时使用此工具。
     """
-    return query_grid_strategies()
+    try:
+        return await aquery_grid_strategies()
+    except OKXAPIError as e:
+        return f"查询失败: {e}"
 
 
 @tool
-def get_account_balance() -> str:
+@with_timeout()
+async def get_account_balance() -> str:
     """
     查询账户余额信息。
     返回账户的总权益、可用余额等信息。
     当用户询问余额、账户资金、可用金额等信息时使用此工具。
     """
-    return query_account_balance()
+    try:
+        return await aquery_account_balance()
+    except OKXAPIError as e:
+        return f"查询失败: {e}"
 
 
 @tool
-def get_candlesticks(inst_id: str, bar: str = "1H", limit: int = 20) -> str:
+@with_timeout()
+async def get_portfolio() -> str:
+    """
+    查询账户总览。
+    一次性返回账户余额、合约持仓和运行中的合约网格策略。
+    当用户询问账户整体情况、账户表现、"我的账户怎么样"等需要综合多项信息的问题时优先使用此工具。
+    """
+    try:
+        return await aquery_portfolio()
+    except OKXAPIError as e:
+        return f"查询失败: {e}"
+
+
+@tool
+@with_timeout()
+async def get_candlesticks(inst_id: str, bar: str = "1H", limit: int = 20) -> str:
     """
     查询K线数据。
     返回指定交易对的K线数据，包括开盘价、最高价、最低价、收盘价、成交量等。
@@ -55,26 +112,95 @@ def get_candlesticks(inst_id: str, bar: str = "1H", limit: int = 20) -> str:
         bar: K线周期，支持 1m/5m/15m/1H/4H/1D/1W/1M，默认1H
         limit: 返回数量，默认20条
     """
-    return query_candlesticks(inst_id, bar, limit)
+    try:
+        return await aquery_candlesticks(inst_id, bar, limit)
+    except OKXAPIError as e:
+        return f"查询失败: {e}"
+
+
+@tool
+@with_timeout()
+async def get_ticker(inst_id: str) -> str:
+    """
+    查询最新行情。
+    返回指定交易对的最新价、24小时涨跌幅、最高最低价、买卖一价和标记价格。
+    当用户询问当前价格、现价、最新行情等信息时使用此工具。
+
+    Args:
+        inst_id: 产品ID，如 BTC-USDT-SWAP、ETH-USDT-SWAP
+    """
+    try:
+        return await aquery_ticker(inst_id)
+    except OKXAPIError as e:
+        return f"查询失败: {e}"
+
+
+@tool
+@with_timeout()
+async def get_indicators(inst_id: str, bar: str = "1H") -> str:
+    """
+    查询技术指标。
+    返回指定交易对在已收盘K线上的 MA、EMA、RSI、布林带、MACD、ATR 和年化波动率。
+    当用户询问 RSI、均线、布林带、MACD、超买超卖等技术指标时优先使用此工具，而不是自行根据K线计算。
+
+    Args:
+        inst_id: 产品ID，如 BTC-USDT-SWAP、ETH-USDT-SWAP
+        bar: K线周期，支持 1m/5m/15m/1H/4H/1D/1W，默认1H
+    """
+    try:
+        return format_indicators(await aget_indicators(inst_id, bar))
+    except KeyError:
+        return f"不支持的K线周期: {bar}"
+    except OKXAPIError as e:
+        return f"查询失败: {e}"
+
+
+@tool
+@with_timeout(TOOL_SCAN_TIMEOUT)
+async def scan_market(conditions: str, limit: int = 10) -> str:
+    """
+    全市场筛选永续合约。
+    一次评估全部 USDT 永续合约，返回同时满足所有条件的合约及其行情、资金费率和相关指标。
+    当用户询问"哪些币超卖/超买"、"资金费率最高的合约"、"突破布林带的币"等需要跨合约比较的问题时使用此工具。
+
+    Args:
+        conditions: 筛选条件，多个条件用逗号分隔（同时满足）。
+            行情字段: price、change(24h涨跌幅%)、volume(24h成交额USDT)、funding(资金费率%)，如 funding>0.05
+            K线指标: rsi、bb(布林带位置，0=下轨 1=上轨)、ma20(偏离MA20%)、volatility(年化波动率%)，
+            用 @周期 指定周期，如 rsi@4H<30、bb@1H outside、ma20@1D>10
+        limit: 返回数量，默认10条
+    """
+    try:
+        result = await scan_text(conditions, limit=limit)
+        return format_scan(result)
+    except ValueError as e:
+        return f"条件格式错误: {e}"
+    except OKXAPIError as e:
+        return f"查询失败: {e}"
 
 
 @tool
-def get_crypto_news(limit: int = 5) -> str:
+@with_timeout()
+async def get_crypto_news(limit: int = 5) -> str:
     """
     获取加密货币新闻快讯。
-    返回最新的加密货币行业新闻和快讯。
+    返回多个新闻源合并去重后的最新加密货币行业新闻和快讯，按时间倒序。
     当用户询问新闻、快讯、行业动态、最新消息等信息时使用此工具。
 
     Args:
         limit: 返回新闻数量，默认5条
     """
-    return fetch_news(limit=limit)
+    return await afetch_news(limit=limit)
 
 
 OKX_TOOLS = [
     get_swap_positions,
     get_grid_strategies,
     get_account_balance,
+    get_portfolio,
     get_candlesticks,
+    get_ticker,
+    get_indicators,
+    scan_market,
     get_crypto_news,
 ]
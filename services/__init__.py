@@ -1,14 +1,25 @@
 """
 服务模块
 """
-from .ai_service import AIService, ai_service
-from .rss_service import fetch_news, RSS_SOURCES
+from .ai_service import AIService, ChatEvent, ai_service
+from .conversation import ConversationStore, conversation_store
+from .intent_router import IntentRouter, intent_router
+from .market_data_service import MarketDataService, market_data_service
+from .rss_service import fetch_news, afetch_news, RSS_SOURCES
 from .scheduler_service import SchedulerService, scheduler_service, ScheduledTask
 
 __all__ = [
     "AIService",
+    "ChatEvent",
     "ai_service",
+    "ConversationStore",
+    "conversation_store",
+    "IntentRouter",
+    "intent_router",
+    "MarketDataService",
+    "market_data_service",
     "fetch_news",
+    "afetch_news",
     "RSS_SOURCES",
     "SchedulerService",
     "scheduler_service",
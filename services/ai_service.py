@@ -6,15 +6,21 @@ AI 服务模块
 """
 import json
 import re
-from typing import Any, Optional
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
 
 from pydantic import SecretStr
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage, BaseMessage, AIMessage
+from langchain_core.messages import HumanMessage, SystemMessage, BaseMessage, AIMessage, AIMessageChunk, ToolMessage
 from langchain.agents import create_agent
 
 from config import LLM_BASE_URL, LLM_API_KEY, LLM_MODEL
 from okx_api.tools import OKX_TOOLS
+from .llm_queue import SYSTEM_USER, LLMQueueError, PositionCallback, llm_queue
+
+
+class ScheduleAnalysisError(Exception):
+    """定时任务判断失败（与 "不是定时任务" 区分）"""
 
 
 # 系统提示词
@@ -24,10 +30,15 @@ SYSTEM_PROMPT = """你是一个专业的加密货币交易助手，有敏锐的
 1. get_swap_positions - 查询合约持仓信息
 2. get_grid_strategies - 查询网格策略
 3. get_account_balance - 查询账户余额
-4. get_candlesticks - 查询K线数据，需要提供产品ID(如BTC-USDT-SWAP)、周期(如1H/4H/1D)、k线数量
-5. get_crypto_news - 获取加密货币新闻快讯，当用户询问新闻、快讯、行业动态时使用
+4. get_portfolio - 查询账户总览（余额 + 持仓 + 网格一次返回），综合性的账户问题优先使用
+5. get_candlesticks - 查询K线数据，需要提供产品ID(如BTC-USDT-SWAP)、周期(如1H/4H/1D)、k线数量
+6. get_ticker - 查询最新行情，需要提供产品ID(如BTC-USDT-SWAP)
+7. get_indicators - 查询技术指标（MA/EMA/RSI/布林带/MACD/ATR/波动率），需要提供产品ID和周期
+8. scan_market - 全市场筛选永续合约，条件如 rsi@4H<30, bb@4H outside, funding>0.05，跨合约比较时使用
+9. get_crypto_news - 获取加密货币新闻快讯，当用户询问新闻、快讯、行业动态时使用
 
-当用户询问持仓、网格策略、余额、K线行情、新闻快讯等信息时，请调用相应的工具获取实时数据。
+当用户询问持仓、网格策略、余额、K线行情、最新价格、新闻快讯等信息时，请调用相应的工具获取实时数据。
+需要多项数据时，请在同一步中一次性调用所有需要的工具（它们会并发执行），不要逐个等待结果后再调用下一个。
 
 请用中文回复，保持简洁专业。如果用户的问题与交易无关，请礼貌地说明你只能帮助处理交易相关的问题。
 """
@@ -66,6 +77,12 @@ SCHEDULE_TASK_PROMPT = """你是一个定时任务分析助手。你的任务是
 4. **重要**: print() 语句中的字符串如果包含换行，必须使用三引号 包裹，并在字符串前加 f 前缀
 5. script 中的 print() 内容就是推送给用户的最终结果
 
+## 技术指标
+脚本需要 MA/EMA/RSI/布林带时，不要自己拉K线计算，直接读取本地流式指标（调度器会在执行前更新到最新K线）：
+from analysis.streaming import read_indicators
+v = read_indicators("BTC-USDT-SWAP", "1H")  # 周期: 1m/5m/15m/1H/4H/1D，没有数据时返回 None
+可用字段: close, ma5, ma10, ma20, ema12, ema26, rsi, rsi_wilder, bb_upper, bb_middle, bb_lower（不足时为 None）
+
 ## 条件提醒 (重要!)
 如果用户要求"满足条件时提醒"、"超过阈值时通知"等条件提醒：
 - 脚本需要自己判断条件是否满足
@@ -124,6 +141,21 @@ SCHEDULE_TASK_PROMPT = """你是一个定时任务分析助手。你的任务是
 """
 
 
+@dataclass(slots=True)
+class ChatEvent:
+    """
+    流式对话事件
+
+    kind:
+        token: 模型输出的文本增量
+        tool_start: 模型开始调用工具，text 为工具名
+        tool_end: 工具返回结果，text 为工具名
+        error: 处理失败，text 为错误信息
+    """
+    kind: str
+    text: str = ""
+
+
 class AIService:
     """
     AI 服务类
@@ -191,16 +223,27 @@ class AIService:
             pass
         return None
 
-    async def analyze_schedule_task(self, user_input: str) -> Optional[dict[str, Any]]:
+    async def analyze_schedule_task(
+        self,
+        user_input: str,
+        user_id: str = SYSTEM_USER,
+        on_position: Optional[PositionCallback] = None,
+    ) -> Optional[dict[str, Any]]:
         """
         分析用户输入是否为定时任务请求
 
         Args:
             user_input: 用户输入
+            user_id: 发起请求的用户，用于 LLM 请求队列的公平调度
+            on_position: 排队位置回调
 
         Returns:
             如果是定时任务，返回包含 schedule, script, task_name 的字典
             如果不是定时任务，返回 None
+
+        Raises:
+            LLMQueueError: 请求队列已满或排队超时
+            ScheduleAnalysisError: 请求失败、超时或返回内容无法解析（无法判断是否为定时任务）
         """
         messages = [
             SystemMessage(content=SCHEDULE_TASK_PROMPT),
@@ -208,12 +251,15 @@ class AIService:
         ]
 
         try:
-            response = await self.llm.ainvoke(messages)
+            async with llm_queue.slot(user_id, on_position):
+                response = await self.llm.ainvoke(messages)
             content = response.content
 
             result = self._parse_schedule_result(content)
+            if result is None:
+                raise ScheduleAnalysisError(f"无法解析的返回内容: {str(content)[:100]}")
 
-            if result and result.get("is_schedule_task") is True:
+            if result.get("is_schedule_task") is True:
                 return {
                     "schedule": result.get("schedule"),
                     "script": result.get("script"),
@@ -222,9 +268,10 @@ class AIService:
 
             return None
 
+        except (LLMQueueError, ScheduleAnalysisError):
+            raise
         except Exception as e:
-            print(f"[ERROR] 分析定时任务失败: {e}")
-            return None
+            raise ScheduleAnalysisError(str(e) or type(e).__name__) from e
 
     FIX_SCRIPT_PROMPT = """你是一个 Python 脚本修复助手。
 
@@ -247,7 +294,20 @@ class AIService:
 - script 中使用单引号 ' 包裹字符串，内部使用双引号 "
 """
 
-    async def fix_script(self, original_script: str, error_message: str, user_request: str) -> Optional[dict[str, Any]]:
+    SUMMARIZE_PROMPT = """你负责压缩交易助手与用户的对话记录。
+把已有摘要与新的对话合并成一份新的摘要：
+- 保留用户关注的币种、持仓与策略、交易偏好、已经给出的结论和尚未解决的问题
+- 省略寒暄、重复内容和具体的K线 / 指标数值
+- 使用中文，不超过 200 字，只输出摘要本身
+"""
+
+    async def fix_script(
+        self,
+        original_script: str,
+        error_message: str,
+        user_request: str,
+        user_id: str = SYSTEM_USER,
+    ) -> Optional[dict[str, Any]]:
         """
         修复脚本
 
@@ -255,6 +315,7 @@ class AIService:
             original_script: 原始脚本
             error_message: 错误信息
             user_request: 用户原始请求
+            user_id: 发起请求的用户
 
         Returns:
             修复后的脚本信息
@@ -270,7 +331,8 @@ class AIService:
         ]
 
         try:
-            response = await self.llm.ainvoke(messages)
+            async with llm_queue.slot(user_id):
+                response = await self.llm.ainvoke(messages)
             content = response.content
 
             json_match = re.search(r"\{[\s\S]*\}", content)
@@ -287,18 +349,35 @@ class AIService:
             print(f"[ERROR] 修复脚本失败: {e}")
             return None
 
-    async def chat(self, user_input: str, chat_history: list | None = None) -> str:
+    async def summarize_conversation(self, summary: str, messages: list[dict[str, str]], user_id: str = SYSTEM_USER) -> str:
         """
-        与 AI 进行对话 (异步方法)
+        把早期对话折叠进滚动摘要
 
         Args:
-            user_input: 用户输入
-            chat_history: 对话历史 (可选)
+            summary: 已有摘要
+            messages: 需要折叠的消息
+            user_id: 发起请求的用户
 
         Returns:
-            AI 回复内容
+            新摘要
         """
-        messages: list[BaseMessage] = [SystemMessage(content=SYSTEM_PROMPT)]
+        dialogue = "\n".join(
+            f"{'用户' if m['role'] == 'user' else '助手'}: {m['content']}" for m in messages
+        )
+        prompt = [
+            SystemMessage(content=self.SUMMARIZE_PROMPT),
+            HumanMessage(content=f"已有摘要:\n{summary or '无'}\n\n新的对话:\n{dialogue}"),
+        ]
+        async with llm_queue.slot(user_id):
+            response = await self.llm.ainvoke(prompt)
+        return str(response.content).strip()
+
+    def _build_messages(self, user_input: str, chat_history: list | None = None) -> list[BaseMessage]:
+        """
+        组装系统提示词、对话历史与本轮输入
+        """
+        system_prompt = SYSTEM_PROMPT
+        messages: list[BaseMessage] = []
 
         if chat_history:
             for msg in chat_history:
@@ -306,20 +385,91 @@ class AIService:
                 content = msg.get("content", "")
                 if role == "user":
                     messages.append(HumanMessage(content=content))
+                elif role == "system":
+                    # 对话摘要并入系统提示词，部分模型只接受开头的一条系统消息
+                    system_prompt += f"\n\n{content}"
                 elif role == "assistant":
                     messages.append(AIMessage(content=content))
 
         messages.append(HumanMessage(content=user_input))
+        return [SystemMessage(content=system_prompt), *messages]
+
+    async def chat(
+        self,
+        user_input: str,
+        chat_history: list | None = None,
+        user_id: str = SYSTEM_USER,
+        on_position: Optional[PositionCallback] = None,
+    ) -> str:
+        """
+        与 AI 进行对话 (异步方法)
+
+        Args:
+            user_input: 用户输入
+            chat_history: 对话历史 (可选)
+            user_id: 发起请求的用户，用于 LLM 请求队列的公平调度
+            on_position: 排队位置回调
+
+        Returns:
+            AI 回复内容
+        """
+        messages = self._build_messages(user_input, chat_history)
 
         try:
-            result = await self.agent.ainvoke({"messages": messages})
+            async with llm_queue.slot(user_id, on_position):
+                result = await self.agent.ainvoke({"messages": messages})
             output_messages = result.get("messages", [])
             if output_messages:
                 last_message = output_messages[-1]
                 return last_message.content
             return "抱歉，我无法处理您的请求。"
+        except LLMQueueError as e:
+            return f"当前请求较多，请稍后再试（{e}）"
+        except TimeoutError:
+            return "处理请求超时，请稍后再试"
         except Exception as e:
             return f"处理请求时出错: {str(e)}"
 
+    async def chat_stream(
+        self,
+        user_input: str,
+        chat_history: list | None = None,
+        user_id: str = SYSTEM_USER,
+        on_position: Optional[PositionCallback] = None,
+    ) -> AsyncIterator[ChatEvent]:
+        """
+        与 AI 进行对话 (流式)
+        逐个产出模型的文本增量与工具调用事件，调用方可以边生成边展示
+
+        Args:
+            user_input: 用户输入
+            chat_history: 对话历史 (可选)
+            user_id: 发起请求的用户，用于 LLM 请求队列的公平调度
+            on_position: 排队位置回调
+
+        Yields:
+            对话事件；出错时产出一个 error 事件后结束
+        """
+        messages = self._build_messages(user_input, chat_history)
+
+        try:
+            async with llm_queue.slot(user_id, on_position):
+                async for chunk, _ in self.agent.astream({"messages": messages}, stream_mode="messages"):
+                    if isinstance(chunk, AIMessageChunk):
+                        for tool_call in chunk.tool_call_chunks:
+                            # 工具调用参数分多个块到达，只有第一个块带工具名
+                            if tool_call.get("name"):
+                                yield ChatEvent("tool_start", tool_call["name"])
+                        if chunk.text:
+                            yield ChatEvent("token", chunk.text)
+                    elif isinstance(chunk, ToolMessage):
+                        yield ChatEvent("tool_end", chunk.name or "")
+        except LLMQueueError as e:
+            yield ChatEvent("error", f"当前请求较多，请稍后再试（{e}）")
+        except TimeoutError:
+            yield ChatEvent("error", "处理请求超时，请稍后再试")
+        except Exception as e:
+            yield ChatEvent("error", f"处理请求时出错: {str(e)}")
+
 
 ai_service = AIService()
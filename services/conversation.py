@@ -0,0 +1,268 @@
+"""
+对话记忆模块
+按用户保存 AI 对话上下文，以 token 数而不是消息条数控制长度：
+- 单条过长的消息（如工具返回的K线表格）入库时截断，不再每轮重复发送给 LLM
+- 超出单个用户的 token 预算时，最早的若干轮对话折叠进滚动摘要，只保留最近几轮原文
+- 所有用户的总 token 数超出上限时，按最近使用顺序 (LRU) 淘汰最久未活跃的用户
+- 可选落盘，重启后恢复上下文
+"""
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from config import CONVERSATION_MAX_TOKENS, CONVERSATION_PERSIST, CONVERSATION_TOTAL_MAX_TOKENS
+
+CONVERSATION_FILE = Path(__file__).parent.parent / "data" / "conversations.json"
+
+# 单条消息保留的 token 上限，超出时保留首尾
+MESSAGE_MAX_TOKENS = 600
+
+# 折叠时至少保留的最近消息条数（一问一答为 2 条）
+KEEP_RECENT_MESSAGES = 4
+
+# 摘要的 token 上限
+SUMMARY_MAX_TOKENS = 400
+
+# 超出预算后折叠到预算的这一比例，避免之后每轮都要重新摘要
+FOLD_TARGET_RATIO = 0.5
+
+# 中日韩字符及全角标点按 1 token 计，其余字符约 4 个计 1 token
+CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+# 摘要函数：(旧摘要, 需要折叠的消息, 用户ID) -> 新摘要
+Summarizer = Callable[[str, list[dict[str, str]], str], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数（不依赖分词器）"""
+    if not text:
+        return 0
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """超出 token 上限时保留开头与结尾，中间替换为省略标记"""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep = int(len(text) * max_tokens / tokens)
+    head, tail = text[:keep * 2 // 3], text[len(text) - keep // 3:]
+    return f"{head}\n…（已省略 {len(text) - len(head) - len(tail)} 字）…\n{tail}"
+
+
+def extractive_summary(summary: str, messages: list[dict[str, str]], max_tokens: int = SUMMARY_MAX_TOKENS) -> str:
+    """
+    本地摘要：每条消息只保留第一行的开头，超出上限时丢弃最早的部分
+    在没有配置 LLM 摘要或 LLM 摘要失败时使用
+    """
+    lines = [summary] if summary else []
+    for message in messages:
+        first_line = message["content"].strip().split("\n", 1)[0][:80]
+        speaker = "用户" if message["role"] == "user" else "助手"
+        lines.append(f"{speaker}: {first_line}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return truncate_tokens("\n".join(lines), max_tokens)
+
+
+@dataclass
+class Conversation:
+    """单个用户的对话上下文"""
+    user_id: str
+    summary: str = ""
+    messages: list[dict[str, str]] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.time)
+    folded: int = 0  # 已折叠进摘要的消息数
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(m["content"]) for m in self.messages)
+
+    def history(self) -> list[dict[str, str]]:
+        """发送给 LLM 的对话历史，摘要作为第一条 system 消息"""
+        history = []
+        if self.summary:
+            history.append({"role": "system", "content": f"以下是与该用户更早对话的摘要:\n{self.summary}"})
+        return history + self.messages
+
+
+class ConversationStore:
+    """
+    对话记忆存储
+    使用单例模式确保全局唯一实例
+    """
+
+    _instance: Optional["ConversationStore"] = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(
+        self,
+        max_tokens: int = CONVERSATION_MAX_TOKENS,
+        total_max_tokens: int = CONVERSATION_TOTAL_MAX_TOKENS,
+        path: Optional[Path] = CONVERSATION_FILE if CONVERSATION_PERSIST else None,
+    ):
+        if self._initialized:
+            return
+
+        self.max_tokens = max_tokens
+        self.total_max_tokens = total_max_tokens
+        self.path = path
+        self.summarizer: Optional[Summarizer] = None
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._tokens: dict[str, int] = {}
+        self.total_tokens = 0
+        self.evictions = 0
+        self.summaries = 0
+        self._load()
+        self._initialized = True
+
+    def set_summarizer(self, summarizer: Summarizer):
+        """
+        设置摘要函数
+        参数: (旧摘要, 需要折叠的消息, 用户ID)，返回新摘要；未设置或失败时使用本地摘要
+        """
+        self.summarizer = summarizer
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for item in sorted(data.get("conversations", []), key=lambda c: c.get("updated_at", 0)):
+                conversation = Conversation(**item)
+                self._conversations[conversation.user_id] = conversation
+                self._account(conversation)
+        except (json.JSONDecodeError, OSError, TypeError, KeyError) as e:
+            print(f"[ERROR] 加载对话记忆失败: {e}")
+        self._evict()
+
+    def _save(self):
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_suffix(".tmp")
+            payload = {"conversations": [asdict(c) for c in self._conversations.values()]}
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_file, self.path)
+        except OSError as e:
+            print(f"[WARN] 保存对话记忆失败: {e}")
+
+    def _account(self, conversation: Conversation):
+        """重新统计某个用户的 token 数"""
+        tokens = conversation.tokens
+        self.total_tokens += tokens - self._tokens.get(conversation.user_id, 0)
+        self._tokens[conversation.user_id] = tokens
+
+    def _evict(self, keep: Optional[str] = None):
+        """总量超出上限时淘汰最久未活跃的用户（不淘汰当前用户）"""
+        while self.total_tokens > self.total_max_tokens and len(self._conversations) > 1:
+            user_id = next(iter(self._conversations))
+            if user_id == keep:
+                self._conversations.move_to_end(user_id)
+                user_id = next(iter(self._conversations))
+            self._conversations.pop(user_id)
+            self.total_tokens -= self._tokens.pop(user_id, 0)
+            self.evictions += 1
+
+    def history(self, user_id: str) -> list[dict[str, str]]:
+        """
+        获取用户的对话历史（摘要 + 最近消息），并标记为最近使用
+
+        Returns:
+            [{"role": "system" | "user" | "assistant", "content": str}, ...]
+        """
+        conversation = self._conversations.get(user_id)
+        if conversation is None:
+            return []
+        self._conversations.move_to_end(user_id)
+        return conversation.history()
+
+    async def add_turn(self, user_id: str, user_input: str, response: str):
+        """
+        记录一轮对话，超出预算时折叠最早的消息到摘要，并按总量淘汰其他用户
+
+        Args:
+            user_id: 用户ID
+            user_input: 用户输入
+            response: AI 回复
+        """
+        conversation = self._conversations.get(user_id)
+        if conversation is None:
+            conversation = self._conversations[user_id] = Conversation(user_id)
+        self._conversations.move_to_end(user_id)
+
+        conversation.messages.append({"role": "user", "content": truncate_tokens(user_input, MESSAGE_MAX_TOKENS)})
+        conversation.messages.append({"role": "assistant", "content": truncate_tokens(response, MESSAGE_MAX_TOKENS)})
+        conversation.updated_at = time.time()
+
+        if conversation.tokens > self.max_tokens:
+            await self._fold(conversation)
+
+        self._account(conversation)
+        self._evict(keep=user_id)
+        self._save()
+
+    async def _fold(self, conversation: Conversation):
+        """把最早的若干轮对话折叠进摘要，直到降到预算的 FOLD_TARGET_RATIO 以内或只剩最近几条"""
+        fold: list[dict[str, str]] = []
+        tokens = conversation.tokens
+        target = self.max_tokens * FOLD_TARGET_RATIO
+        while tokens > target and len(conversation.messages) > KEEP_RECENT_MESSAGES:
+            # 按一问一答成对折叠
+            for message in conversation.messages[:2]:
+                tokens -= estimate_tokens(message["content"])
+            fold.extend(conversation.messages[:2])
+            del conversation.messages[:2]
+        if not fold:
+            return
+
+        summary = None
+        if self.summarizer is not None:
+            try:
+                summary = truncate_tokens(await self.summarizer(conversation.summary, fold, conversation.user_id), SUMMARY_MAX_TOKENS)
+            except Exception as e:
+                print(f"[WARN] 对话摘要失败，使用本地摘要: {e}")
+        if not summary:
+            summary = extractive_summary(conversation.summary, fold)
+
+        conversation.summary = summary
+        conversation.folded += len(fold)
+        self.summaries += 1
+        print(f"[INFO] 用户 {conversation.user_id} 的 {len(fold)} 条早期消息已折叠进摘要")
+
+    def clear(self, user_id: str) -> bool:
+        """清除用户的对话记忆，返回是否存在"""
+        if self._conversations.pop(user_id, None) is None:
+            return False
+        self.total_tokens -= self._tokens.pop(user_id, 0)
+        self._save()
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        """记忆占用统计"""
+        return {
+            "users": len(self._conversations),
+            "total_tokens": self.total_tokens,
+            "total_max_tokens": self.total_max_tokens,
+            "max_tokens": self.max_tokens,
+            "summaries": self.summaries,
+            "evictions": self.evictions,
+            "persist": self.path is not None,
+        }
+
+
+conversation_store = ConversationStore()
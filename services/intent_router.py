@@ -0,0 +1,337 @@
+"""
+意图路由模块
+在调用 LLM 判断定时任务之前做本地预分类，明显的普通对话直接进入 AI 聊天，省掉一次 LLM 往返
+
+1. 规则：命中 "每天 / 每小时 / 每隔 N 分钟 / 定时 / 提醒我 / Cron 表达式" 等周期性表达时交给 LLM 生成任务
+2. 模型：字符 1-2 gram 的朴素贝叶斯分类器，内置种子样本训练，LLM 每次判定的结果作为新样本持续学习
+   （样本包含用户原文，默认只保存在内存中；开启 INTENT_SAMPLE_PERSIST 后才写入 samples.jsonl）
+3. 规则未命中且模型认为定时任务概率足够低时判为普通对话，其余情况仍由 LLM 判断
+
+每次路由决策写入日志文件（只记录路由结果，不含用户原文，超过大小上限时轮转），stats() 汇总节省的 LLM 调用次数
+"""
+import json
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from config import INTENT_SAMPLE_PERSIST
+
+INTENT_DATA_DIR = Path(__file__).parent.parent / "data" / "intent"
+INTENT_SAMPLE_FILE = INTENT_DATA_DIR / "samples.jsonl"
+INTENT_LOG_FILE = INTENT_DATA_DIR / "decisions.jsonl"
+
+# 路由结果
+ROUTE_SCHEDULE = "schedule"    # 规则命中，交给 LLM 生成定时任务
+ROUTE_CHAT = "chat"            # 判为普通对话，跳过定时任务判断
+ROUTE_AMBIGUOUS = "ambiguous"  # 无法确定，交给 LLM 判断
+
+# 模型给出的定时任务概率低于该值时直接判为普通对话
+CHAT_THRESHOLD = 0.2
+
+# 持续学习保留的样本数
+MAX_LEARNED_SAMPLES = 2000
+
+# 决策日志的大小上限，超出时轮转为 decisions.jsonl.1（只保留一份）
+MAX_LOG_BYTES = 1024 * 1024
+
+# 周期性 / 触发式表达
+SCHEDULE_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"每(?:天|日|周|星期|月|年|小时|分钟|隔|晚|早|个?交易日|逢)",
+        r"每\s*\d+\s*(?:秒|分钟?|小时|个小时|天|周)",
+        r"(?:早上|上午|中午|下午|晚上|凌晨)?\s*\d{1,2}\s*(?:点|:\d{2})\S{0,6}(?:提醒|通知|推送|发|查询|告诉)",
+        r"定时|定期|周期性|计划任务",
+        r"(?:提醒|通知|告诉|推送给?)我",
+        r"(?:涨|跌|突破|跌破|超过|低于|高于|达到|到了).{0,20}(?:提醒|通知|告诉|推送)",
+        r"(?:^|\s)[\d*/,\-]+\s+[\d*/,\-]+\s+[\d*/,\-?]+\s+[\d*/,\-]+\s+[\d*/,\-?]+(?:\s|$)",
+        r"\bevery\s+(?:\d+\s+)?(?:day|hour|minute|week|morning|night|\w+day)s?\b",
+        r"\b(?:remind|notify|alert)\s+me\b",
+        r"\b(?:daily|hourly|weekly|cron|schedule)\b",
+    )
+]
+
+# 种子样本：(文本, 是否定时任务)
+SEED_SAMPLES: list[tuple[str, bool]] = [
+    ("每天早上 8 点查询 BTC 价格", True),
+    ("每小时提醒我看行情", True),
+    ("每隔 30 分钟检查一下 ETH 资金费率", True),
+    ("BTC 跌破 60000 的时候提醒我", True),
+    ("每周一早上推送一下持仓情况", True),
+    ("帮我设置一个定时任务，每天晚上 10 点汇报余额", True),
+    ("ETH 涨到 4000 通知我一次", True),
+    ("每 5 分钟监控 SOL 价格，超过 200 就告诉我", True),
+    ("定期把网格收益发给我", True),
+    ("每天 9 点给我发一份市场日报", True),
+    ("资金费率超过 0.1% 的时候提醒我", True),
+    ("以后每天收盘后推送 BTC 的 RSI", True),
+    ("remind me every hour to check BTC", True),
+    ("send me the ETH price every morning", True),
+    ("明天早上 9 点提醒我看盘", True),
+    ("每隔两小时汇报一次持仓", True),
+    ("今晚 12 点帮我查一下资金费率并推送", True),
+    ("以后收盘的时候都发我一下日线 RSI", True),
+    ("BTC 4H RSI 低于 30 时通知我", True),
+    ("每周五下午统计一下这周网格收益", True),
+    ("帮我查一下当前 BTC 价格", False),
+    ("我的持仓怎么样", False),
+    ("现在账户余额多少", False),
+    ("BTC 4 小时 RSI 是多少", False),
+    ("最近有什么新闻", False),
+    ("帮我看看网格策略的收益", False),
+    ("ETH 现在适合做多吗", False),
+    ("分析一下 SOL 的走势", False),
+    ("筛选一下 RSI 低于 30 的币", False),
+    ("昨天 BTC 为什么跌了", False),
+    ("布林带是什么意思", False),
+    ("我的网格还在运行吗", False),
+    ("给我讲讲资金费率", False),
+    ("今天行情怎么样", False),
+    ("what is the BTC price now", False),
+    ("show my positions", False),
+    ("你好", False),
+    ("在吗", False),
+    ("谢谢", False),
+    ("帮我看看 ETH 1H 的 MACD", False),
+    ("BTC 15m K线给我看看", False),
+    ("查一下 SOL-USDT-SWAP 最近 100 根 4H K线", False),
+    ("BTC 日线 MA20 在哪里", False),
+    ("OP 的资金费率现在多少", False),
+    ("我的 BTC 多单盈亏多少", False),
+    ("ETH 网格区间 3000 到 4000 合适吗", False),
+    ("3 倍杠杆做多风险大吗", False),
+    ("为什么 RSI 超过 70 算超买", False),
+    ("帮我总结一下今天的新闻", False),
+    ("账户里还有多少 USDT", False),
+    ("DOGE 和 SHIB 哪个波动大", False),
+    ("hello", False),
+    ("explain bollinger bands", False),
+    ("how much BTC do I hold", False),
+]
+
+
+@dataclass(slots=True)
+class RouteDecision:
+    """一次路由决策"""
+    route: str
+    reason: str
+    probability: float  # 模型估计的定时任务概率
+
+    @property
+    def needs_llm(self) -> bool:
+        return self.route != ROUTE_CHAT
+
+
+def normalize(text: str) -> str:
+    """全角转半角、转小写，数字统一为 0，合并空白"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"\d+(?:\.\d+)?", "0", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def features(text: str) -> Counter:
+    """字符 unigram + bigram 特征"""
+    text = normalize(text)
+    grams = Counter(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    grams.pop(" ", None)
+    return grams
+
+
+class NaiveBayes:
+    """
+    二分类多项式朴素贝叶斯（拉普拉斯平滑），支持增量学习
+    """
+
+    def __init__(self):
+        self.counts = {True: Counter(), False: Counter()}
+        self.totals = {True: 0, False: 0}
+        self.docs = {True: 0, False: 0}
+        self.vocab: set[str] = set()
+
+    def learn(self, text: str, label: bool):
+        grams = features(text)
+        self.counts[label].update(grams)
+        self.totals[label] += sum(grams.values())
+        self.docs[label] += 1
+        self.vocab.update(grams)
+
+    def probability(self, text: str) -> float:
+        """定时任务的后验概率"""
+        if not self.docs[True] or not self.docs[False]:
+            return 0.5
+        grams = features(text)
+        vocab = len(self.vocab) + 1
+        log_odds = math.log(self.docs[True] / self.docs[False])
+        for gram, n in grams.items():
+            p_true = (self.counts[True][gram] + 1) / (self.totals[True] + vocab)
+            p_false = (self.counts[False][gram] + 1) / (self.totals[False] + vocab)
+            log_odds += n * math.log(p_true / p_false)
+        return 1 / (1 + math.exp(-max(-50.0, min(50.0, log_odds))))
+
+
+class IntentRouter:
+    """
+    定时任务意图路由器
+    使用单例模式确保全局唯一实例
+    """
+
+    _instance: Optional["IntentRouter"] = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(
+        self,
+        data_dir: Path = INTENT_DATA_DIR,
+        threshold: float = CHAT_THRESHOLD,
+        persist_samples: bool = INTENT_SAMPLE_PERSIST,
+    ):
+        if self._initialized:
+            return
+
+        # 样本含用户原文，未开启持久化时不读写样本文件
+        self.sample_file: Optional[Path] = data_dir / INTENT_SAMPLE_FILE.name if persist_samples else None
+        self.log_file = data_dir / INTENT_LOG_FILE.name
+        self.threshold = threshold
+        self.model = NaiveBayes()
+        self.learned: list[tuple[str, bool]] = []
+        self._sample_lines = 0
+        self.counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+        for text, label in SEED_SAMPLES:
+            self.model.learn(text, label)
+        self._load_samples()
+        self._initialized = True
+
+    def _load_samples(self):
+        if self.sample_file is None or not self.sample_file.exists():
+            return
+        try:
+            with open(self.sample_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        data = json.loads(line)
+                        self.learned.append((data["text"], bool(data["schedule"])))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError as e:
+            print(f"[WARN] 加载意图样本失败: {e}")
+            return
+
+        self._sample_lines = len(self.learned)
+        if len(self.learned) > MAX_LEARNED_SAMPLES:
+            self.learned = self.learned[-MAX_LEARNED_SAMPLES:]
+            self._compact_samples()
+        for text, label in self.learned:
+            self.model.learn(text, label)
+
+    def _compact_samples(self):
+        """只保留最近的样本并重写样本文件"""
+        if self.sample_file is None:
+            return
+        tmp_file = self.sample_file.with_suffix(".tmp")
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                for text, label in self.learned:
+                    f.write(json.dumps({"text": text, "schedule": label}, ensure_ascii=False) + "\n")
+            tmp_file.replace(self.sample_file)
+            self._sample_lines = len(self.learned)
+        except OSError as e:
+            print(f"[WARN] 压缩意图样本失败: {e}")
+
+    def _append(self, path: Path, record: dict[str, Any]):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[WARN] 写入意图路由记录失败: {e}")
+
+    def _log(self, record: dict[str, Any]):
+        """写入决策日志，超过大小上限时轮转"""
+        try:
+            if self.log_file.stat().st_size >= MAX_LOG_BYTES:
+                self.log_file.replace(self.log_file.with_name(self.log_file.name + ".1"))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[WARN] 轮转意图路由日志失败: {e}")
+        self._append(self.log_file, {"time": time.time(), **record})
+
+    def route(self, text: str) -> RouteDecision:
+        """
+        预分类用户输入
+
+        Returns:
+            路由决策；needs_llm 为 False 时可以跳过定时任务判断
+        """
+        probability = self.model.probability(text)
+        for pattern in SCHEDULE_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                decision = RouteDecision(ROUTE_SCHEDULE, f"规则: {match.group().strip()}", probability)
+                break
+        else:
+            if probability < self.threshold:
+                decision = RouteDecision(ROUTE_CHAT, "模型", probability)
+            else:
+                decision = RouteDecision(ROUTE_AMBIGUOUS, "模型", probability)
+
+        with self._lock:
+            self.counters[decision.route] += 1
+        print(f"[INFO] 意图路由: {decision.route} ({decision.reason}, p={probability:.2f})")
+        self._log({"route": decision.route, "probability": round(probability, 4)})
+        return decision
+
+    def record_llm_result(self, text: str, decision: RouteDecision, is_schedule: bool):
+        """
+        记录 LLM 的判定结果：写入决策日志，并作为样本继续训练模型（开启持久化时同时写入样本文件）
+        """
+        with self._lock:
+            self.counters["llm_schedule" if is_schedule else "llm_chat"] += 1
+            if decision.route == ROUTE_SCHEDULE and not is_schedule:
+                self.counters["rule_false_positive"] += 1
+            self.model.learn(text, is_schedule)
+            self.learned.append((text, is_schedule))
+            if len(self.learned) > MAX_LEARNED_SAMPLES:
+                self.learned = self.learned[-MAX_LEARNED_SAMPLES:]
+
+            if self.sample_file is not None:
+                self._append(self.sample_file, {"text": text, "schedule": is_schedule})
+                self._sample_lines += 1
+                # 文件中的样本数达到上限的两倍时重写，避免样本文件在两次重启之间无限增长
+                if self._sample_lines > 2 * MAX_LEARNED_SAMPLES:
+                    self._compact_samples()
+
+        self._log({"route": decision.route, "llm_schedule": is_schedule})
+
+    def stats(self) -> dict[str, Any]:
+        """路由统计：跳过的 LLM 调用次数即 chat 路由次数"""
+        with self._lock:
+            total = sum(self.counters[r] for r in (ROUTE_SCHEDULE, ROUTE_CHAT, ROUTE_AMBIGUOUS))
+            return {
+                "total": total,
+                "schedule": self.counters[ROUTE_SCHEDULE],
+                "chat": self.counters[ROUTE_CHAT],
+                "ambiguous": self.counters[ROUTE_AMBIGUOUS],
+                "llm_schedule": self.counters["llm_schedule"],
+                "llm_chat": self.counters["llm_chat"],
+                "rule_false_positive": self.counters["rule_false_positive"],
+                "saved_ratio": self.counters[ROUTE_CHAT] / total if total else 0.0,
+                "samples": len(SEED_SAMPLES) + len(self.learned),
+                "persist_samples": self.sample_file is not None,
+            }
+
+
+intent_router = IntentRouter()
@@ -0,0 +1,276 @@
+"""
+LLM 请求队列模块
+在 AI 服务前做并发控制：全局同时进行的请求数与单个用户的并发数都有上限，
+排队的请求按用户轮转 (round-robin) 放行，一个用户连续发起的大量请求不会挤占其他用户
+
+排队位置变化时回调通知调用方（用于向用户展示 "前面还有 N 个请求"），
+排队与执行都有超时，stats() 返回队列指标
+
+队列只在 Bot 的事件循环中使用
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Optional
+
+from config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_PER_USER,
+    LLM_MAX_QUEUED_PER_USER,
+    LLM_QUEUE_TIMEOUT,
+    LLM_REQUEST_TIMEOUT,
+)
+
+# 非用户发起的请求（如定时任务脚本修复）使用的用户ID
+SYSTEM_USER = "system"
+
+# 排队位置回调：参数为前面还有多少个请求；排过队的请求被放行时以 None 再回调一次
+PositionCallback = Callable[[Optional[int]], Any]
+
+
+class LLMQueueError(Exception):
+    """LLM 请求未能执行"""
+
+
+class LLMQueueFull(LLMQueueError):
+    """用户排队的请求过多"""
+
+
+class LLMQueueTimeout(LLMQueueError):
+    """排队超时"""
+
+
+@dataclass(eq=False)
+class _Waiter:
+    user_id: str
+    future: asyncio.Future
+    on_position: Optional[PositionCallback] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    position: Optional[int] = None
+
+
+class LLMQueue:
+    """
+    公平的 LLM 请求调度器
+    使用单例模式确保全局唯一实例
+    """
+
+    _instance: Optional["LLMQueue"] = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_per_user: int = LLM_MAX_PER_USER,
+        max_queued_per_user: int = LLM_MAX_QUEUED_PER_USER,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+        request_timeout: float = LLM_REQUEST_TIMEOUT,
+    ):
+        if self._initialized:
+            return
+
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self.max_queued_per_user = max_queued_per_user
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+
+        # 用户轮转顺序：最近被放行的用户排到最后
+        self._queues: "OrderedDict[str, deque[_Waiter]]" = OrderedDict()
+        self._active: dict[str, int] = {}
+        self.in_flight = 0
+
+        self.granted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_timeouts = 0
+        self.request_timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+        self._initialized = True
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _can_run(self, user_id: str) -> bool:
+        return self._active.get(user_id, 0) < self.max_per_user
+
+    def _dispatch(self):
+        """按轮转顺序放行排队的请求，直到达到全局上限或没有可放行的用户"""
+        while self.in_flight < self.max_concurrency:
+            user_id = next((u for u, q in self._queues.items() if q and self._can_run(u)), None)
+            if user_id is None:
+                break
+            queue = self._queues[user_id]
+            waiter = queue.popleft()
+            if not queue:
+                del self._queues[user_id]
+            else:
+                self._queues.move_to_end(user_id)
+            self._grant(waiter)
+        self._notify_positions()
+
+    def _grant(self, waiter: _Waiter):
+        self.in_flight += 1
+        self._active[waiter.user_id] = self._active.get(waiter.user_id, 0) + 1
+        wait = time.monotonic() - waiter.enqueued_at
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        waiter.future.set_result(None)
+        if waiter.on_position is not None and waiter.position is not None:
+            # 通知过排队位置的请求在放行时再通知一次
+            self._call(waiter, None)
+
+    @staticmethod
+    def _call(waiter: _Waiter, position: Optional[int]):
+        if waiter.on_position is None:
+            return
+        waiter.position = position
+        try:
+            waiter.on_position(position)
+        except Exception as e:
+            print(f"[WARN] 排队位置回调失败: {e}")
+
+    def _ahead(self, user_id: str, index: int) -> int:
+        """
+        估计排在某个请求前面的请求数
+        每一轮每个用户放行一个请求：用户队列中第 index 个请求之前，其他用户最多各有 index (+1) 个
+        """
+        ahead = index
+        before = True
+        for other, queue in self._queues.items():
+            if other == user_id:
+                before = False
+                continue
+            ahead += min(len(queue), index + (1 if before else 0))
+        return ahead
+
+    def _notify_positions(self):
+        for user_id, queue in self._queues.items():
+            for index, waiter in enumerate(queue):
+                if waiter.on_position is None:
+                    continue
+                position = self._ahead(user_id, index)
+                if position != waiter.position:
+                    self._call(waiter, position)
+
+    def _remove(self, waiter: _Waiter):
+        queue = self._queues.get(waiter.user_id)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[waiter.user_id]
+
+    async def acquire(self, user_id: str, on_position: Optional[PositionCallback] = None):
+        """
+        获取执行名额，需要排队时等待
+
+        Args:
+            user_id: 用户ID
+            on_position: 排队位置变化时的回调，参数为前面还有多少个请求，放行时为 None
+
+        Raises:
+            LLMQueueFull: 该用户排队的请求已达上限
+            LLMQueueTimeout: 排队超时
+        """
+        if self.in_flight < self.max_concurrency and self._can_run(user_id) and not self._queues:
+            self._grant(_Waiter(user_id, asyncio.get_running_loop().create_future()))
+            return
+
+        queue = self._queues.get(user_id)
+        if queue is not None and len(queue) >= self.max_queued_per_user:
+            self.rejected += 1
+            raise LLMQueueFull(f"排队中的请求已达上限 ({self.max_queued_per_user})")
+
+        waiter = _Waiter(user_id, asyncio.get_running_loop().create_future(), on_position)
+        if queue is None:
+            queue = self._queues[user_id] = deque()
+        queue.append(waiter)
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # 放行与超时 / 取消同时发生：名额已占用，归还后再放行下一个
+                self.release(user_id)
+            else:
+                waiter.future.cancel()
+                self._remove(waiter)
+                self._notify_positions()
+            if isinstance(e, asyncio.TimeoutError):
+                self.queue_timeouts += 1
+                raise LLMQueueTimeout(f"排队超过 {self.queue_timeout:.0f} 秒") from None
+            raise
+
+    def release(self, user_id: str):
+        """归还执行名额并放行下一个请求"""
+        self.in_flight -= 1
+        self._active[user_id] -= 1
+        if not self._active[user_id]:
+            del self._active[user_id]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user_id: str = SYSTEM_USER, on_position: Optional[PositionCallback] = None) -> AsyncIterator[None]:
+        """
+        在队列名额内执行一次 LLM 请求，执行超过 request_timeout 时取消
+
+        用法:
+            async with llm_queue.slot(user_id):
+                await llm.ainvoke(...)
+
+        Raises:
+            LLMQueueFull / LLMQueueTimeout: 未能获得执行名额
+            TimeoutError: 执行超时
+        """
+        await self.acquire(user_id, on_position)
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(self.request_timeout):
+                yield
+            self.completed += 1
+        except TimeoutError:
+            self.request_timeouts += 1
+            raise
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.total_run += time.monotonic() - started
+            self.release(user_id)
+
+    def stats(self) -> dict[str, Any]:
+        """队列指标"""
+        finished = self.completed + self.failed + self.request_timeouts
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_per_user": self.max_per_user,
+            "active_users": dict(self._active),
+            "waiting_users": {user_id: len(queue) for user_id, queue in self._queues.items()},
+            "granted": self.granted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queue_timeouts": self.queue_timeouts,
+            "request_timeouts": self.request_timeouts,
+            "avg_wait": self.total_wait / self.granted if self.granted else 0.0,
+            "max_wait": self.max_wait,
+            "avg_run": self.total_run / finished if finished else 0.0,
+        }
+
+
+llm_queue = LLMQueue()
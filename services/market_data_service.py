@@ -0,0 +1,223 @@
+"""
+实时行情服务模块
+通过 OKX WebSocket 订阅 tickers、标记价格和K线频道，将最新状态写入 okx_api.market_book，
+K线推送同时驱动流式指标增量更新
+断线后自动重连并重新订阅
+"""
+import asyncio
+import json
+from typing import Any, Optional
+
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import ConnectionClosed
+
+from config import (
+    OKX_WS_PUBLIC_URL,
+    OKX_WS_BUSINESS_URL,
+    MARKET_DATA_BARS,
+    TRADING_SYMBOLS,
+)
+from analysis.streaming import streaming_indicators
+from okx_api.market_book import market_book
+
+# 心跳间隔（秒），OKX 在 30 秒无消息后断开连接
+PING_INTERVAL = 20
+
+# 重连退避（秒）
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 30
+
+
+class MarketDataService:
+    """
+    实时行情服务
+    使用单例模式确保全局唯一实例
+    """
+
+    _instance: Optional["MarketDataService"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.public_url = OKX_WS_PUBLIC_URL
+        self.business_url = OKX_WS_BUSINESS_URL
+        self.bars = [bar.strip() for bar in MARKET_DATA_BARS if bar.strip()]
+        self.symbols: set[str] = {s.strip() for s in TRADING_SYMBOLS if s.strip()}
+        self._connections: dict[str, ClientConnection] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._subscribe_tasks: set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.reconnects = 0
+        self._initialized = True
+
+        market_book.add_watch_listener(self.subscribe)
+
+    def _public_args(self, symbols: set[str]) -> list[dict[str, str]]:
+        """public 通道订阅参数"""
+        args = []
+        for inst_id in sorted(symbols):
+            args.append({"channel": "tickers", "instId": inst_id})
+            if inst_id.endswith("SWAP") or inst_id.endswith("FUTURES"):
+                args.append({"channel": "mark-price", "instId": inst_id})
+        return args
+
+    def _business_args(self, symbols: set[str]) -> list[dict[str, str]]:
+        """business 通道订阅参数"""
+        return [
+            {"channel": f"candle{bar}", "instId": inst_id}
+            for inst_id in sorted(symbols)
+            for bar in self.bars
+        ]
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self):
+        """启动行情订阅"""
+        if self.running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        for inst_id in market_book.watched:
+            self.symbols.add(inst_id)
+
+        self._tasks = [
+            asyncio.create_task(self._run_connection(self.public_url, self._public_args), name="okx-ws-public"),
+            asyncio.create_task(self._run_connection(self.business_url, self._business_args), name="okx-ws-business"),
+        ]
+        print(f"[OK] 实时行情服务已启动，订阅 {len(self.symbols)} 个产品")
+
+    async def stop(self):
+        """停止行情订阅"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._connections.clear()
+        streaming_indicators.save_all()
+        print("[OK] 实时行情服务已停止")
+
+    def subscribe(self, inst_id: str):
+        """
+        追加订阅产品
+        已连接时立即发送订阅请求，未连接时在下次连接时统一订阅
+        可从任意线程调用（如同步封装所在的后台线程）：
+        服务运行后统一转交到事件循环线程处理，避免与重连时遍历 symbols 并发修改
+        """
+        if self._loop is None or self._loop.is_closed():
+            self.symbols.add(inst_id)
+            return
+        self._loop.call_soon_threadsafe(self._add_symbol, inst_id)
+
+    def _add_symbol(self, inst_id: str):
+        """在事件循环线程中追加产品，并向已建立的连接发送订阅请求"""
+        if inst_id in self.symbols:
+            return
+        self.symbols.add(inst_id)
+        for url, build_args in ((self.public_url, self._public_args), (self.business_url, self._business_args)):
+            ws = self._connections.get(url)
+            if ws is not None:
+                task = asyncio.create_task(self._send_subscribe(ws, build_args({inst_id})))
+                self._subscribe_tasks.add(task)
+                task.add_done_callback(self._subscribe_tasks.discard)
+
+    async def _send_subscribe(self, ws: ClientConnection, args: list[dict[str, str]]):
+        """发送订阅请求"""
+        if not args:
+            return
+        try:
+            await ws.send(json.dumps({"op": "subscribe", "args": args}))
+        except ConnectionClosed:
+            # 连接已断开，重连后会重新订阅全部产品
+            pass
+
+    async def _run_connection(self, url: str, build_args):
+        """
+        维持单个 WebSocket 连接
+        断线后按指数退避重连，每次连接成功后重新订阅全部产品
+        """
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                async with connect(url, ping_interval=None, open_timeout=10) as ws:
+                    self._connections[url] = ws
+                    await self._send_subscribe(ws, build_args(self.symbols))
+                    print(f"[OK] 已连接行情推送: {url}")
+                    delay = RECONNECT_MIN_DELAY
+                    await self._read_loop(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[WARN] 行情推送连接异常 {url}: {e}")
+            finally:
+                self._connections.pop(url, None)
+                if url == self.business_url:
+                    market_book.invalidate()
+
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _read_loop(self, ws: ClientConnection):
+        """读取推送消息，空闲时发送心跳"""
+        while True:
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=PING_INTERVAL)
+            except asyncio.TimeoutError:
+                await ws.send("ping")
+                continue
+
+            if message == "pong":
+                continue
+            try:
+                self._handle_message(json.loads(message))
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                print(f"[WARN] 解析行情推送失败: {e}")
+
+    def _handle_message(self, payload: dict[str, Any]):
+        """将推送写入行情内存簿"""
+        if payload.get("event") == "error":
+            print(f"[WARN] 行情订阅失败: {payload.get('msg', '')}")
+            return
+
+        arg = payload.get("arg", {})
+        data = payload.get("data")
+        if not data:
+            return
+
+        channel = arg.get("channel", "")
+        inst_id = arg.get("instId", "")
+
+        if channel == "tickers":
+            for item in data:
+                market_book.update_ticker(item.get("instId", inst_id), item)
+        elif channel == "mark-price":
+            for item in data:
+                market_book.update_mark_price(item.get("instId", inst_id), item)
+        elif channel.startswith("candle"):
+            bar = channel[len("candle"):]
+            for row in data:
+                market_book.update_candle(inst_id, bar, row)
+                streaming_indicators.on_candle(inst_id, bar, row)
+
+    def get_status(self) -> dict[str, Any]:
+        """获取服务状态"""
+        return {
+            "running": self.running,
+            "connected": list(self._connections),
+            "symbols": sorted(self.symbols),
+            "bars": self.bars,
+            "reconnects": self.reconnects,
+        }
+
+
+# 全局单例实例
+market_data_service = MarketDataService()
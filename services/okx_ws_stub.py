@@ -0,0 +1,146 @@
+"""
+OKX 公共 WebSocket 本地替身服务器
+用于在不连接交易所的情况下调试实时行情服务：
+支持 subscribe / ping，按固定间隔推送模拟的 tickers、mark-price 和 candle 数据
+
+用法:
+    python -m services.okx_ws_stub --port 8765
+    然后设置 OKX_WS_PUBLIC_URL / OKX_WS_BUSINESS_URL 为 ws://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Optional
+
+from websockets.asyncio.server import Server, ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+# 各周期的毫秒数
+BAR_MS = {
+    "1m": 60_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "1H": 3_600_000,
+    "4H": 14_400_000,
+    "1D": 86_400_000,
+}
+
+
+class OKXWebSocketStub:
+    """
+    OKX 公共 WebSocket 替身
+    记录收到的订阅请求，并向订阅者推送随机游走的行情
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, interval: float = 0.2):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.server: Optional[Server] = None
+        self.subscriptions: list[dict[str, str]] = []
+        self.connections: set[ServerConnection] = set()
+        self._prices: dict[str, float] = {}
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        """启动服务器，port 为 0 时自动分配端口"""
+        self.server = await serve(self._handler, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """停止服务器"""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def drop_connections(self):
+        """主动断开所有客户端，用于验证断线重连与重新订阅"""
+        for ws in list(self.connections):
+            await ws.close()
+
+    def _next_price(self, inst_id: str) -> float:
+        price = self._prices.get(inst_id, 100.0)
+        price = max(price * (1 + random.uniform(-0.001, 0.001)), 0.01)
+        self._prices[inst_id] = price
+        return price
+
+    def _build_push(self, arg: dict[str, str]) -> dict[str, Any]:
+        """根据订阅参数构造一条 OKX 格式的推送"""
+        channel = arg["channel"]
+        inst_id = arg["instId"]
+        now = int(time.time() * 1000)
+        price = self._next_price(inst_id)
+
+        if channel == "tickers":
+            data = [{
+                "instType": "SWAP",
+                "instId": inst_id,
+                "last": f"{price:.4f}",
+                "open24h": "100",
+                "high24h": f"{max(price, 100) * 1.01:.4f}",
+                "low24h": f"{min(price, 100) * 0.99:.4f}",
+                "bidPx": f"{price * 0.9999:.4f}",
+                "askPx": f"{price * 1.0001:.4f}",
+                "vol24h": "12345",
+                "ts": str(now),
+            }]
+        elif channel == "mark-price":
+            data = [{"instType": "SWAP", "instId": inst_id, "markPx": f"{price:.4f}", "ts": str(now)}]
+        else:
+            bar_ms = BAR_MS.get(channel[len("candle"):], 3_600_000)
+            ts = now - now % bar_ms
+            data = [[str(ts), f"{price:.4f}", f"{price * 1.001:.4f}", f"{price * 0.999:.4f}", f"{price:.4f}", "10", "0", "0", "0"]]
+
+        return {"arg": arg, "data": data}
+
+    async def _handler(self, ws: ServerConnection):
+        self.connections.add(ws)
+        subscribed: list[dict[str, str]] = []
+        pusher = asyncio.create_task(self._push_loop(ws, subscribed))
+        try:
+            async for message in ws:
+                if message == "ping":
+                    await ws.send("pong")
+                    continue
+                request = json.loads(message)
+                if request.get("op") == "subscribe":
+                    for arg in request.get("args", []):
+                        subscribed.append(arg)
+                        self.subscriptions.append(arg)
+                        await ws.send(json.dumps({"event": "subscribe", "arg": arg}))
+        except ConnectionClosed:
+            pass
+        finally:
+            pusher.cancel()
+            self.connections.discard(ws)
+
+    async def _push_loop(self, ws: ServerConnection, subscribed: list[dict[str, str]]):
+        while True:
+            await asyncio.sleep(self.interval)
+            for arg in list(subscribed):
+                try:
+                    await ws.send(json.dumps(self._build_push(arg)))
+                except ConnectionClosed:
+                    return
+
+
+async def _main(host: str, port: int, interval: float):
+    stub = OKXWebSocketStub(host, port, interval)
+    await stub.start()
+    print(f"[OK] OKX WebSocket 替身已启动: {stub.url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OKX 公共 WebSocket 本地替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.5, help="推送间隔（秒）")
+    args = parser.parse_args()
+    asyncio.run(_main(args.host, args.port, args.interval))
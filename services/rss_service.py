@@ -1,107 +1,119 @@
 """
 RSS 新闻服务模块
 获取加密货币新闻快讯
+新闻内容由 news 模块的订阅缓存与多源聚合提供，这里只负责格式化
 """
-import feedparser
 from datetime import datetime
-from html.parser import HTMLParser
+from typing import Optional, Sequence
 
+from news.aggregate import NewsItem, news_aggregator
+from news.feeds import RSS_SOURCES, FeedEntry, feed_cache, strip_html
 
-RSS_SOURCES = {
-    "odaily": {
-        "name": "Odaily星球日报",
-        "url": "https://rss.odaily.news/rss/newsflash",
-    }
-}
 
+def _time_str(entry: FeedEntry) -> str:
+    if entry.published is not None:
+        return datetime.fromtimestamp(entry.published).strftime("%m-%d %H:%M")
+    return entry.pub_date
 
-class HTMLTextExtractor(HTMLParser):
+
+def format_news(title: str, items: Sequence[NewsItem]) -> str:
     """
-    HTML 文本提取器
-    从 HTML 中提取纯文本内容
+    格式化新闻
+
+    Args:
+        title: 标题（新闻源名称）
+        items: 新闻（单源条目也以 NewsItem 表示）
+
+    Returns:
+        格式化的新闻内容
     """
+    if not items:
+        return "暂无新闻快讯"
 
-    def __init__(self):
-        super().__init__()
-        self.text_parts = []
+    lines = [f"{title}最新快讯:\n"]
 
-    def handle_data(self, data):
-        self.text_parts.append(data)
+    for i, item in enumerate(items, 1):
+        entry = item.entry
+        lines.append(f"{i}. {entry.title or '无标题'}")
+        time_str = _time_str(entry)
+        source_str = " / ".join(item.sources)
+        lines.append(f"时间: {time_str}  来源: {source_str}" if time_str else f"来源: {source_str}")
+        if entry.description:
+            lines.append(f"{entry.description}")
+        lines.append(f"链接: {entry.link}")
 
-    def get_text(self) -> str:
-        return "".join(self.text_parts).strip()
+    return "\n".join(lines)
 
 
-def strip_html(html_content: str) -> str:
+def format_sources() -> str:
     """
-    移除 HTML 标签，提取纯文本
-
-    Args:
-        html_content: HTML 内容
+    格式化新闻源列表及其状态
 
     Returns:
-        纯文本内容
+        新闻源状态文本
     """
-    if not html_content:
-        return ""
-    extractor = HTMLTextExtractor()
-    extractor.feed(html_content)
-    return extractor.get_text()
-
-
-def fetch_news(source: str = "odaily", limit: int = 10) -> str:
+    stats = feed_cache.stats()
+    lines = ["可用的新闻源:"]
+    for key, info in RSS_SOURCES.items():
+        state = stats.get(key)
+        if state is None or not state["checked_at"]:
+            status = "尚未获取"
+        else:
+            checked = datetime.fromtimestamp(state["checked_at"]).strftime("%H:%M:%S")
+            status = f"{state['entries']} 条，最近检查 {checked}"
+        if state and state["error"]:
+            status += f"，最近错误: {state['error']}"
+        lines.append(f"- {key}: {info['name']}（{status}）")
+    lines.append("\n!news 展示全部新闻源合并去重后的新闻流")
+    return "\n".join(lines)
+
+
+def _unknown_source(source: str) -> str:
+    available = ", ".join(RSS_SOURCES.keys())
+    return f"未知的新闻源: {source}\n可用源: {available}"
+
+
+async def afetch_news(source: Optional[str] = None, limit: int = 10) -> str:
     """
-    获取 RSS 新闻快讯
+    获取 RSS 新闻快讯 (异步)
 
     Args:
-        source: 新闻源名称，默认 odaily
+        source: 新闻源名称，为空时返回全部新闻源合并去重后的新闻流
         limit: 返回新闻数量，默认 10 条
 
     Returns:
         格式化的新闻内容
     """
-    if source not in RSS_SOURCES:
-        available = ", ".join(RSS_SOURCES.keys())
-        return f"未知的新闻源: {source}\n可用源: {available}"
-
-    source_info = RSS_SOURCES[source]
-    url = source_info["url"]
-    source_name = source_info["name"]
+    if source is not None and source not in RSS_SOURCES:
+        return _unknown_source(source)
 
     try:
-        feed = feedparser.parse(url)
-
-        if feed.bozo and feed.bozo_exception:
-            return f"获取新闻失败: {feed.bozo_exception}"
-
-        entries = feed.entries[:limit]
-
-        if not entries:
-            return f"暂无新闻快讯"
+        if source is None:
+            return format_news("多源", await news_aggregator.get_items(limit))
+        entries = await feed_cache.get_entries(source, limit)
+        return format_news(RSS_SOURCES[source]["name"], [NewsItem(e) for e in entries])
+    except Exception as e:
+        return f"获取新闻失败: {str(e)}"
 
-        lines = [f"{source_name}最新快讯:\n"]
 
-        for i, entry in enumerate(entries, 1):
-            title = entry.get("title", "无标题")
-            link = entry.get("link", "")
-            description = entry.get("description", "")
-            pub_date = entry.get("pubDate", "")
-            time_str = ""
-            if pub_date:
-                try:
-                    dt = datetime.strptime(pub_date, "%a, %d %b %Y %H:%M:%S %Z") # pyright: ignore[reportArgumentType]
-                    time_str = dt.strftime("%m-%d %H:%M")
-                except ValueError:
-                    time_str = pub_date
+def fetch_news(source: Optional[str] = None, limit: int = 10) -> str:
+    """
+    获取 RSS 新闻快讯
 
-            lines.append(f"{i}. {title}")
-            if time_str:
-                lines.append(f"时间: {time_str}")
-            if description:
-                lines.append(f"{description}")
-            lines.append(f"链接: {link}")
+    Args:
+        source: 新闻源名称，为空时返回全部新闻源合并去重后的新闻流
+        limit: 返回新闻数量，默认 10 条
 
-        return "\n".join(lines)
+    Returns:
+        格式化的新闻内容
+    """
+    if source is not None and source not in RSS_SOURCES:
+        return _unknown_source(source)
 
+    try:
+        if source is None:
+            return format_news("多源", news_aggregator.get_items_sync(limit))
+        entries = feed_cache.get_entries_sync(source, limit)
+        return format_news(RSS_SOURCES[source]["name"], [NewsItem(e) for e in entries])
     except Exception as e:
         return f"获取新闻失败: {str(e)}"
@@ -5,6 +5,7 @@
 import asyncio
 import json
 import os
+import re
 import subprocess
 import uuid
 from datetime import datetime
@@ -18,10 +19,22 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
+from analysis.streaming import streaming_indicators
+from okx_api.market_book import market_book
+from okx_api.rate_limiter import Priority, rate_limiter, request_priority
+
 # 任务文件路径
 TASK_FILE = Path(__file__).parent.parent / "data" / "task.json"
 TASK_SCRIPT_DIR = Path(__file__).parent.parent / "data" / "tasks"
 
+# 从任务脚本中识别调用的 OKX 接口与用到的产品ID，如 instId=BTC-USDT 或 "instId": "BTC-USDT-SWAP"
+API_PATH_PATTERN = re.compile(r"/api/v5/[A-Za-z\-/]+")
+INST_ID_PATTERN = re.compile(r"instId[\"']?\s*[=:]\s*[\"']?([A-Z0-9]+-[A-Z0-9]+(?:-[A-Z0-9]+)?)")
+# 脚本中读取流式指标的调用，如 read_indicators("BTC-USDT-SWAP", "1H")
+READ_INDICATORS_PATTERN = re.compile(
+    r"read_indicators\(\s*[\"']([A-Z0-9]+-[A-Z0-9]+(?:-[A-Z0-9]+)?)[\"'](?:\s*,\s*(?:bar\s*=\s*)?[\"'](\w+)[\"'])?"
+)
+
 
 class ScheduledTask:
     """
@@ -296,6 +309,10 @@ class SchedulerService:
 
         env["PYTHONIOENCODING"] = "utf-8"
 
+        # 脚本以 data/tasks/<id>.py 运行，sys.path[0] 是脚本所在目录，需要显式加入项目根目录才能导入项目模块
+        project_root = str(Path(__file__).parent.parent)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (project_root, env.get("PYTHONPATH", "")) if p)
+
         return env
 
     def _execute_script_sync(self, script: str) -> str:
@@ -341,6 +358,19 @@ class SchedulerService:
 
         print(f"[INFO] 开始执行任务: {task.name} (ID: {task.id})")
 
+        # 脚本在子进程中直接请求 OKX，执行前按其调用的接口以后台优先级占用令牌，
+        # 避免大量任务同时触发时挤占交互式命令的限频额度
+        for path in API_PATH_PATTERN.findall(task.script):
+            await rate_limiter.acquire(path.rstrip("/"), Priority.BACKGROUND)
+
+        # 脚本读取的流式指标先增量补齐到最新K线并落盘，子进程读到的是当前值
+        with request_priority(Priority.BACKGROUND):
+            for inst_id, bar in set(READ_INDICATORS_PATTERN.findall(task.script)):
+                try:
+                    await streaming_indicators.refresh(inst_id, bar or "1H")
+                except Exception as e:
+                    print(f"[WARN] 更新指标状态失败 {inst_id} {bar}: {e}")
+
         result = await self._execute_script_file(task.script_file)
 
         print(f"[INFO] 任务执行完成: {task.name}, 结果长度: {len(result)} 字符")
@@ -437,6 +467,12 @@ class SchedulerService:
         self.tasks[task.id] = task
         self._save_tasks()
 
+        # 任务用到的产品加入实时行情订阅
+        inst_ids = set(INST_ID_PATTERN.findall(task.script))
+        inst_ids.update(inst_id for inst_id, _ in READ_INDICATORS_PATTERN.findall(task.script))
+        for inst_id in inst_ids:
+            market_book.watch(inst_id)
+
         if self.scheduler and task.enabled:
             trigger = self._create_trigger(task.schedule)
             self.scheduler.add_job(
@@ -0,0 +1,94 @@
+"""
+向量化指标与原列表实现的一致性测试
+参考实现保留自 TechnicalAnalyzer 改用 analysis.indicators 之前的 calculate_* 方法
+"""
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from analysis import indicators
+
+
+def reference_ma(prices: list, period: int) -> Optional[float]:
+    """计算移动平均线"""
+    if len(prices) < period:
+        return None
+    return sum(prices[-period:]) / period
+
+
+def reference_rsi(prices: list, period: int = 14) -> Optional[float]:
+    """计算 RSI 相对强弱指标（最近 period 个涨跌幅的简单平均）"""
+    if len(prices) < period + 1:
+        return None
+
+    deltas = [prices[i] - prices[i - 1] for i in range(1, len(prices))]
+    gains = [d if d > 0 else 0 for d in deltas]
+    losses = [-d if d < 0 else 0 for d in deltas]
+
+    avg_gain = sum(gains[-period:]) / period
+    avg_loss = sum(losses[-period:]) / period
+
+    if avg_loss == 0:
+        return 100
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def reference_bollinger(prices: list, period: int = 20) -> Optional[dict]:
+    """计算布林带"""
+    if len(prices) < period:
+        return None
+
+    recent_prices = prices[-period:]
+    ma = sum(recent_prices) / period
+    variance = sum((p - ma) ** 2 for p in recent_prices) / period
+    std = variance ** 0.5
+    return {"upper": ma + 2 * std, "middle": ma, "lower": ma - 2 * std}
+
+
+def _series(reference, prices: list, *args) -> np.ndarray:
+    """逐个前缀调用参考实现，得到与向量化结果等长的序列（数据不足为 NaN）"""
+    values = [reference(prices[: i + 1], *args) for i in range(len(prices))]
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+@pytest.fixture
+def prices() -> list:
+    rng = np.random.default_rng(7)
+    walk = 100 * np.cumprod(1 + rng.normal(0, 0.01, 120))
+    # 一段单边上涨，覆盖平均跌幅为 0 的分支
+    rising = walk[-1] + np.arange(1, 21)
+    return np.concatenate([walk, rising]).tolist()
+
+
+@pytest.mark.parametrize("period", [5, 20, 60])
+def test_sma_matches_reference(prices, period):
+    expected = _series(reference_ma, prices, period)
+    assert np.allclose(indicators.sma(prices, period), expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("period", [6, 14])
+def test_rsi_matches_reference(prices, period):
+    expected = _series(reference_rsi, prices, period)
+    actual = indicators.rsi(prices, period, wilder=False)
+    assert np.allclose(actual, expected, equal_nan=True)
+    assert actual[-1] == 100
+
+
+@pytest.mark.parametrize("period", [10, 20])
+def test_bollinger_matches_reference(prices, period):
+    upper, middle, lower = indicators.bollinger(prices, period)
+    for key, actual in (("upper", upper), ("middle", middle), ("lower", lower)):
+        expected = _series(lambda p, n: (reference_bollinger(p, n) or {}).get(key), prices, period)
+        assert np.allclose(actual, expected, equal_nan=True)
+
+
+def test_matrix_rows_match_reference(prices):
+    """二维输入逐行计算，结果与逐品种调用参考实现一致"""
+    matrix = np.array([prices, [p * 0.5 + 10 for p in prices]])
+    ma = indicators.sma(matrix, 20)
+    rsi = indicators.rsi(matrix, 14, wilder=False)
+    for row, series in enumerate(matrix.tolist()):
+        assert np.allclose(ma[row], _series(reference_ma, series, 20), equal_nan=True)
+        assert np.allclose(rsi[row], _series(reference_rsi, series, 14), equal_nan=True)
@@ -0,0 +1,86 @@
+"""
+实时行情服务断线重连测试
+使用 services.okx_ws_stub 替身服务器，不连接交易所
+"""
+import asyncio
+import importlib
+import time
+
+import services  # noqa: F401  先初始化 services 包，避免循环导入
+from services.okx_ws_stub import OKXWebSocketStub
+
+# services 包导出的同名单例会遮蔽模块本身
+mds_module = importlib.import_module("services.market_data_service")
+
+
+class _NullIndicators:
+    """替代流式指标，避免K线推送触发 REST 预热和落盘"""
+
+    def on_candle(self, inst_id, bar, row):
+        pass
+
+    def save_all(self):
+        pass
+
+
+async def _wait_for(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        await asyncio.sleep(0.02)
+
+
+def _subscribed(stub: OKXWebSocketStub) -> set[tuple[str, str]]:
+    return {(arg["channel"], arg["instId"]) for arg in stub.subscriptions}
+
+
+def test_resubscribe_after_drop(monkeypatch):
+    monkeypatch.setattr(mds_module, "RECONNECT_MIN_DELAY", 0.05)
+    monkeypatch.setattr(mds_module, "streaming_indicators", _NullIndicators())
+
+    service = mds_module.MarketDataService()
+    monkeypatch.setattr(service, "bars", ["1H"])
+    monkeypatch.setattr(service, "symbols", {"BTC-USDT-SWAP"})
+    monkeypatch.setattr(service, "reconnects", 0)
+    monkeypatch.setattr(service, "_loop", None)
+
+    async def scenario():
+        public, business = OKXWebSocketStub(interval=0.05), OKXWebSocketStub(interval=0.05)
+        await public.start()
+        await business.start()
+        monkeypatch.setattr(service, "public_url", public.url)
+        monkeypatch.setattr(service, "business_url", business.url)
+        try:
+            await service.start()
+            await _wait_for(lambda: ("tickers", "BTC-USDT-SWAP") in _subscribed(public))
+            await _wait_for(lambda: ("candle1H", "BTC-USDT-SWAP") in _subscribed(business))
+
+            # 从其他线程追加订阅，应转交到事件循环后发送到已建立的连接
+            await asyncio.to_thread(service.subscribe, "ETH-USDT")
+            await _wait_for(lambda: ("tickers", "ETH-USDT") in _subscribed(public))
+            await _wait_for(lambda: ("candle1H", "ETH-USDT") in _subscribed(business))
+            assert service.symbols == {"BTC-USDT-SWAP", "ETH-USDT"}
+
+            public.subscriptions.clear()
+            business.subscriptions.clear()
+            await public.drop_connections()
+            await business.drop_connections()
+            await _wait_for(lambda: service.reconnects >= 2)
+
+            # 重连后重新订阅全部产品，包括运行期间追加的产品
+            await _wait_for(lambda: _subscribed(public) == {
+                ("tickers", "BTC-USDT-SWAP"),
+                ("mark-price", "BTC-USDT-SWAP"),
+                ("tickers", "ETH-USDT"),
+            })
+            await _wait_for(lambda: _subscribed(business) == {
+                ("candle1H", "BTC-USDT-SWAP"),
+                ("candle1H", "ETH-USDT"),
+            })
+        finally:
+            await service.stop()
+            await public.stop()
+            await business.stop()
+
+    asyncio.run(scenario())
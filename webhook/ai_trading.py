@@ -4,8 +4,10 @@ AI 交易分析脚本
 技术面 + 消息面 LLM 分析，整合一周行情多空预测
 每天定时推送到 Discord
 """
+import asyncio
 import json
 import os
+import re
 import sys
 import time
 import logging
@@ -30,6 +32,17 @@ webhook_dir = Path(__file__).parent
 load_dotenv(webhook_dir / "config.env")
 sys.path.insert(0, str(webhook_dir))
 import config
+import numpy as np
+
+from analysis import indicators
+from analysis.resample import resample_many
+from analysis.streaming import streaming_indicators
+from news.aggregate import news_aggregator
+from news.feeds import RSS_SOURCES
+from news.relevance import NewsIndex
+from okx_api.candle_store import candle_store
+from okx_api.client import async_okx_client
+from okx_api.rate_limiter import Priority, request_priority
 
 # ==================== 配置 ====================
 logging.basicConfig(
@@ -48,10 +61,38 @@ ANALYSIS_TIME = config.TRADING_ANALYSIS_TIME
 # OKX API
 OKX_BASE_URL = "https://www.okx.com"
 
+# 技术分析的基础周期与数量（30 天 1H K线，足够计算日线 MA20 / 布林带和一周涨跌幅）
+BASE_BAR = "1H"
+BASE_LIMIT = 24 * 30
+TIMEFRAMES = ("1H", "4H", "1D")
+
+# LLM 并发上限
+LLM_CONCURRENCY = config.ANALYSIS_LLM_CONCURRENCY
+
+# 相邻两条 Discord 推送的间隔（秒），避免触发 Webhook 限频
+NOTIFY_INTERVAL = 1
+
 # 数据存储路径（相对于 webhook 目录）
 DATA_DIR = Path(__file__).parent / "trading_analysis"
 HISTORY_FILE = DATA_DIR / "analysis_history.json"
 
+# 历史记录保留天数
+HISTORY_RETENTION_DAYS = 90
+
+# 提示词版本，修改 generate_prompt 时递增，回测时可按版本比较预测质量
+# v2: 消息面只包含与交易对相关度最高的新闻
+PROMPT_VERSION = "v2"
+
+# 参与相关度排序的候选新闻数，以及每个交易对提示词中的新闻条数与字符预算
+NEWS_CANDIDATES = 50
+NEWS_TOP_K = config.ANALYSIS_NEWS_TOP_K
+NEWS_MAX_CHARS = config.ANALYSIS_NEWS_MAX_CHARS
+
+def round_price(price: float, digits: int = 6) -> float:
+    """按有效数字舍入价格，低价币不会被舍入为 0"""
+    return float(f"{price:.{digits}g}")
+
+
 # ==================== LLM 客户端 ====================
 class LLMClient:
     """LLM 客户端封装"""
@@ -92,20 +133,28 @@ class LLMClient:
             LLM 返回的分析结果
         """
         try:
-            print(f"[DEBUG] 调用 LLM 分析: {prompt}")
+            logger.debug(f"调用 LLM 分析，提示词 {len(prompt)} 字符")
             response = self.llm.invoke(prompt)
-            # 处理不同的返回格式
-            if hasattr(response, 'content'):
-                return response.content
-            # 兼容字典格式
-            if isinstance(response, dict):
-                if 'content' in response:
-                    return response['content']
-                # 兼容 OpenAI 格式
-                choices = response.get('choices', [])
-                if choices:
-                    return choices[0].get('message', {}).get('content', '')
-            return str(response)
+            # content 可能是内容块列表，text 只取其中的文本
+            return response.text
+        except Exception as e:
+            logger.error(f"LLM 调用失败: {e}")
+            return f"LLM 调用失败: {str(e)}"
+
+    async def aanalyze(self, prompt: str) -> str:
+        """
+        调用 LLM 进行分析 (异步)
+
+        Args:
+            prompt: 分析提示词
+
+        Returns:
+            LLM 返回的分析结果
+        """
+        try:
+            logger.debug(f"调用 LLM 分析，提示词 {len(prompt)} 字符")
+            response = await self.llm.ainvoke(prompt)
+            return response.text
         except Exception as e:
             logger.error(f"LLM 调用失败: {e}")
             return f"LLM 调用失败: {str(e)}"
@@ -124,72 +173,44 @@ class TechnicalAnalyzer:
     def get_klines(self, timeframe: str = "4H", limit: int = 300) -> list:
         """
         获取 K 线数据
+        已收盘K线从本地K线存储读取，只增量拉取缺失部分
 
         Args:
             timeframe: 时间周期 (1H, 4H, 1D, 1W)
-            limit: 获取数量
+            limit: 获取数量（超过单页上限时自动分页回补）
 
         Returns:
-            K 线数据列表
+            K 线数据列表（最新在前）
         """
-        url = f"{OKX_BASE_URL}/api/v5/market/history-candles"
-        params = {
-            "instId": self.symbol,
-            "bar": timeframe,
-            "limit": limit,
-        }
         try:
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            if data.get("code") == "0":
-                return data.get("data", [])
-            logger.error(f"获取K线失败: {data}")
-            return []
+            ts, ohlcv = candle_store.get_sync(self.symbol, timeframe, limit)
         except Exception as e:
             logger.error(f"获取K线异常: {e}")
             return []
+        return [[str(t), *row] for t, row in zip(ts.tolist()[::-1], ohlcv.tolist()[::-1])]
 
     def calculate_ma(self, prices: list, period: int) -> Optional[float]:
         """计算移动平均线"""
         if len(prices) < period:
             return None
-        return sum(prices[-period:]) / period
+        return float(indicators.sma(prices, period)[-1])
 
     def calculate_rsi(self, prices: list, period: int = 14) -> Optional[float]:
-        """计算 RSI 相对强弱指标"""
+        """计算 RSI 相对强弱指标（最近 period 个涨跌幅的简单平均）"""
         if len(prices) < period + 1:
             return None
-
-        deltas = [prices[i] - prices[i - 1] for i in range(1, len(prices))]
-        gains = [d if d > 0 else 0 for d in deltas]
-        losses = [-d if d < 0 else 0 for d in deltas]
-
-        avg_gain = sum(gains[-period:]) / period
-        avg_loss = sum(losses[-period:]) / period
-
-        if avg_loss == 0:
-            return 100
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        return float(indicators.rsi(prices, period, wilder=False)[-1])
 
     def calculate_bollinger_bands(self, prices: list, period: int = 20) -> Optional[dict]:
         """计算布林带"""
         if len(prices) < period:
             return None
 
-        recent_prices = prices[-period:]
-        ma = sum(recent_prices) / period
-        variance = sum((p - ma) ** 2 for p in recent_prices) / period
-        std = variance ** 0.5
-
-        upper_band = ma + 2 * std
-        lower_band = ma - 2 * std
-
+        upper, middle, lower = indicators.bollinger(prices, period)
         return {
-            "upper": upper_band,
-            "middle": ma,
-            "lower": lower_band,
+            "upper": float(upper[-1]),
+            "middle": float(middle[-1]),
+            "lower": float(lower[-1]),
             "current": prices[-1] if prices else None,
         }
 
@@ -200,85 +221,91 @@ class TechnicalAnalyzer:
         Returns:
             技术分析结果字典
         """
-        # 定义多周期
-        timeframes = {
-            "1H": {"limit": 48, "name": "1小时"},
-            "4H": {"limit": 30, "name": "4小时"},
-            "1D": {"limit": 30, "name": "日线"},
-        }
+        return async_okx_client.run_sync(self.aanalyze())
 
-        all_data = {}
-
-        for tf, config in timeframes.items():
-            data = self.get_klines(tf, config["limit"])
-            if not data:
-                continue
+    async def aanalyze(self) -> dict:
+        """
+        执行技术面分析 (异步)
+        只拉取一次 1H 基础K线，4H / 1D 由重采样得到
+        任何异常都只影响当前交易对，以 {"error": ...} 返回
 
-            closes = []
-            for kline in data:
-                if len(kline) >= 5:
-                    closes.append(float(kline[4]))
+        Returns:
+            技术分析结果字典
+        """
+        try:
+            ts, ohlcv = await candle_store.get(self.symbol, BASE_BAR, BASE_LIMIT)
+        except Exception as e:
+            logger.error(f"获取K线异常: {e}")
+            return {"error": "无法获取K线数据"}
 
-            if not closes:
-                continue
+        try:
+            return self._analyze_series(ts, ohlcv)
+        except Exception as e:
+            logger.exception(f"技术指标计算异常 {self.symbol}")
+            return {"error": f"技术指标计算异常: {e}"}
 
-            # OKX API 返回的数据是最新在前，需要反转
-            closes.reverse()
+    def _analyze_series(self, ts: np.ndarray, ohlcv: np.ndarray) -> dict:
+        """由基础K线重采样并计算各周期指标"""
+        last_confirmed = candle_store.last_confirmed_ts(self.symbol, BASE_BAR)
+        series = resample_many(ts, ohlcv, BASE_BAR, TIMEFRAMES, last_confirmed)
 
-            current_price = closes[-1]
-            ma5 = self.calculate_ma(closes, 5)
-            ma10 = self.calculate_ma(closes, 10)
-            ma20 = self.calculate_ma(closes, 20)
-            rsi = self.calculate_rsi(closes, 14)
-            bb = self.calculate_bollinger_bands(closes, 20)
+        all_data = {}
+        for tf, (tf_ts, tf_ohlcv, confirmed) in series.items():
+            if len(tf_ts) == 0:
+                continue
+            # 流式指标从磁盘恢复，只回放上次分析之后新收盘的K线（RSI 沿用简单平均口径）
+            state = streaming_indicators.ingest(self.symbol, tf, tf_ts, tf_ohlcv[:, 3], confirmed)
+            streaming_indicators.save(self.symbol, tf)
+            last = state.values()
+            current_price = last["close"]
+            ma5, ma10, ma20, rsi = last["ma5"], last["ma10"], last["ma20"], last["rsi"]
+            bb_upper, bb_middle, bb_lower = last["bb_upper"], last["bb_middle"], last["bb_lower"]
 
             bb_position = None
-            if bb and bb["upper"] and bb["lower"] and current_price:
-                bb_range = bb["upper"] - bb["lower"]
+            if bb_upper and bb_lower and current_price:
+                bb_range = bb_upper - bb_lower
                 if bb_range > 0:
-                    bb_position = round((current_price - bb["lower"]) / bb_range * 100, 2)
+                    bb_position = round((current_price - bb_lower) / bb_range * 100, 2)
 
             all_data[tf] = {
-                "current_price": round(current_price, 2),
-                "ma5": round(ma5, 2) if ma5 else None,
-                "ma10": round(ma10, 2) if ma10 else None,
-                "ma20": round(ma20, 2) if ma20 else None,
+                # 当前价格不做舍入：回测以它为基准计算涨跌幅，低价币保留两位小数会失去意义
+                "current_price": float(current_price),
+                "ma5": round_price(ma5) if ma5 else None,
+                "ma10": round_price(ma10) if ma10 else None,
+                "ma20": round_price(ma20) if ma20 else None,
                 "rsi": round(rsi, 2) if rsi else None,
-                "bollinger_upper": round(bb["upper"], 2) if bb and bb["upper"] else None,
-                "bollinger_middle": round(bb["middle"], 2) if bb and bb["middle"] else None,
-                "bollinger_lower": round(bb["lower"], 2) if bb and bb["lower"] else None,
+                "bollinger_upper": round_price(bb_upper) if bb_upper else None,
+                "bollinger_middle": round_price(bb_middle) if bb_middle else None,
+                "bollinger_lower": round_price(bb_lower) if bb_lower else None,
                 "bollinger_position": bb_position,
             }
 
         if not all_data:
             return {"error": "无法获取K线数据"}
 
-        # 计算日线一周涨跌幅
-        weekly_change = 0
-        daily_data = self.get_klines("1D", 8)
-        if len(daily_data) >= 8:
-            price_now = float(daily_data[-1][4])
-            price_week_ago = float(daily_data[0][4])
-            weekly_change = round((price_now - price_week_ago) / price_week_ago * 100, 2)
-
         return {
             "symbol": self.symbol,
             "current_price": all_data.get("1D", {}).get("current_price", 0),
             "timeframes": all_data,
-            "weekly_change": weekly_change,
+            "weekly_change": self._weekly_change(*series["1D"][:2]),
         }
 
+    @staticmethod
+    def _weekly_change(daily_ts: np.ndarray, daily_ohlcv: np.ndarray) -> float:
+        """计算日线一周涨跌幅：最新收盘价相对 7 天前的收盘价"""
+        if len(daily_ts) < 8:
+            return 0
+        price_now = float(daily_ohlcv[-1, 3])
+        price_week_ago = float(daily_ohlcv[-8, 3])
+        return round((price_now - price_week_ago) / price_week_ago * 100, 2)
+
 
 # ==================== 消息面分析模块 ====================
 class NewsAnalyzer:
     """消息面分析器"""
 
-    RSS_SOURCES = {
-        "odaily": {
-            "name": "Odaily星球日报",
-            "url": "https://rss.odaily.news/rss/newsflash",
-        }
-    }
+    # 新闻源与 Bot 共用，内容来自订阅缓存（条件请求 + 线程内解析）
+    RSS_SOURCES = RSS_SOURCES
 
     def fetch_news(self, limit: int = 10) -> list:
         """
@@ -290,34 +317,33 @@ class NewsAnalyzer:
         Returns:
             新闻列表
         """
-        news_list = []
-
-        for source_key, source_info in self.RSS_SOURCES.items():
-            try:
-                response = requests.get(source_info["url"], timeout=10)
-                import feedparser
-                feed = feedparser.parse(response.text)
-
-                if feed.entries:
-                    for entry in feed.entries[:limit]:
-                        news_list.append({
-                            "source": source_info["name"],
-                            "title": entry.get("title", ""),
-                            "link": entry.get("link", ""),
-                            "description": entry.get("description", ""),
-                            "pubDate": entry.get("pubDate", ""),
-                        })
-            except Exception as e:
-                logger.error(f"获取新闻失败 {source_key}: {e}")
-
-        return news_list[:limit]
-
-    def summarize_news(self, news_list: list) -> str:
+        return async_okx_client.run_sync(self.afetch_news(limit))
+
+    async def afetch_news(self, limit: int = 10) -> list:
+        """
+        获取加密货币新闻 (异步)
+        全部新闻源合并去重，同一轮分析中的多个交易对共享一次下载
+
+        Args:
+            limit: 获取数量
+
+        Returns:
+            新闻列表
+        """
+        try:
+            items = await news_aggregator.get_items(limit)
+        except Exception as e:
+            logger.error(f"获取新闻失败: {e}")
+            return []
+        return [item.to_dict() for item in items]
+
+    def summarize_news(self, news_list: list, symbol: Optional[str] = None) -> str:
         """
         将新闻列表格式化为字符串
 
         Args:
             news_list: 新闻列表
+            symbol: 交易对，指定时只保留与其相关度最高的新闻
 
         Returns:
             格式化的新闻字符串
@@ -325,6 +351,9 @@ class NewsAnalyzer:
         if not news_list:
             return "暂无最新新闻"
 
+        if symbol is not None:
+            return NewsIndex(news_list, [symbol]).render(symbol, NEWS_TOP_K, NEWS_MAX_CHARS)
+
         lines = ["【近期重要新闻】"]
         for i, news in enumerate(news_list[:10], 1):
             lines.append(f"{i}. {news['title']}")
@@ -379,6 +408,9 @@ class HistoryManager:
             "reason": analysis_data.get("reason", ""),
             "target_price_range": analysis_data.get("target_price_range", ""),
             "risk_level": analysis_data.get("risk_level", ""),
+            # 模型与提示词版本
+            "model": config.LLM_MODEL,
+            "prompt_version": PROMPT_VERSION,
             # 当前价格
             "current_price": tech_data.get("current_price", 0),
             "weekly_change": tech_data.get("weekly_change", 0),
@@ -402,8 +434,8 @@ class HistoryManager:
         history.append(record)
 
         # 只保留最近90天记录
-        if len(history) > 90:
-            history = history[-90:]
+        cutoff = (datetime.now() - timedelta(days=HISTORY_RETENTION_DAYS)).strftime("%Y-%m-%d %H:%M:%S")
+        history = [r for r in history if r.get("date", "") >= cutoff]
 
         try:
             with open(self.history_file, "w", encoding="utf-8") as f:
@@ -541,42 +573,53 @@ class TradingAnalyzer:
 
         return prompt
 
-    def analyze_and_notify(self):
-        """执行分析并推送结果"""
-        logger.info(f"开始分析 {self.symbol}")
-
-        # 1. 技术面分析
-        tech_data = self.tech_analyzer.analyze()
-        if "error" in tech_data:
-            logger.error(f"技术分析失败: {tech_data['error']}")
-            return
-
-        # 2. 消息面分析
-        news_list = self.news_analyzer.fetch_news()
-        news_text = self.news_analyzer.summarize_news(news_list)
-
-        # 3. 获取上次预测
-        last_prediction = self.history_manager.get_last_prediction(self.symbol)
+    def parse_prediction(self, llm_result: str) -> dict:
+        """
+        解析 LLM 返回的预测 JSON
 
-        # 4. 生成提示词并调用 LLM
-        prompt = self.generate_prompt(tech_data, news_text, last_prediction)
-        llm_result = llm_client.analyze(prompt)
+        Args:
+            llm_result: LLM 返回文本
 
-        # 5. 解析 LLM 结果
+        Returns:
+            预测字典，解析失败时返回默认的震荡预测
+        """
         try:
             # 尝试提取 JSON
-            import re
             json_match = re.search(r'\{.*\}', llm_result, re.DOTALL)
             if json_match:
-                prediction_data = json.loads(json_match.group())
-            else:
-                prediction_data = {"prediction": "震荡", "confidence": "中", "reason": "LLM解析失败"}
+                return json.loads(json_match.group())
+            return {"prediction": "震荡", "confidence": "中", "reason": "LLM解析失败"}
         except json.JSONDecodeError:
             logger.error(f"LLM 返回格式错误: {llm_result}")
-            prediction_data = {"prediction": "震荡", "confidence": "中", "reason": "LLM解析错误"}
+            return {"prediction": "震荡", "confidence": "中", "reason": "LLM解析错误"}
+
+    async def apredict(self, tech_data: dict, news_text: str) -> dict:
+        """
+        生成提示词并调用 LLM 预测 (异步)
+
+        Args:
+            tech_data: 技术分析数据
+            news_text: 新闻文本
+
+        Returns:
+            预测字典
+        """
+        last_prediction = self.history_manager.get_last_prediction(self.symbol)
+        prompt = self.generate_prompt(tech_data, news_text, last_prediction)
+        return self.parse_prediction(await llm_client.aanalyze(prompt))
+
+    def build_embed(self, tech_data: dict, prediction_data: dict) -> dict:
+        """
+        构建 Discord Embed
 
-        # 6. 构建 Discord Embed
-        embed = {
+        Args:
+            tech_data: 技术分析数据
+            prediction_data: 预测字典
+
+        Returns:
+            Embed 字典
+        """
+        return {
             "title": f"📈 {self.symbol} 行情分析预测",
             "color": 0x00FF00 if prediction_data.get("prediction") == "偏多" else 0xFF0000 if prediction_data.get("prediction") == "偏空" else 0xFFFF00,
             "fields": [
@@ -631,11 +674,17 @@ class TradingAnalyzer:
             }
         }
 
-        # 7. 发送通知
+    def notify(self, tech_data: dict, prediction_data: dict):
+        """
+        推送分析结果并保存历史记录
+
+        Args:
+            tech_data: 技术分析数据
+            prediction_data: 预测字典
+        """
         content = f"📊 每日行情分析报告 - {datetime.now().strftime('%Y-%m-%d')}"
-        self.notifier.send(content, embed)
+        self.notifier.send(content, self.build_embed(tech_data, prediction_data))
 
-        # 8. 保存历史记录
         self.history_manager.save_analysis({
             "symbol": self.symbol,
             "prediction": prediction_data.get("prediction", ""),
@@ -648,14 +697,132 @@ class TradingAnalyzer:
 
         logger.info(f"分析完成: {self.symbol} - {prediction_data.get('prediction', '')}")
 
+    def analyze_and_notify(self):
+        """执行分析并推送结果"""
+        run_pipeline_sync([self.symbol], self.notifier.webhook_url)
+
+
+# ==================== 分析流水线 ====================
+class StageTimer:
+    """记录流水线各阶段耗时"""
+
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+
+    def record(self, stage: str, started: float):
+        self.timings[stage] = round(time.perf_counter() - started, 3)
+
+    def summary(self) -> str:
+        return ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in self.timings.items())
+
+
+async def _timed(timer: StageTimer, stage: str, coro):
+    """执行协程并记录耗时"""
+    started = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timer.record(stage, started)
+
+
+async def run_pipeline(symbols: list[str], webhook_url: str = WEBHOOK_URL) -> dict[str, float]:
+    """
+    多交易对分析流水线
+
+    1. 所有交易对的K线与指标并发获取（每个交易对一次基础K线拉取），新闻只拉取一次，与K线同时进行；
+       新闻建立相关度索引后，每个交易对的提示词只包含与其相关的前 k 条
+    2. LLM 调用并发执行，受 LLM_CONCURRENCY 限制
+    3. 推送与历史记录按交易对顺序串行完成
+
+    Args:
+        symbols: 交易对列表
+        webhook_url: Discord Webhook URL
+
+    Returns:
+        各阶段耗时（秒）
+    """
+    timer = StageTimer()
+    started = time.perf_counter()
+    analyzers = [TradingAnalyzer(symbol, webhook_url) for symbol in symbols]
+    news_analyzer = NewsAnalyzer()
+
+    with request_priority(Priority.BACKGROUND):
+        tech_results, news_list = await asyncio.gather(
+            _timed(timer, "technical", asyncio.gather(*(a.tech_analyzer.aanalyze() for a in analyzers))),
+            _timed(timer, "news", news_analyzer.afetch_news(NEWS_CANDIDATES)),
+        )
+
+    # 新闻只建一次索引，每个交易对取各自相关度最高的部分
+    news_index = NewsIndex(news_list, symbols)
+    news_texts = {
+        symbol: news_index.render(symbol, NEWS_TOP_K, NEWS_MAX_CHARS) if news_list else "暂无最新新闻"
+        for symbol in symbols
+    }
+    logger.info(
+        "消息面: 候选新闻 %d 条，各交易对新闻段落 %s 字符",
+        len(news_list), {symbol: len(text) for symbol, text in news_texts.items()},
+    )
+
+    ready = []
+    for analyzer, tech_data in zip(analyzers, tech_results):
+        if "error" in tech_data:
+            logger.error(f"技术分析失败 {analyzer.symbol}: {tech_data['error']}")
+            continue
+        ready.append((analyzer, tech_data))
+
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+    async def predict(analyzer: TradingAnalyzer, tech_data: dict) -> dict:
+        async with semaphore:
+            return await analyzer.apredict(tech_data, news_texts[analyzer.symbol])
+
+    results = await _timed(
+        timer, "llm",
+        asyncio.gather(*(predict(analyzer, tech_data) for analyzer, tech_data in ready), return_exceptions=True),
+    )
+
+    predicted = []
+    for (analyzer, tech_data), prediction_data in zip(ready, results):
+        if isinstance(prediction_data, BaseException):
+            logger.error(f"LLM 预测失败 {analyzer.symbol}: {prediction_data!r}")
+            continue
+        predicted.append((analyzer, tech_data, prediction_data))
+
+    notify_started = time.perf_counter()
+    notified = 0
+    for i, (analyzer, tech_data, prediction_data) in enumerate(predicted):
+        if i:
+            await asyncio.sleep(NOTIFY_INTERVAL)
+        try:
+            await asyncio.to_thread(analyzer.notify, tech_data, prediction_data)
+            notified += 1
+        except Exception:
+            logger.exception(f"推送分析结果失败 {analyzer.symbol}")
+    timer.record("notify", notify_started)
+    timer.record("total", started)
+
+    logger.info(f"分析完成 {notified}/{len(symbols)} 个交易对，耗时: {timer.summary()}")
+    return timer.timings
+
+
+def run_pipeline_sync(symbols: list[str], webhook_url: str = WEBHOOK_URL) -> dict[str, float]:
+    """
+    多交易对分析流水线 (同步封装)
+    在 OKX 客户端的后台事件循环中执行，K线连接池与 LLM 异步客户端跨次复用
+    """
+    return async_okx_client.run_sync(run_pipeline(symbols, webhook_url))
+
 
 # ==================== 定时任务 ====================
 def run_analysis():
-    """执行分析任务"""
-    for symbol in SYMBOLS:
-        analyzer = TradingAnalyzer(symbol, WEBHOOK_URL)
-        analyzer.analyze_and_notify()
-        time.sleep(1)
+    """
+    执行分析任务（后台优先级，经过 OKX 限频器）
+    异常只记录日志，不影响守护进程与后续定时任务
+    """
+    try:
+        run_pipeline_sync(SYMBOLS)
+    except Exception:
+        logger.exception("分析任务执行失败")
 
 
 def main():
@@ -16,12 +16,27 @@ TRADING_SYMBOLS = os.getenv("TRADING_SYMBOLS", "BTC-USDT-SWAP").split(",")
 # 每日分析推送时间（24小时制，格式: HH:MM）
 TRADING_ANALYSIS_TIME = os.getenv("TRADING_ANALYSIS_TIME", "09:00")
 
+# 同时进行的 LLM 分析请求数上限
+ANALYSIS_LLM_CONCURRENCY = int(os.getenv("ANALYSIS_LLM_CONCURRENCY", "4"))
+
+# 每个交易对提示词中的相关新闻条数与字符预算
+ANALYSIS_NEWS_TOP_K = int(os.getenv("ANALYSIS_NEWS_TOP_K", "5"))
+ANALYSIS_NEWS_MAX_CHARS = int(os.getenv("ANALYSIS_NEWS_MAX_CHARS", "1200"))
+
 # ==================== OKX API 配置 ====================
 OKX_API_KEY = os.getenv("OKX_API_KEY", "")
 OKX_API_SECRET = os.getenv("OKX_API_SECRET", "")
 OKX_PASSPHRASE = os.getenv("OKX_PASSPHRASE", "")
 OKX_BASE_URL = os.getenv("OKX_BASE_URL", "https://www.okx.com")
 OKX_FLAG = os.getenv("OKX_FLAG", "0")
+BASE_URL = OKX_BASE_URL
+
+# OKX 请求缓存 TTL（秒）
+OKX_CACHE_TTL_PRIVATE = float(os.getenv("OKX_CACHE_TTL_PRIVATE", "2"))
+OKX_CACHE_TTL_PUBLIC = float(os.getenv("OKX_CACHE_TTL_PUBLIC", "10"))
+
+# 指标结果缓存的内存上限（MB）
+INDICATOR_CACHE_MAX_MB = float(os.getenv("INDICATOR_CACHE_MAX_MB", "64"))
 
 # ==================== LLM 配置 ====================
 LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")